@@ -10,6 +10,10 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from core.config import get_settings
 from core.database import Base
 import v1.models.user  # Importe tous les modèles ici
+import v1.models.document
+import v1.models.answer_cache
+import v1.models.conversation
+import v1.models.revocation
 
 # Cette variable est utilisée par Alembic
 config = context.config
@@ -23,12 +27,19 @@ config.set_main_option('sqlalchemy.url', settings.DATABASE_URL)
 
 target_metadata = Base.metadata
 
+def include_object(object, name, type_, reflected, compare_to):
+    # Index FTS5 et ses tables internes : créés par les migrations en SQL brut, hors des modèles
+    if type_ == "table" and reflected and compare_to is None and "_fts" in name:
+        return False
+    return True
+
 def run_migrations_offline():
     context.configure(
         url=config.get_main_option('sqlalchemy.url'),
         target_metadata=target_metadata,
         literal_binds=True,
-        compare_type=True
+        compare_type=True,
+        include_object=include_object
     )
     with context.begin_transaction():
         context.run_migrations()
@@ -43,7 +54,8 @@ def run_migrations_online():
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
-            compare_type=True
+            compare_type=True,
+            include_object=include_object
         )
         with context.begin_transaction():
             context.run_migrations()
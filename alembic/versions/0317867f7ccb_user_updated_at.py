@@ -0,0 +1,30 @@
+"""User updated_at
+
+Revision ID: 0317867f7ccb
+Revises: 8b1ac22c5626
+Create Date: 2026-10-17 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0317867f7ccb'
+down_revision: Union[str, None] = '8b1ac22c5626'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Utilisateurs existants : jamais modifiés depuis leur création (pour ce que l'on en sait)
+    op.execute("UPDATE users SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'updated_at')
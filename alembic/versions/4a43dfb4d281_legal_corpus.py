@@ -0,0 +1,74 @@
+"""Legal corpus: documents, chunks and FTS5 index
+
+Revision ID: 4a43dfb4d281
+Revises: e3977bee2df9
+Create Date: 2026-10-17 18:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a43dfb4d281'
+down_revision: Union[str, None] = 'e3977bee2df9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copie figée de v1.models.document.CHUNKS_FTS_DDL (une migration ne doit pas suivre le modèle)
+CHUNKS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE chunks_fts USING fts5("
+    "heading, text, content='chunks', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO chunks_fts(chunks_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)')",
+    "CREATE TRIGGER chunks_fts_ai AFTER INSERT ON chunks BEGIN "
+    "INSERT INTO chunks_fts(rowid, heading, text) VALUES (new.id, new.heading, new.text); END",
+    "CREATE TRIGGER chunks_fts_ad AFTER DELETE ON chunks BEGIN "
+    "INSERT INTO chunks_fts(chunks_fts, rowid, heading, text) VALUES ('delete', old.id, old.heading, old.text); END",
+    "CREATE TRIGGER chunks_fts_au AFTER UPDATE OF heading, text ON chunks BEGIN "
+    "INSERT INTO chunks_fts(chunks_fts, rowid, heading, text) VALUES ('delete', old.id, old.heading, old.text); "
+    "INSERT INTO chunks_fts(rowid, heading, text) VALUES (new.id, new.heading, new.text); END",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('source', sa.String(), nullable=True),
+    sa.Column('published_at', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_documents_code'), 'documents', ['code'], unique=False)
+    op.create_index(op.f('ix_documents_published_at'), 'documents', ['published_at'], unique=False)
+    op.create_table('chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('article_number', sa.String(), nullable=True),
+    sa.Column('heading', sa.String(), nullable=True),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_chunks_article_number'), 'chunks', ['article_number'], unique=False)
+    op.create_index('ix_chunks_document_id_position', 'chunks', ['document_id', 'position'], unique=False)
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in CHUNKS_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS chunks_fts")
+    op.drop_index('ix_chunks_document_id_position', table_name='chunks')
+    op.drop_index(op.f('ix_chunks_article_number'), table_name='chunks')
+    op.drop_table('chunks')
+    op.drop_index(op.f('ix_documents_published_at'), table_name='documents')
+    op.drop_index(op.f('ix_documents_code'), table_name='documents')
+    op.drop_table('documents')
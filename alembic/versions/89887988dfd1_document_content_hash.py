@@ -0,0 +1,31 @@
+"""Document content hash for incremental ingestion
+
+Revision ID: 89887988dfd1
+Revises: ad94653f070e
+Create Date: 2026-10-17 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '89887988dfd1'
+down_revision: Union[str, None] = 'ad94653f070e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_documents_source'), 'documents', ['source'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_documents_source'), table_name='documents')
+    # ALTER TABLE ... DROP COLUMN (SQLite >= 3.35) : pas de recréation de la table, les triggers restent
+    op.drop_column('documents', 'content_hash')
@@ -0,0 +1,31 @@
+"""Users index audit
+
+Revision ID: 8b1ac22c5626
+Revises: b040b5acd6a2
+Create Date: 2026-10-17 20:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1ac22c5626'
+down_revision: Union[str, None] = 'b040b5acd6a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ix_users_id doublonnait la clé primaire (rowid) ; role sert à admin_exists() à chaque création d'admin
+    op.drop_index('ix_users_id', table_name='users')
+    op.create_index(op.f('ix_users_role'), 'users', ['role'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_role'), table_name='users')
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
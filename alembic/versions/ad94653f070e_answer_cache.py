@@ -0,0 +1,63 @@
+"""Answer cache and corpus version
+
+Revision ID: ad94653f070e
+Revises: 4a43dfb4d281
+Create Date: 2026-10-17 19:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad94653f070e'
+down_revision: Union[str, None] = '4a43dfb4d281'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copie figée de v1.models.document.CORPUS_VERSION_DDL
+_BUMP = "UPDATE corpus_state SET version = version + 1 WHERE id = 1"
+CORPUS_VERSION_TRIGGERS = (
+    ("corpus_version_chunks_ai", "INSERT", "chunks"),
+    ("corpus_version_chunks_ad", "DELETE", "chunks"),
+    ("corpus_version_chunks_au", "UPDATE OF heading, text, article_number", "chunks"),
+    ("corpus_version_documents_au", "UPDATE OF code, title, published_at", "documents"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('corpus_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO corpus_state (id, version) VALUES (1, 0)")
+    op.create_table('answer_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('answer', sa.Text(), nullable=False),
+    sa.Column('sources', sa.Text(), nullable=False),
+    sa.Column('embedding', sa.LargeBinary(), nullable=True),
+    sa.Column('corpus_version', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.Float(), nullable=False),
+    sa.Column('last_used_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+    op.create_index(op.f('ix_answer_cache_last_used_at'), 'answer_cache', ['last_used_at'], unique=False)
+    if op.get_bind().dialect.name == "sqlite":
+        for name, operation, table in CORPUS_VERSION_TRIGGERS:
+            op.execute(f"CREATE TRIGGER {name} AFTER {operation} ON {table} BEGIN {_BUMP}; END")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for name, _, _ in CORPUS_VERSION_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_index(op.f('ix_answer_cache_last_used_at'), table_name='answer_cache')
+    op.drop_table('answer_cache')
+    op.drop_table('corpus_state')
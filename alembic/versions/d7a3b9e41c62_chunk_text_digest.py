@@ -0,0 +1,45 @@
+"""Chunk text digest for vector index sync
+
+Revision ID: d7a3b9e41c62
+Revises: c5e1f2a9d704
+Create Date: 2026-10-17 21:10:00.000000
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3b9e41c62'
+down_revision: Union[str, None] = 'c5e1f2a9d704'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Copie figée de v1.models.document.text_digest (une migration ne doit pas suivre le modèle)
+def _text_digest(heading, text) -> int:
+    embedded = f"{heading}\n{text}" if heading else text
+    return int.from_bytes(hashlib.blake2b(embedded.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chunks', sa.Column('text_digest', sa.BigInteger(), nullable=True))
+    bind = op.get_bind()
+    chunks = sa.table('chunks', sa.column('id', sa.Integer), sa.column('heading', sa.String),
+                      sa.column('text', sa.Text), sa.column('text_digest', sa.BigInteger))
+    rows = bind.execute(sa.select(chunks.c.id, chunks.c.heading, chunks.c.text)).all()
+    for start in range(0, len(rows), 1000):
+        bind.execute(
+            chunks.update().where(chunks.c.id == sa.bindparam('chunk_id')).values(text_digest=sa.bindparam('digest')),
+            [{'chunk_id': row.id, 'digest': _text_digest(row.heading, row.text)} for row in rows[start:start + 1000]],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ALTER TABLE ... DROP COLUMN (SQLite >= 3.35) : pas de recréation de la table, les triggers restent
+    op.drop_column('chunks', 'text_digest')
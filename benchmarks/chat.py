@@ -0,0 +1,108 @@
+# Benchmark du chat en flux (SSE) : latence du premier token et durée totale, sur un vrai serveur uvicorn
+#
+#   python -m benchmarks.chat --streams 200 --concurrency 32 --output chat.json
+#   python -m benchmarks.chat --baseline chat.json --threshold 0.2
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.run import ADMIN_EMAIL, PASSWORD, configure_env, seed, uvicorn_server
+from benchmarks.stats import compare, summarize
+
+
+async def one_stream(client: httpx.AsyncClient, headers: Dict[str, str], message: str) -> Tuple[float, float]:
+    """(premier token, fin du flux) en secondes depuis l'envoi de la question, côté client."""
+    start = time.perf_counter()
+    first_token = None
+    async with client.stream("POST", "/v1/chat", json={"message": message}, headers=headers) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if first_token is None and line == "event: token":
+                first_token = time.perf_counter() - start
+    return first_token or 0.0, time.perf_counter() - start
+
+
+async def run_streams(base_url: str, streams: int, concurrency: int, questions: int) -> Dict[str, Dict[str, float]]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        resp = await client.post("/v1/users/token", data={"username": ADMIN_EMAIL, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        queue: asyncio.Queue = asyncio.Queue()
+        # `questions` questions distinctes : les répétitions passent par le cache des réponses
+        for i in range(streams):
+            queue.put_nowait(f"Question {i % questions if questions else i} : quelles sont les obligations du preneur ?")
+        first_tokens: List[float] = []
+        totals: List[float] = []
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                message = queue.get_nowait()
+                try:
+                    first_token, total = await one_stream(client, headers, message)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                first_tokens.append(first_token)
+                totals.append(total)
+
+        wall = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - wall
+    return {"first_token": summarize(first_tokens, errors, wall), "total": summarize(totals, errors, wall)}
+
+
+async def run(args) -> Dict[str, Dict[str, float]]:
+    async with uvicorn_server(args.workers) as base_url:
+        return await run_streams(base_url, args.streams, args.concurrency, args.questions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du chat en flux.")
+    parser.add_argument("--workers", type=int, default=2, help="Workers uvicorn")
+    parser.add_argument("--streams", type=int, default=200, help="Flux mesurés")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--questions", type=int, default=0, help="Questions distinctes (0 = toutes différentes, sans cache)")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="Modèle factice : délai du premier token")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="Modèle factice : délai entre tokens")
+    parser.add_argument("--output", help="Fichier JSON où enregistrer les résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Régression tolérée (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(os.path.join(tmp, "chat.db"))
+        os.environ["CHAT_FAKE_FIRST_TOKEN_DELAY"] = str(args.first_token_delay)
+        os.environ["CHAT_FAKE_TOKEN_DELAY"] = str(args.token_delay)
+        os.environ["CHAT_MAX_STREAMS_PER_USER"] = "0"  # un seul compte pour tous les flux
+        os.environ["VECTOR_INDEX_DIR"] = os.path.join(tmp, "vectors")
+        seed(0)
+        results = asyncio.run(run(args))
+    for name, result in results.items():
+        print(f"{name:<12} {json.dumps(result)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for regression in regressions:
+            print(f"[REGRESSION] {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
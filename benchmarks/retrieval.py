@@ -0,0 +1,105 @@
+# Benchmark de la recherche sémantique (index de vecteurs mappé en mémoire), hors ligne
+#
+#   python -m benchmarks.retrieval --vectors 300000 --queries 200 --output retrieval.json
+#   python -m benchmarks.retrieval --baseline retrieval.json --threshold 0.2
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.stats import compare, summarize
+
+BATCH_SIZES = (1, 8, 32)
+
+
+def build_index(path: str, vectors: int, dim: int, dtype: str, segment_rows: int):
+    """Vecteurs aléatoires normalisés, ajoutés segment par segment comme le ferait `sync_index`."""
+    from core.embeddings import normalize_rows
+    from core.vector_index import VectorIndex
+
+    rng = np.random.default_rng(42)
+    index = VectorIndex(path, dim=dim, dtype=dtype, embedder="benchmark", segment_rows=segment_rows)
+    start = time.perf_counter()
+    for first in range(0, vectors, segment_rows):
+        count = min(segment_rows, vectors - first)
+        index.add(np.arange(first, first + count), normalize_rows(rng.standard_normal((count, dim))))
+    print(f"[INFO] {dtype} : {vectors} vecteurs indexés en {time.perf_counter() - start:.1f}s")
+    return index
+
+
+def run_searches(index, queries: int, k: int, block_rows: int) -> Dict[str, Dict[str, float]]:
+    from core.embeddings import normalize_rows
+
+    rng = np.random.default_rng(7)
+    index.block_rows = block_rows
+    index.search(normalize_rows(rng.standard_normal((1, index.dim))), k)  # pages chargées en mémoire
+    results = {}
+    for batch in BATCH_SIZES:
+        latencies: List[float] = []
+        wall = time.perf_counter()
+        for _ in range(max(queries // batch, 1)):
+            q = normalize_rows(rng.standard_normal((batch, index.dim)))
+            start = time.perf_counter()
+            index.search(q, k)
+            latencies.append(time.perf_counter() - start)
+        name = f"{index.dtype.name}_batch{batch}"
+        results[name] = summarize(latencies, 0, time.perf_counter() - wall)
+        print(f"{name:<16} {json.dumps(results[name])}")
+    return results
+
+
+def run_embedder(texts: int, dim: int) -> Dict[str, float]:
+    """Débit du plongement local `hashing` (textes de la taille d'un article)."""
+    from core.embeddings import HashingEmbedder
+
+    embedder = HashingEmbedder(dim)
+    corpus = [f"Article {i} : le contrat de bail oblige le preneur à payer le loyer convenu au bailleur." * 4 for i in range(texts)]
+    start = time.perf_counter()
+    embedder.embed(corpus)
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] hashing-{dim} : {texts / elapsed:.0f} textes/s")
+    return {"texts_per_s": round(texts / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la recherche sémantique.")
+    parser.add_argument("--vectors", type=int, default=300_000, help="Vecteurs dans l'index")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--dtypes", nargs="+", default=["float16", "float32"], help="Types de stockage comparés")
+    parser.add_argument("--segment-rows", type=int, default=65536)
+    parser.add_argument("--block-rows", type=int, default=16384)
+    parser.add_argument("--queries", type=int, default=200, help="Questions mesurées par taille de lot")
+    parser.add_argument("--k", type=int, default=10, help="Top-k demandé")
+    parser.add_argument("--embed-texts", type=int, default=2000, help="Textes plongés pour mesurer l'embedder")
+    parser.add_argument("--output", help="Fichier JSON où enregistrer les résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Régression tolérée (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    results = {}
+    for dtype in args.dtypes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = build_index(tmp, args.vectors, args.dim, dtype, args.segment_rows)
+            results.update(run_searches(index, args.queries, args.k, args.block_rows))
+            index.close()
+    embedder = run_embedder(args.embed_texts, args.dim)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results, "embedder": embedder}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for regression in regressions:
+            print(f"[REGRESSION] {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
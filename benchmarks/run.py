@@ -0,0 +1,232 @@
+# Benchmark de charge / latence de l'API v1 (main.app réelle sur une base SQLite peuplée)
+#
+#   python -m benchmarks.run --mode inprocess --concurrency 16 --requests 500 --output bench.json
+#   python -m benchmarks.run --mode uvicorn --workers 4 --baseline bench.json --threshold 0.2
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.stats import compare, summarize
+
+PASSWORD = "benchmarkpassword"
+ADMIN_EMAIL = "bench-admin@example.com"
+ENDPOINTS = ("login", "get_user", "list_users", "create_user", "update_user")
+
+
+def configure_env(db_path: str) -> None:
+    """À appeler avant le premier `get_settings()` : la config est lue une seule fois par processus."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    # Toutes les requêtes viennent de la même IP : la limitation fausserait la mesure
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+
+
+def seed(users: int) -> None:
+    from core.database import get_database
+    from core.db_base import Base
+    from core.security import hash_password
+    from v1.crud import user as user_crud
+    from v1.schemas.user import UserCreate
+    from v1.services.user_import import ImportCandidate, insert_rows
+    import v1.models.answer_cache  # noqa: F401 (tables du chat, créées avec les autres)
+    import v1.models.document  # noqa: F401
+
+    database = get_database()
+    Base.metadata.create_all(bind=database.engine)
+    # Un seul hachage réutilisé : le peuplement ne doit pas dominer le temps du benchmark
+    hashed = hash_password(PASSWORD)
+    with database.SessionLocal() as db:
+        user_crud.create_user(db, ADMIN_EMAIL, hashed, role="admin")
+        candidates = [
+            ImportCandidate(i, UserCreate(email=f"bench{i}@example.com", password=PASSWORD))
+            for i in range(users)
+        ]
+        insert_rows(db, candidates, [hashed] * users, batch_size=1000)
+
+
+class Scenarios:
+    """Une requête par appel ; retourne le code HTTP."""
+
+    def __init__(self, users: int):
+        self.users = users
+        self.admin_headers: Dict[str, str] = {}
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        resp = await client.post("/v1/users/token", data={"username": ADMIN_EMAIL, "password": PASSWORD})
+        resp.raise_for_status()
+        self.admin_headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    def _user_id(self) -> int:
+        # id 1 = admin, les utilisateurs peuplés suivent
+        return random.randint(2, self.users + 1)
+
+    async def login(self, client: httpx.AsyncClient) -> int:
+        email = f"bench{self._user_id() - 2}@example.com"
+        resp = await client.post("/v1/users/token", data={"username": email, "password": PASSWORD})
+        return resp.status_code
+
+    async def get_user(self, client: httpx.AsyncClient) -> int:
+        resp = await client.get(f"/v1/users/{self._user_id()}", headers=self.admin_headers)
+        return resp.status_code
+
+    async def list_users(self, client: httpx.AsyncClient) -> int:
+        resp = await client.get("/v1/users/?limit=50", headers=self.admin_headers)
+        return resp.status_code
+
+    async def create_user(self, client: httpx.AsyncClient) -> int:
+        payload = {"email": f"new-{uuid.uuid4().hex[:12]}@example.com", "password": PASSWORD}
+        resp = await client.post("/v1/users/", json=payload)
+        return resp.status_code
+
+    async def update_user(self, client: httpx.AsyncClient) -> int:
+        resp = await client.patch(f"/v1/users/{self._user_id()}", json={"is_active": True}, headers=self.admin_headers)
+        return resp.status_code
+
+
+async def drive(client: httpx.AsyncClient, call: Callable[[httpx.AsyncClient], Awaitable[int]], requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                status = await call(client)
+            except httpx.HTTPError:
+                status = 0
+            elapsed = time.perf_counter() - start
+            if 200 <= status < 300:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_all(client: httpx.AsyncClient, args) -> Dict[str, Dict[str, float]]:
+    scenarios = Scenarios(args.users)
+    await scenarios.setup(client)
+    results = {}
+    for name in args.endpoints:
+        call = getattr(scenarios, name)
+        await drive(client, call, min(args.warmup, args.requests), args.concurrency)
+        results[name] = await drive(client, call, args.requests, args.concurrency)
+        print(f"{name:<12} {json.dumps(results[name])}")
+    return results
+
+
+async def run_inprocess(args) -> Dict[str, Dict[str, float]]:
+    from main import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return await run_all(client, args)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_server(workers: int) -> AsyncIterator[str]:
+    """Lance `uvicorn main:app` dans un sous-processus et attend qu'il réponde ; fournit l'URL de base."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.2)
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def run_uvicorn(args) -> Dict[str, Dict[str, float]]:
+    async with uvicorn_server(args.workers) as base_url:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            return await run_all(client, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'API v1.")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=4, help="Workers uvicorn (mode uvicorn)")
+    parser.add_argument("--users", type=int, default=1000, help="Utilisateurs insérés avant la mesure")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes mesurées par endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="Requêtes de chauffe par endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--output", help="Fichier JSON où enregistrer les résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Régression tolérée (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    # Les logs INFO de httpx (une ligne par requête) fausseraient la mesure
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(os.path.join(tmp, "bench.db"))
+        seed(args.users)
+        runner = run_uvicorn if args.mode == "uvicorn" else run_inprocess
+        results = asyncio.run(runner(args))
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: getattr(args, k) for k in ("mode", "workers", "users", "requests", "concurrency")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"[REGRESSION] {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"[OK] aucune régression au-delà de {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
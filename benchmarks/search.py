@@ -0,0 +1,135 @@
+# Benchmark de la recherche plein texte (FTS5 / BM25) sur un corpus synthétique
+#
+#   python -m benchmarks.search --articles 300000 --queries 200 --output search.json
+#   python -m benchmarks.search --baseline search.json --threshold 0.2
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from benchmarks.run import configure_env
+from benchmarks.stats import compare, summarize
+
+CODES = ("Code civil", "Code pénal", "Code du travail", "Code de commerce", "Code de la consommation")
+COMMON = (
+    "contrat", "dommage", "responsabilité", "obligation", "partie", "juge", "délai", "tribunal", "droit", "personne",
+    "faute", "paiement", "créancier", "débiteur", "preuve", "acte", "loi", "nullité", "vente", "bail",
+)
+RARE = ("usufruit", "emphytéose", "antichrèse", "subrogation", "novation", "prescription", "cautionnement", "servitude")
+# Vocabulaire à fréquences de Zipf : des mots outils très fréquents (jamais recherchés), les termes juridiques
+# courants juste après (quelques % des articles chacun), les termes rares vers le rang 5000 (~0,1 %)
+VOCABULARY = (
+    [f"outil{i}" for i in range(50)] + list(COMMON) + [f"mot{i}" for i in range(5000)]
+    + list(RARE) + [f"mot{i}" for i in range(5000, 20000)]
+)
+CUM_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+
+SCENARIOS = {
+    "rare_term": lambda rng: {"q": rng.choice(RARE)},
+    "common_term": lambda rng: {"q": rng.choice(COMMON)},
+    "two_terms": lambda rng: {"q": " ".join(rng.sample(COMMON, 2))},
+    "any_terms": lambda rng: {"q": " ".join(rng.sample(COMMON, 3)), "match": "any"},
+    "code_filter": lambda rng: {"q": rng.choice(COMMON), "code": rng.choice(CODES)},
+    "date_filter": lambda rng: {"q": rng.choice(COMMON), "date_from": "2015-01-01"},
+}
+
+
+def _article_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=words)).capitalize() + "."
+
+
+def seed_corpus(articles: int, per_document: int, seed: int) -> None:
+    """Insertion en masse (executemany) : les triggers alimentent l'index FTS au fil de l'eau."""
+    from sqlalchemy import insert
+    from core.database import get_database
+    from core.db_base import Base
+    from v1.models.document import Chunk, Document
+
+    rng = random.Random(seed)
+    database = get_database()
+    Base.metadata.create_all(bind=database.engine)
+    start = time.perf_counter()
+    with database.engine.begin() as conn:
+        documents = articles // per_document
+        conn.execute(insert(Document), [
+            {"id": i + 1, "code": CODES[i % len(CODES)], "title": f"Texte {i + 1}",
+             "published_at": date(2000, 1, 1) + timedelta(days=rng.randrange(9000))}
+            for i in range(documents)
+        ])
+        batch = []
+        for i in range(documents * per_document):
+            batch.append({
+                "document_id": i // per_document + 1, "position": i % per_document,
+                "article_number": str(1000 + i % per_document), "heading": None,
+                "text": _article_text(rng, rng.randint(30, 120)),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Chunk), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(Chunk), batch)
+        conn.exec_driver_sql("INSERT INTO chunks_fts(chunks_fts) VALUES ('optimize')")
+    print(f"[INFO] {documents * per_document} articles indexés en {time.perf_counter() - start:.1f}s")
+
+
+def run_queries(queries: int, limit: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """Appelle directement la couche crud (sans HTTP) : mesure la requête SQL seule."""
+    from core.database import get_database
+    from v1.crud import document as document_crud
+
+    rng = random.Random(seed)
+    results = {}
+    with get_database().SessionLocal() as db:
+        for name, make_params in SCENARIOS.items():
+            latencies: List[float] = []
+            wall = time.perf_counter()
+            for _ in range(queries):
+                params = make_params(rng)
+                match_query = document_crud.build_match_query(params["q"], params.get("match", "all"))
+                date_from = date.fromisoformat(params["date_from"]) if "date_from" in params else None
+                start = time.perf_counter()
+                document_crud.search_chunks(db, match_query, code=params.get("code"), date_from=date_from, limit=limit)
+                latencies.append(time.perf_counter() - start)
+            results[name] = summarize(latencies, 0, time.perf_counter() - wall)
+            print(f"{name:<12} {json.dumps(results[name])}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la recherche plein texte.")
+    parser.add_argument("--articles", type=int, default=300_000, help="Articles du corpus synthétique")
+    parser.add_argument("--per-document", type=int, default=200, help="Articles par document")
+    parser.add_argument("--queries", type=int, default=100, help="Requêtes mesurées par scénario")
+    parser.add_argument("--limit", type=int, default=10, help="Top-k demandé")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichier JSON où enregistrer les résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Régression tolérée (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(os.path.join(tmp, "search.db"))
+        seed_corpus(args.articles, args.per_document, args.seed)
+        results = run_queries(args.queries, args.limit, args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for regression in regressions:
+            print(f"[REGRESSION] {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
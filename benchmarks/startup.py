@@ -0,0 +1,111 @@
+# Rapport de démarrage : import de main, create_app, lifespan et première requête, dans des processus neufs
+#
+#   python -m benchmarks.startup --runs 5 --output startup.json
+#   python -m benchmarks.startup --importtime 15
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.run import configure_env
+
+# Première requête : login d'un compte inexistant (route, dépendances, session SQL, création des engines)
+FIRST_REQUEST = ("POST", "/v1/users/token", {"username": "nobody@example.com", "password": "x"})
+
+
+def measure_once() -> Dict[str, float]:
+    """Exécuté dans un processus neuf (`--once`) : rien n'est encore importé."""
+    start = time.perf_counter()
+    import main
+    from core.startup import startup_report
+    from fastapi.testclient import TestClient
+
+    app = main.app
+    method, path, data = FIRST_REQUEST
+    with TestClient(app) as client:
+        client.request(method, path, data=data)
+        second = time.perf_counter()
+        client.request(method, path, data=data)
+        second_request_ms = round((time.perf_counter() - second) * 1000, 2)
+    report = startup_report.as_dict()
+    report["second_request_ms"] = second_request_ms
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return report
+
+
+def prepare_database(db_path: str) -> None:
+    from sqlalchemy import create_engine
+    from core.db_base import Base
+    import v1.models.user  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+
+def run_fresh(runs: int) -> List[Dict[str, float]]:
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--once"],
+            env=os.environ.copy(), check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def import_profile(top: int) -> List[Dict[str, object]]:
+    """Modules les plus coûteux à l'import de `main` (temps cumulé, `python -X importtime`)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=os.environ.copy(), check=True, capture_output=True, text=True,
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        modules.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure du démarrage de l'application.")
+    parser.add_argument("--runs", type=int, default=5, help="Processus neufs mesurés")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="Affiche les N imports les plus coûteux")
+    parser.add_argument("--output", help="Fichier JSON où enregistrer le rapport")
+    parser.add_argument("--once", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.once:
+        print(json.dumps(measure_once()))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(os.path.join(tmp, "startup.db"))
+        prepare_database(os.path.join(tmp, "startup.db"))
+        runs = run_fresh(args.runs)
+        profile = import_profile(args.importtime) if args.importtime else []
+
+    report = {
+        "runs": runs,
+        "median": {key: round(statistics.median(run[key] for run in runs), 2) for key in runs[0]},
+        "imports": profile,
+    }
+    for key, value in report["median"].items():
+        print(f"{key:<20} {value:>10.2f}")
+    for module in profile:
+        print(f"{module['cumulative_ms']:>10.2f} ms  {module['module']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Agrégation des latences et comparaison avec une exécution de référence
+
+import math
+from typing import Dict, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Percentile par rang le plus proche sur des valeurs déjà triées."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, wall_time: float) -> Dict[str, float]:
+    """Latences en secondes -> débit (req/s) et p50/p95/p99 (ms)."""
+    values = sorted(latencies)
+    total = len(values) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / wall_time, 2) if wall_time > 0 else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """
+    Liste les régressions au-delà de `threshold` (0.2 = 20 %) : p95 plus lent
+    ou débit plus faible que la référence, endpoint par endpoint.
+    """
+    regressions = []
+    for endpoint, base in baseline.items():
+        result = current.get(endpoint)
+        if result is None:
+            continue
+        if base["p95_ms"] > 0 and result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{endpoint}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+        if base["throughput_rps"] > 0 and result["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{endpoint}: throughput {base['throughput_rps']} -> {result['throughput_rps']} req/s")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{endpoint}: errors {base['errors']} -> {result['errors']}")
+    return regressions
@@ -0,0 +1,71 @@
+# Modèle de génération des réponses du chat : interface en flux et modèle factice local
+
+import asyncio
+import importlib
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import AsyncIterator, Sequence, Tuple
+
+from core.config import get_settings
+
+_TOKEN = re.compile(r"\S+\s*")
+
+
+class ChatModel(ABC):
+    """
+    Produit la réponse token par token (générateur asynchrone) : l'API envoie
+    chaque token dès qu'il est produit, et n'en demande un nouveau que quand
+    le précédent est parti (le modèle ne prend jamais d'avance sur le client).
+
+    Un modèle bloquant (générateur sync) s'adapte avec
+    `starlette.concurrency.iterate_in_threadpool`.
+    """
+
+    name: str
+
+    @abstractmethod
+    def stream(self, question: str, context: Sequence[str], history: Sequence[Tuple[str, str]] = ()) -> AsyncIterator[str]:
+        """
+        Tokens de la réponse à `question`, à partir des articles `context` et des
+        derniers messages de la conversation `history` ((rôle, texte), du plus ancien au plus récent).
+        """
+
+
+class FakeChatModel(ChatModel):
+    """
+    Modèle factice déterministe : réponse construite à partir de la question
+    et du nombre d'articles fournis, avec des délais configurables pour
+    simuler le temps avant le premier token et le débit de génération.
+    """
+
+    name = "fake"
+
+    def __init__(self, first_token_delay: float = 0.0, token_delay: float = 0.0):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    async def stream(self, question: str, context: Sequence[str], history: Sequence[Tuple[str, str]] = ()) -> AsyncIterator[str]:
+        found = f"{len(context)} article(s) pertinent(s) trouvé(s)." if context else "Aucun article pertinent trouvé."
+        await asyncio.sleep(self.first_token_delay)
+        for position, token in enumerate(_TOKEN.findall(f"Question reçue : {question.strip()} {found}")):
+            if position:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+
+def load_chat_model(spec: str) -> ChatModel:
+    """`fake` ou `paquet.module:Classe` (classe instanciée sans argument)."""
+    if spec == "fake":
+        settings = get_settings()
+        return FakeChatModel(settings.CHAT_FAKE_FIRST_TOKEN_DELAY, settings.CHAT_FAKE_TOKEN_DELAY)
+    module_name, _, class_name = spec.partition(":")
+    model = getattr(importlib.import_module(module_name), class_name)()
+    if not isinstance(model, ChatModel):
+        raise TypeError(f"{spec} is not a core.chat_model.ChatModel")
+    return model
+
+
+@lru_cache
+def get_chat_model() -> ChatModel:
+    return load_chat_model(get_settings().CHAT_MODEL)
@@ -0,0 +1,74 @@
+# Compression des réponses HTTP (brotli ou gzip) au-delà d'une taille minimale
+
+from typing import FrozenSet
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # paquet optionnel : gzip seulement
+    brotli = None
+
+
+def accepted_encodings(header: str) -> FrozenSet[str]:
+    """Codages de `Accept-Encoding`, hors ceux refusés explicitement (`;q=0`)."""
+    encodings = set()
+    for item in header.split(","):
+        name, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            encodings.add(name.strip().lower())
+    return frozenset(encodings)
+
+
+class BrotliResponder(IdentityResponder):
+    """Même logique que GZipResponder (seuil, flux, types exclus), compresseur brotli."""
+
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            # flush : chaque morceau d'un flux (export) part sans attendre le suivant
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI : brotli si le client l'accepte (et le paquet est installé),
+    sinon gzip, sinon rien. Les réponses de moins de `minimum_size` octets, déjà
+    codées ou en `text/event-stream` (chat) ne sont pas compressées.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encodings = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        responder: ASGIApp
+        if brotli is not None and "br" in encodings:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in encodings:
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -1,5 +1,12 @@
-from pydantic import BaseSettings
-from functools import lru_cache
+from pydantic import BaseSettings, validator
+from typing import Optional
+
+# Plancher de mémoire Argon2id (19 Mio, minimum recommandé par l'OWASP)
+ARGON2_MIN_MEMORY_COST = 19456
+
+# Numéro du worker Gunicorn (0 .. workers - 1) : posé par le maître (core.server), hérité au fork,
+# lu par core.logging_config.process_log_file
+WORKER_SLOT_ENV = "APP_WORKER_SLOT"
 
 class Settings(BaseSettings):
     APP_NAME: str = "FastAPI Template"
@@ -8,11 +15,156 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
+    # Autorisation sur les seuls claims du token (rôle, identité), sans lecture de l'utilisateur en base
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    CLAIMS_TOKEN_EXPIRE_MINUTES: int = 5  # durée de vie courte des tokens dans ce mode
+
+    # Accès base de données : "sync" (Session + threadpool) ou "async" (AsyncSession)
+    DB_MODE: str = "sync"
+    ASYNC_DATABASE_URL: str = ""  # vide = déduite de DATABASE_URL (sqlite -> sqlite+aiosqlite, ...)
+
+    # Pool de connexions (par worker)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # secondes d'attente max d'une connexion libre
+    DB_POOL_RECYCLE: int = 1800  # secondes, -1 = jamais
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_STATS_LOG_INTERVAL: int = 0  # secondes entre deux logs des stats du pool, 0 = désactivé
+
+    # Serveur de production (voir core/server.py : python -m core.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 = selon les coeurs disponibles et DB_MODE
+    SERVER_MAX_WORKERS: int = 8  # plafond du calcul automatique (SQLite : un seul écrivain à la fois)
+    SERVER_THREADS: int = 0  # threadpool par worker (run_db en mode sync...), 0 = selon DB_MODE et le pool de connexions
+    SERVER_PRELOAD: bool = True  # application construite une fois dans le maître, partagée par fork (copy-on-write)
+    SERVER_MAX_REQUESTS: int = 10000  # requêtes avant recyclage d'un worker (croissance mémoire), 0 = jamais
+    SERVER_MAX_REQUESTS_JITTER: int = 1000  # aléa ajouté par worker : ils ne redémarrent pas tous ensemble
+    SERVER_TIMEOUT: int = 60  # secondes sans signe de vie avant que le maître tue un worker
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # secondes laissées aux requêtes en cours (arrêt, recyclage)
+    SERVER_KEEPALIVE: int = 5  # secondes de keep-alive HTTP
+    SERVER_MIGRATE: bool = True  # alembic upgrade head au démarrage, sauté si le schéma est déjà à jour
+    HEALTH_DB_TIMEOUT: float = 1.0  # budget (secondes) du ping de la base de /readyz
+    HEALTH_CACHE_TTL: float = 1.0  # secondes pendant lesquelles /readyz réutilise son dernier résultat (par worker)
+
+    # PRAGMA appliqués à chaque connexion SQLite
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 Mo
+    SQLITE_CACHE_SIZE: int = -64000  # négatif = en Kio (~64 Mo)
+
+    # Coût Argon2id (défauts passlib) ; `python -m scripts.calibrate_hashing --write .env` les ajuste à la machine
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # Kio
+    ARGON2_PARALLELISM: int = 4
+
+    # Hachage des mots de passe (pool dédié, hors threadpool Starlette)
+    HASHING_EXECUTOR: str = "thread"  # "thread" ou "process"
+    HASHING_WORKERS: int = 0  # 0 = nombre de coeurs
+    HASHING_MAX_PENDING: int = 64  # au-delà, les requêtes reçoivent un 503
+    HASHING_RETRY_AFTER: int = 1  # secondes, en-tête Retry-After du 503
+    # Import massif par l'API (POST /v1/users/bulk) : au-delà, 413 ; le script CLI n'est pas limité
+    BULK_IMPORT_MAX_ROWS: int = 1000  # lignes par requête (tous les mots de passe passent par une seule place du pool)
+    BULK_IMPORT_MAX_BYTES: int = 1048576  # taille du corps (1 Mo)
+
+    # Limitation de débit (fenêtre glissante, en mémoire par worker)
+    RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_IP: int = 20  # tentatives de login par IP et par fenêtre
+    LOGIN_RATE_LIMIT_ACCOUNT: int = 10  # tentatives de login par email et par fenêtre
+    LOGIN_RATE_LIMIT_WINDOW: int = 60  # secondes
+    SIGNUP_RATE_LIMIT_IP: int = 10  # créations de compte par IP et par fenêtre
+    SIGNUP_RATE_LIMIT_WINDOW: int = 60  # secondes
+
+    # Réponses JSON via orjson et sérialisation directe des lignes pour les lectures d'utilisateurs
+    FAST_SERIALIZATION: bool = False
+
+    # Journalisation non bloquante (voir core/logging_config.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_FILE: str = "logs/app.log"  # vide = console seulement
+    LOG_FILE_PER_PROCESS: bool = True  # logs/app.<n>.log : chaque worker Gunicorn (numéro n) écrit et fait tourner son propre fichier
+    LOG_FILE_MAX_BYTES: int = 10485760  # 10MB
+    LOG_FILE_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10000  # enregistrements en attente d'écriture
+    LOG_QUEUE_POLICY: str = "drop"  # drop : file pleine = enregistrement perdu (et compté) | block : l'appelant attend
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0  # fraction des requêtes journalisées (les 5xx le sont toujours)
+
+    # Recherche sémantique : plongements et index de vecteurs mappé en mémoire (voir core/vector_index.py)
+    EMBEDDER: str = "hashing"  # "hashing" (local, déterministe) ou "paquet.module:Classe"
+    EMBEDDING_DIM: int = 384  # dimension du plongement "hashing"
+    VECTOR_INDEX_DIR: str = "data/vector_index"
+    VECTOR_INDEX_DTYPE: str = "float32"  # float16 : deux fois moins de RAM/disque, mais conversion ~4x plus lente à la recherche
+    VECTOR_INDEX_SEGMENT_ROWS: int = 65536  # lignes par segment .npy (un ajout ne réécrit que le dernier)
+    VECTOR_SEARCH_BLOCK_ROWS: int = 16384  # lignes converties en float32 à la fois pendant une recherche
+
+    # Chat en flux (SSE / WebSocket, voir core/streaming.py)
+    CHAT_MODEL: str = "fake"  # "fake" (local, déterministe) ou "paquet.module:Classe"
+    CHAT_FAKE_FIRST_TOKEN_DELAY: float = 0.3  # secondes, simule le temps avant le premier token
+    CHAT_FAKE_TOKEN_DELAY: float = 0.03  # secondes entre deux tokens
+    CHAT_CONTEXT_K: int = 3  # articles retrouvés (recherche sémantique) et passés au modèle, 0 = aucun
+    CHAT_MAX_STREAMS_PER_USER: int = 2  # flux simultanés par utilisateur et par worker, 0 = illimité
+    CHAT_STREAM_BUFFER: int = 32  # tokens produits d'avance au plus quand le client lit lentement
+    CHAT_SEND_TIMEOUT: float = 30.0  # secondes : un client qui ne lit plus voit son flux coupé
+    CHAT_PING_INTERVAL: float = 15.0  # secondes sans token avant un commentaire keep-alive
+    CHAT_HISTORY_MESSAGES: int = 20  # derniers messages de la conversation passés au modèle
+    CHAT_HISTORY_TOKENS: int = 2000  # budget (estimé) de l'historique passé au modèle
+
+    # Cache des réponses du chat (voir v1/services/answer_cache.py)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIZE: int = 1000  # réponses gardées en mémoire par worker (LRU)
+    ANSWER_CACHE_TTL: float = 86400.0  # secondes
+    ANSWER_CACHE_PERSISTENT: bool = True  # niveau SQLite partagé par les workers et conservé au redémarrage
+    ANSWER_CACHE_PERSISTENT_SIZE: int = 100000  # lignes gardées dans la table (LRU)
+    ANSWER_CACHE_SIMILARITY: float = 0.0  # > 0 : une question quasi identique (cosinus >= seuil) réutilise la réponse
+
+    # Compression des réponses (voir core/compression.py) : brotli si le client l'accepte et le paquet est installé, sinon gzip
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # octets : les petites réponses partent telles quelles
+    COMPRESSION_GZIP_LEVEL: int = 6  # 9 coûte bien plus de CPU pour quelques % gagnés
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11 : au-delà de 5, trop lent pour des réponses dynamiques
+
+    # Métriques Prometheus exposées sur /metrics
+    METRICS_ENABLED: bool = True
+
+    # Cache des utilisateurs authentifiés (voir core/user_cache.py)
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 30.0  # secondes
+    USER_CACHE_VERSION_FILE: str = ""  # vide = fichier dans le répertoire temporaire
+    USER_CACHE_VERSION_SLOTS: int = 65536
+
+    # Révocation des tokens (logout, sessions coupées par un admin ; voir core/revocation.py)
+    REVOCATION_SYNC_INTERVAL: float = 2.0  # secondes entre deux lectures de la table par worker : délai max de propagation
+    # Secondes relues à chaque synchronisation : insertions validées en retard (transaction lente), horloges décalées entre machines
+    REVOCATION_SYNC_OVERLAP: float = 30.0
+    REVOCATION_PRUNE_INTERVAL: int = 3600  # secondes entre deux purges des révocations expirées en base
+
+    @validator("ARGON2_MEMORY_COST")
+    def argon2_memory_floor(cls, value):
+        if value < ARGON2_MIN_MEMORY_COST:
+            raise ValueError(f"must be at least {ARGON2_MIN_MEMORY_COST} KiB")
+        return value
+
+    @validator("ARGON2_TIME_COST", "ARGON2_PARALLELISM")
+    def argon2_positive(cls, value):
+        if value < 1:
+            raise ValueError("must be at least 1")
+        return value
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
-@lru_cache
+_settings: Optional[Settings] = None
+
 def get_settings() -> Settings:
-    return Settings()
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+def configure_settings(settings: Optional[Settings]) -> None:
+    """Installe `settings` comme configuration courante (`create_app`, tests) ; None = relire l'environnement."""
+    global _settings
+    _settings = settings
@@ -1,31 +1,267 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from core.config import get_settings
-from typing import Generator
-import os
-
-Base = declarative_base()
-
-settings = get_settings()
-
-if os.environ.get("PYTEST_CURRENT_TEST"):
-    SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///file::memory:?cache=shared")
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={"check_same_thread": False}
-    )
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-else:
-    SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={"check_same_thread": False, "uri": True} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-    )
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db() -> Generator:
-    db = SessionLocal()
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.orm import sessionmaker
+from core.config import Settings, get_settings
+from core.db_base import Base  # noqa: F401 (réexporté pour alembic et les scripts)
+from core.metrics import instrument_engine
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Callable, Dict, Generator, Optional, TypeVar
+from starlette.concurrency import run_in_threadpool
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pilote async utilisé pour chaque pilote sync connu
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def to_async_url(url: str) -> str:
+    """Convertit une URL sync (`sqlite:///...`) vers son équivalent async (`sqlite+aiosqlite:///...`)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername != backend or backend not in ASYNC_DRIVERS:
+        # Pilote déjà explicite (ex: postgresql+asyncpg) : on le garde tel quel
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def connect_args_for(url: str) -> dict:
+    return {"check_same_thread": False, "uri": True} if url.startswith("sqlite") else {}
+
+class PoolWaitStats:
+    """Temps passé à attendre une connexion libre dans le pool (mesuré dans `_do_get`)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+def instrumented_pool(pool_class, stats: PoolWaitStats):
+    """Sous-classe de `pool_class` qui chronomètre chaque attente de connexion."""
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                conn = super()._do_get()
+            except exc.TimeoutError:
+                stats.record(time.perf_counter() - start, timed_out=True)
+                raise
+            stats.record(time.perf_counter() - start)
+            return conn
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    # Logger du pool sous "sqlalchemy.pool" (niveau WARNING par défaut), comme la classe d'origine
+    InstrumentedPool.__module__ = pool_class.__module__
+    return InstrumentedPool
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    database = parsed.database or ""
+    if parsed.get_backend_name() != "sqlite":
+        return False
+    return database in ("", ":memory:") or ":memory:" in database or "mode=memory" in url
+
+def pool_options(url: str, settings: Settings, stats: PoolWaitStats, pool_class=QueuePool) -> dict:
+    """Options de pool issues de `Settings` (ignorées pour une base SQLite en mémoire)."""
+    if _is_memory_sqlite(url):
+        return {}
+    return {
+        "poolclass": instrumented_pool(pool_class, stats),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def apply_sqlite_pragmas(target: Engine, settings: Settings) -> None:
+    """WAL, synchronous=NORMAL, busy_timeout, mmap et cache à chaque nouvelle connexion SQLite."""
+    if target.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(target, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.close()
+
+def _pool_status(target: Engine, stats: PoolWaitStats) -> Dict[str, object]:
+    pool = target.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    status.update(stats.snapshot())
+    return status
+
+
+class Database:
+    """
+    Engines et fabriques de sessions construits à partir de `Settings`.
+
+    Rien n'est créé à l'import : `get_database()` construit l'instance au
+    premier besoin (première requête, script) et le lifespan de l'application
+    la libère avec `close_database()`.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.url = settings.DATABASE_URL
+        connect_args = connect_args_for(self.url)
+        self.sync_pool_stats = PoolWaitStats()
+        self.async_pool_stats = PoolWaitStats()
+
+        self.engine = create_engine(self.url, connect_args=connect_args, **pool_options(self.url, settings, self.sync_pool_stats))
+        apply_sqlite_pragmas(self.engine, settings)
+        instrument_engine(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        self.async_url: Optional[str] = None
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        # Mode async : AsyncEngine (aiosqlite en local, asyncpg en production).
+        # sqlalchemy.ext.asyncio n'est importé que dans ce mode (~90 ms au démarrage).
+        if settings.DB_MODE == "async":
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            self.async_url = settings.ASYNC_DATABASE_URL or to_async_url(self.url)
+            self.async_engine = create_async_engine(
+                self.async_url,
+                connect_args=connect_args,
+                **pool_options(self.async_url, settings, self.async_pool_stats, AsyncAdaptedQueuePool),
+            )
+            apply_sqlite_pragmas(self.async_engine.sync_engine, settings)
+            instrument_engine(self.async_engine.sync_engine)
+            # expire_on_commit=False : les objets restent lisibles après commit sans I/O implicite
+            self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+
+    def pool_stats(self) -> Dict[str, Optional[Dict[str, object]]]:
+        return {
+            "sync": _pool_status(self.engine, self.sync_pool_stats),
+            "async": _pool_status(self.async_engine.sync_engine, self.async_pool_stats) if self.async_engine is not None else None,
+        }
+
+    async def dispose(self) -> None:
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        self.engine.dispose()
+
+
+_database: Optional[Database] = None
+_database_lock = threading.Lock()
+
+def get_database() -> Database:
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = Database(get_settings())
+    return _database
+
+async def close_database() -> None:
+    """Ferme les pools ; la prochaine utilisation reconstruit les engines depuis la configuration courante."""
+    global _database
+    database, _database = _database, None
+    if database is not None:
+        await database.dispose()
+
+# Compatibilité : `from core.database import engine, SessionLocal` (scripts, alembic)
+_LAZY_ATTRIBUTES = {
+    "engine": "engine",
+    "SessionLocal": "SessionLocal",
+    "async_engine": "async_engine",
+    "AsyncSessionLocal": "AsyncSessionLocal",
+    "SQLALCHEMY_DATABASE_URL": "url",
+    "ASYNC_DATABASE_URL": "async_url",
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(get_database(), _LAZY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+T = TypeVar("T")
+
+def pool_stats() -> Dict[str, Optional[Dict[str, object]]]:
+    """Connexions empruntées / en débordement et temps d'attente, pour dimensionner le pool."""
+    return get_database().pool_stats()
+
+def log_pool_stats() -> None:
+    for name, status in pool_stats().items():
+        if status is not None:
+            logger.info("db pool %s: %s", name, " ".join(f"{key}={value}" for key, value in status.items()))
+
+def get_sync_db() -> Generator:
+    db = get_database().SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncGenerator:
+    async with get_database().AsyncSessionLocal() as db:
+        yield db
+
+async def get_db() -> AsyncGenerator:
+    """
+    Dépendance utilisée par les endpoints : `AsyncSession` si `DB_MODE=async`,
+    sinon `Session` classique (fermée dans le threadpool).
+    """
+    database = get_database()
+    if database.AsyncSessionLocal is not None:
+        async with database.AsyncSessionLocal() as db:
+            yield db
+        return
+    db = database.SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+# Même session que `get_db`, hors injection de dépendances (WebSocket, écritures après la réponse...)
+db_session = asynccontextmanager(get_db)
+
+
+async def run_db(db, fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Exécute `fn(db, *args, **kwargs)` sans bloquer la boucle d'évènements.
+
+    `fn` est écrite une seule fois contre une `Session` sync : avec une
+    `AsyncSession` elle passe par `run_sync` (I/O réellement async), avec une
+    `Session` classique elle est déportée dans le threadpool.
+    """
+    if hasattr(db, "run_sync"):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
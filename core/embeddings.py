@@ -0,0 +1,84 @@
+# Plongements de textes (embeddings) : interface commune et implémentation locale déterministe
+
+import importlib
+import re
+import unicodedata
+import zlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+from core.config import get_settings
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder(ABC):
+    """
+    Transforme des textes en vecteurs float32 de norme 1 (le produit scalaire
+    est alors la similarité cosinus). Un modèle réel (sentence-transformers,
+    API distante...) n'a qu'à implémenter `embed` et renseigner `name` / `dim`.
+    """
+
+    name: str
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Retourne une matrice (len(texts), dim) float32, lignes normalisées."""
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _features(text: str):
+    folded = unicodedata.normalize("NFKD", text.casefold()).encode("ascii", "ignore").decode()
+    words = _TOKEN.findall(folded)
+    yield from words
+    yield from (f"{a} {b}" for a, b in zip(words, words[1:]))
+
+
+class HashingEmbedder(Embedder):
+    """
+    Remplaçant local et déterministe d'un vrai modèle : hachage signé des mots
+    et bigrammes (sans accents ni casse) dans `dim` dimensions. Pas de sens
+    sémantique, mais des textes qui partagent du vocabulaire sont proches :
+    de quoi faire tourner l'API, les tests et les benchmarks hors ligne.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            # crc32 et non hash() : hash() change d'un processus à l'autre (PYTHONHASHSEED)
+            hashes = np.fromiter((zlib.crc32(feature.encode()) for feature in _features(text)), dtype=np.uint32)
+            if hashes.size:
+                signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+                np.add.at(vectors[row], hashes % self.dim, signs)
+        return normalize_rows(vectors)
+
+
+def load_embedder(spec: str, dim: int) -> Embedder:
+    """`hashing` ou `paquet.module:Classe` (classe instanciée sans argument)."""
+    if spec == "hashing":
+        return HashingEmbedder(dim)
+    module_name, _, class_name = spec.partition(":")
+    embedder = getattr(importlib.import_module(module_name), class_name)()
+    if not isinstance(embedder, Embedder):
+        raise TypeError(f"{spec} is not a core.embeddings.Embedder")
+    return embedder
+
+
+@lru_cache
+def get_embedder() -> Embedder:
+    settings = get_settings()
+    return load_embedder(settings.EMBEDDER, settings.EMBEDDING_DIM)
@@ -0,0 +1,181 @@
+# Service de hachage des mots de passe exécuté sur un pool dédié
+
+import asyncio
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from core import security
+from core.config import ARGON2_MIN_MEMORY_COST, get_settings
+from core.metrics import PASSWORD_HASHING_TIME
+
+
+def _timed(operation: str, fn, *args):
+    # Exécuté dans le worker du pool : mesure le calcul seul, sans l'attente en file
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        PASSWORD_HASHING_TIME.labels(operation).observe(time.perf_counter() - start)
+
+
+class PasswordHasher:
+    """
+    Exécute hash/verify Argon2 sur un pool de workers borné.
+
+    Argon2 (argon2-cffi) relâche le GIL : un pool de threads suffit à occuper
+    tous les coeurs sans bloquer la boucle d'évènements. Le nombre de tâches en
+    attente est plafonné ; au-delà, on répond 503 plutôt que d'accumuler des
+    requêtes de login derrière lesquelles les GET attendraient.
+    """
+
+    def __init__(self, executor: str = "thread", workers: int = 0, max_pending: int = 64, retry_after: int = 1):
+        self.executor_kind = executor
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.executor_kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+            return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Password hashing service saturated, retry later",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def _submit(self, operation: str, fn, *args):
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), _timed, operation, fn, *args)
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", security.hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", security.verify_password, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hache un lot (import massif) en occupant une seule place dans la file.
+
+        Les mots de passe sont soumis par paquets de `workers` : les logins
+        concurrents s'intercalent entre deux paquets au lieu d'attendre tout le lot.
+        """
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            hashed: List[str] = []
+            for start in range(0, len(passwords), self.workers):
+                chunk = passwords[start:start + self.workers]
+                hashed.extend(await asyncio.gather(
+                    *(loop.run_in_executor(executor, _timed, "hash", security.hash_password, password) for password in chunk)
+                ))
+            return hashed
+        finally:
+            self._release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+@lru_cache
+def get_password_hasher() -> PasswordHasher:
+    settings = get_settings()
+    return PasswordHasher(
+        executor=settings.HASHING_EXECUTOR,
+        workers=settings.HASHING_WORKERS,
+        max_pending=settings.HASHING_MAX_PENDING,
+        retry_after=settings.HASHING_RETRY_AFTER,
+    )
+
+
+# --- Variantes asynchrones de core.security ---
+async def hash_password_async(password: str) -> str:
+    return await get_password_hasher().hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await get_password_hasher().verify(plain_password, hashed_password)
+
+
+# --- Calibration (scripts/calibrate_hashing.py) ---
+def measure_profile(profile: security.Argon2Profile, concurrency: int, rounds: int = 3) -> float:
+    """Durée médiane (s) d'un hachage quand `concurrency` hachages tournent en même temps (pic de logins)."""
+    context = security.build_pwd_context(profile)
+    samples = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            list(pool.map(lambda _: context.hash("calibration"), range(concurrency)))
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def calibrate(
+    target_ms: float,
+    concurrency: int,
+    memory_kib: int = 65536,
+    max_parallelism: int = 1,
+    measure: Callable[[security.Argon2Profile, int], float] = measure_profile,
+) -> Tuple[security.Argon2Profile, float]:
+    """
+    Profil Argon2id le plus coûteux qui tient dans `target_ms` par hachage sous
+    `concurrency` hachages simultanés :
+    - mémoire `memory_kib`, divisée par deux (jusqu'au plancher) si une seule passe dépasse déjà le budget ;
+    - voies parallèles : la valeur la plus rapide sous charge, une valeur plus grande devant gagner 10 % ;
+    - passes : autant que le budget le permet (au moins une).
+    Retourne le profil et sa durée mesurée (s).
+    """
+    target = target_ms / 1000
+    candidates = [p for p in (1, 2, 4, 8, 16) if p <= max(1, max_parallelism)]
+    memory = max(memory_kib, ARGON2_MIN_MEMORY_COST)
+    while True:
+        parallelism, per_pass = 1, measure(security.Argon2Profile(1, memory, 1), concurrency)
+        for lanes in candidates[1:]:
+            elapsed = measure(security.Argon2Profile(1, memory, lanes), concurrency)
+            if elapsed < per_pass * 0.9:
+                parallelism, per_pass = lanes, elapsed
+        if per_pass <= target or memory == ARGON2_MIN_MEMORY_COST:
+            break
+        memory = max(memory // 2, ARGON2_MIN_MEMORY_COST)
+    profile = security.Argon2Profile(max(1, int(target / per_pass)), memory, parallelism)
+    elapsed = measure(profile, concurrency)
+    while elapsed > target * 1.1 and profile.time_cost > 1:
+        profile = replace(profile, time_cost=profile.time_cost - 1)
+        elapsed = measure(profile, concurrency)
+    return profile, elapsed
@@ -0,0 +1,84 @@
+# Sondes de santé : /healthz (le processus répond) et /readyz (la base répond dans son budget)
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from core.config import get_settings
+from core.database import get_database
+
+# Sondes appelées toutes les quelques secondes : pas de ligne de journal d'accès (sauf 5xx)
+HEALTH_PATHS = frozenset({"/healthz", "/readyz"})
+
+
+def _ping_sync() -> None:
+    with get_database().engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+
+async def ping_database() -> None:
+    """`SELECT 1` sur une connexion du pool de l'application (async si `DB_MODE=async`)."""
+    database = get_database()
+    if database.async_engine is not None:
+        async with database.async_engine.connect() as connection:
+            await connection.exec_driver_sql("SELECT 1")
+        return
+    await run_in_threadpool(_ping_sync)
+
+
+class ReadinessProbe:
+    """
+    Ping de la base borné par `timeout`. Le résultat est réutilisé pendant
+    `ttl` secondes et les sondes simultanées attendent le même ping : une
+    rafale de sondes sous charge ne prend qu'une connexion par worker.
+    """
+
+    def __init__(self, timeout: float = 1.0, ttl: float = 1.0):
+        self.timeout = timeout
+        self.ttl = ttl
+        self._result: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._pending: Optional[asyncio.Future] = None
+
+    async def check(self) -> Dict[str, Any]:
+        if self._result is not None and time.monotonic() < self._expires_at:
+            return self._result
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.ensure_future(self._probe())
+        # shield : une sonde abandonnée par son client n'annule pas le ping des autres
+        return await asyncio.shield(self._pending)
+
+    async def _probe(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(ping_database(), self.timeout)
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except Exception as exc:
+            error = type(exc).__name__
+        database: Dict[str, Any] = {"ok": error is None, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        if error is not None:
+            database["error"] = error
+        result = {"status": "ready" if error is None else "unavailable", "database": database}
+        self._result, self._expires_at = result, time.monotonic() + self.ttl
+        return result
+
+
+@lru_cache
+def get_readiness_probe() -> ReadinessProbe:
+    settings = get_settings()
+    return ReadinessProbe(settings.HEALTH_DB_TIMEOUT, settings.HEALTH_CACHE_TTL)
+
+
+async def healthz():
+    return {"status": "ok"}
+
+
+async def readyz():
+    result = await get_readiness_probe().check()
+    return JSONResponse(result, status_code=200 if result["database"]["ok"] else 503)
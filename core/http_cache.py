@@ -0,0 +1,77 @@
+# Requêtes conditionnelles : ETag faibles, Last-Modified, réponses 304 sans corps
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+# Données privées (auth) que le client doit revalider à chaque lecture : 304 si rien n'a changé
+CACHE_CONTROL = "private, no-cache"
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite rend des dates naïves : elles sont écrites en UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _version(updated_at: Optional[datetime]) -> int:
+    return int(_utc(updated_at).timestamp() * 1_000_000) if updated_at is not None else 0
+
+
+def row_etag(row_id: int, updated_at: Optional[datetime]) -> str:
+    """ETag faible d'une ligne : id et `updated_at` (microsecondes), sans hachage."""
+    return f'W/"{row_id:x}-{_version(updated_at):x}"'
+
+
+def rows_etag(rows: Iterable[Tuple[int, Optional[datetime]]]) -> str:
+    """ETag faible d'une page : empreinte des couples (id, updated_at), ordre compris."""
+    digest = hashlib.blake2b(digest_size=16)
+    for row_id, updated_at in rows:
+        digest.update(f"{row_id:x}-{_version(updated_at):x};".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Comparaison faible (RFC 9110 §13.1.2) : le préfixe W/ est ignoré
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Vrai si la copie du client est à jour. `If-None-Match` prime ; à défaut,
+    `If-Modified-Since` est comparé à la seconde près (résolution des dates HTTP).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return _utc(last_modified).replace(microsecond=0) <= since
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """304 : en-têtes de validation seulement, aucun corps construit ni sérialisé."""
+    return Response(status_code=304, headers=headers)
@@ -1,33 +1,157 @@
-from logging.config import dictConfig
-
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "default": {
-            "format": "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        },
-    },
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "default",
-            "level": "INFO",
-        },
-        "file": {
-            "class": "logging.handlers.RotatingFileHandler",
-            "formatter": "default",
-            "filename": "logs/app.log",
-            "maxBytes": 10485760,  # 10MB
-            "backupCount": 5,
-            "level": "INFO",
-        },
-    },
-    "root": {
-        "handlers": ["console", "file"],
-        "level": "INFO",
-    },
-}
-
-def setup_logging():
-    dictConfig(LOGGING_CONFIG)
+# Journalisation non bloquante : un appel de log ne fait que déposer l'enregistrement
+# dans une file bornée ; un thread (QueueListener) formate et écrit console et fichier.
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
+
+from core.config import WORKER_SLOT_ENV, Settings, get_settings
+from core.metrics import LOG_RECORDS_DROPPED
+from core.request_log import get_request_id
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(request_id)s | %(message)s"
+
+# Attributs standard d'un LogRecord : le reste vient de `extra=` et est ajouté au JSON
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_exception_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement (horodatage UTC, niveau, logger, message, id de requête, pid, `extra`)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process,
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RESERVED_ATTRS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    `QueueHandler` sur une file bornée. Politique `drop` : si l'écriture
+    n'arrive pas à suivre, l'enregistrement est abandonné (compteur
+    `log_records_dropped`) plutôt que de ralentir la requête ; `block` :
+    l'appelant attend une place libre.
+    """
+
+    def __init__(self, log_queue: queue.Queue, policy: str = "drop"):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Dans le thread appelant : message résolu, exception mise en texte,
+        # id de requête capturé (le contexte n'existe plus dans le thread d'écriture)
+        record = copy.copy(record)
+        record.request_id = get_request_id()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+def process_log_file(path: str, per_process: bool = True) -> str:
+    """
+    `logs/app.log` -> `logs/app.<n>.log` dans le worker Gunicorn numéro n : pas
+    de rotation concurrente entre workers. Le numéro (et donc le fichier) est
+    repris par le worker qui en remplace un autre : autant de fichiers que de
+    workers, quel que soit le nombre de redémarrages. Hors Gunicorn (processus
+    unique, maître), le chemin est inchangé.
+    """
+    slot = os.environ.get(WORKER_SLOT_ENV)
+    if not per_process or slot is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{slot}{ext}"
+
+
+def _build_handlers(settings: Settings) -> List[logging.Handler]:
+    formatter = JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if settings.LOG_FILE:
+        path = process_log_file(settings.LOG_FILE, settings.LOG_FILE_PER_PROCESS)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handlers.append(RotatingFileHandler(
+            path, maxBytes=settings.LOG_FILE_MAX_BYTES, backupCount=settings.LOG_FILE_BACKUP_COUNT, encoding="utf-8",
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+_settings: Optional[Settings] = None
+_queue_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(settings: Optional[Settings] = None) -> None:
+    """(Re)configure le logger racine ; peut être appelée plusieurs fois (une application par configuration)."""
+    global _settings, _queue_handler, _listener
+    settings = settings or get_settings()
+    stop_logging()
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = BoundedQueueHandler(log_queue, policy=settings.LOG_QUEUE_POLICY)
+    listener = QueueListener(log_queue, *_build_handlers(settings), respect_handler_level=True)
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL)
+    listener.start()
+    _settings, _queue_handler, _listener = settings, handler, listener
+
+
+def stop_logging() -> None:
+    """Vide la file puis arrête le thread d'écriture (appelée à la sortie du processus)."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def _after_fork_in_child() -> None:
+    # Le thread d'écriture n'existe pas dans le processus enfant (workers gunicorn
+    # avec preload) : nouvelle file, nouveau thread et fichier propre au numéro du worker
+    global _listener
+    if _listener is None:
+        return
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    setup_logging(_settings)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(stop_logging)
@@ -0,0 +1,144 @@
+# Métriques Prometheus : latence par route, requêtes en cours, SQL par requête, hachage, chat
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Avec gunicorn, PROMETHEUS_MULTIPROC_DIR doit pointer vers un dossier partagé
+# (vidé au démarrage) : chaque worker y écrit ses valeurs, /metrics les agrège.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latence des requêtes HTTP par route.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requêtes HTTP en cours de traitement (la route n'est connue qu'après le routage).",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Nombre de requêtes SQL émises par requête HTTP.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50),
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Temps SQL cumulé par requête HTTP.",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Durée d'exécution des requêtes SQL.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+DB_QUERIES = Counter("db_queries", "Requêtes SQL exécutées.")
+PASSWORD_HASHING_TIME = Histogram(
+    "password_hashing_seconds",
+    "Temps de calcul Argon2 (hash / verify).",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+LOG_RECORDS_DROPPED = Counter("log_records_dropped", "Enregistrements de log abandonnés (file de journalisation pleine).")
+CHAT_FIRST_TOKEN_LATENCY = Histogram(
+    "chat_first_token_seconds",
+    "Délai entre la réception d'une question et l'envoi du premier token de la réponse.",
+    ["transport"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0),
+)
+CHAT_STREAMS = Counter("chat_streams", "Flux de réponse terminés, par issue.", ["transport", "outcome"])
+ANSWER_CACHE_LOOKUPS = Counter(
+    "answer_cache_lookups", "Consultations du cache des réponses, par résultat (memory, persistent, similar, miss).", ["result"],
+)
+CHAT_STREAMS_ACTIVE = Gauge("chat_streams_active", "Flux de réponse en cours.", multiprocess_mode="livesum")
+
+
+class RequestDbStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Objet mutable : les threads du threadpool (copie du contexte) incrémentent le même compteur
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Chronomètre chaque requête SQL et l'impute à la requête HTTP en cours."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERY_LATENCY.observe(elapsed)
+        DB_QUERIES.inc()
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+
+def _route_label(scope) -> str:
+    # Gabarit de la route (/v1/users/{user_id}) et non le chemin : cardinalité bornée
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI (pas de BaseHTTPMiddleware : aucun coût sur le corps des réponses en flux)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status_code = 500
+        stats = RequestDbStats()
+        token = _request_db_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            _request_db_stats.reset(token)
+            route = _route_label(scope)
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(time.perf_counter() - start)
+            REQUEST_DB_QUERIES.labels(route).observe(stats.queries)
+            REQUEST_DB_TIME.labels(route).observe(stats.seconds)
+
+
+def metrics_endpoint() -> Response:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
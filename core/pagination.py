@@ -0,0 +1,24 @@
+# Curseurs opaques pour la pagination par clé (keyset)
+
+import base64
+import json
+from typing import Any, Dict
+
+from fastapi import HTTPException
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode la clé de la dernière ligne renvoyée en un curseur opaque (base64 url-safe)."""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
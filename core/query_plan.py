@@ -0,0 +1,96 @@
+# Garde-fou des plans de requêtes : EXPLAIN QUERY PLAN sur chaque requête SQLite, signale les parcours complets
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Option d'exécution des requêtes qui parcourent volontairement toute une table
+# (export, comptage, liste sans filtre...) : `statement.execution_options(allow_full_scan=True)`
+ALLOW_FULL_SCAN = "allow_full_scan"
+# Tables d'une ligne (ou presque) : les parcourir ne coûte rien
+SMALL_TABLES = frozenset({"corpus_state", "alembic_version"})
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+# "SCAN users", "SCAN u", "SCAN users USING COVERING INDEX ix_..." ; pas les tables virtuelles (FTS5)
+_SCAN = re.compile(r"^SCAN (\w+)(?! VIRTUAL TABLE)(?:\s|$)")
+_TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN|UPDATE)\s+\"?(\w+)\"?(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_NOT_ALIASES = frozenset({
+    "where", "join", "inner", "left", "right", "cross", "on", "using", "order", "group", "limit", "set", "natural",
+    "full", "outer", "union", "having", "window", "returning", "as",
+})
+
+
+@dataclass
+class ScanViolation:
+    table: str
+    plan: str
+    statement: str
+
+    def __str__(self) -> str:
+        return f"{self.plan}\n    {' '.join(self.statement.split())}"
+
+
+def table_aliases(statement: str) -> Dict[str, str]:
+    """Alias (ou nom) -> table, d'après les clauses FROM / JOIN / UPDATE de la requête."""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(statement):
+        aliases[table] = table
+        if alias and alias.lower() not in _NOT_ALIASES:
+            aliases[alias] = table
+    return aliases
+
+
+def find_scans(statement: str, plan: Sequence[str], tables: Iterable[str]) -> List[ScanViolation]:
+    """Lignes `SCAN` du plan qui parcourent une des `tables` (directement ou via un alias)."""
+    tables = set(tables)
+    aliases = table_aliases(statement)
+    violations = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if match is None:
+            continue
+        table = aliases.get(match.group(1), match.group(1))
+        if table in tables:
+            violations.append(ScanViolation(table, detail, statement))
+    return violations
+
+
+class QueryPlanGuard:
+    """
+    Pour les tests : installé sur tous les engines, exécute `EXPLAIN QUERY PLAN`
+    avant chaque SELECT / UPDATE / DELETE et note les parcours complets des
+    `tables`, sauf requêtes marquées `ALLOW_FULL_SCAN`. Les requêtes d'EXPLAIN
+    passent par un curseur DBAPI brut : ni évènements ni métriques SQLAlchemy.
+    """
+
+    def __init__(self, tables: Iterable[str], small_tables: Iterable[str] = SMALL_TABLES):
+        self.tables = set(tables) - set(small_tables)
+        self.violations: List[ScanViolation] = []
+
+    def install(self) -> None:
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def uninstall(self) -> None:
+        event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def take(self) -> List[ScanViolation]:
+        violations, self.violations = self.violations, []
+        return violations
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if conn.dialect.name != "sqlite" or not _EXPLAINABLE.match(statement):
+            return
+        if context is not None and context.execution_options.get(ALLOW_FULL_SCAN):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        explain = conn.connection.dbapi_connection.cursor()
+        try:
+            explain.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plan = [row[3] for row in explain.fetchall()]
+        finally:
+            explain.close()
+        self.violations.extend(find_scans(statement, plan, self.tables))
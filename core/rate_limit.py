@@ -0,0 +1,98 @@
+# Limitation de débit par fenêtre glissante (login, inscription)
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+
+from core.config import get_settings
+
+
+class RateLimitBackend(ABC):
+    """
+    Stockage des compteurs. L'implémentation en mémoire est propre à chaque
+    worker ; un backend partagé (Redis, ...) n'a qu'à implémenter `hit`.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window: float) -> Optional[float]:
+        """Compte une tentative ; retourne le délai d'attente (s) si `limit` est dépassée sur `window`, sinon None."""
+
+    def reset(self) -> None:
+        pass
+
+
+class InMemorySlidingWindow(RateLimitBackend):
+    """
+    Fenêtre glissante découpée en `buckets` intervalles : chaque clé ne garde
+    qu'un petit dict {intervalle: compteur}. Les clés les moins récemment
+    utilisées sont évincées au-delà de `max_keys`.
+    """
+
+    def __init__(self, buckets: int = 10, max_keys: int = 100_000):
+        self.buckets = buckets
+        self.max_keys = max_keys
+        self._counters: "OrderedDict[str, Dict[int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float) -> Optional[float]:
+        width = window / self.buckets
+        now = time.monotonic()
+        current = int(now // width)
+        oldest = current - self.buckets + 1
+        with self._lock:
+            counters = self._counters.get(key)
+            if counters is None:
+                counters = self._counters[key] = {}
+                if len(self._counters) > self.max_keys:
+                    self._counters.popitem(last=False)
+            else:
+                self._counters.move_to_end(key)
+                for bucket in [b for b in counters if b < oldest]:
+                    del counters[bucket]
+            total = sum(counters.values())
+            if total >= limit:
+                # Attendre que suffisamment d'intervalles anciens sortent de la fenêtre
+                excess = total - limit + 1
+                for bucket in sorted(counters):
+                    excess -= counters[bucket]
+                    if excess <= 0:
+                        return (bucket + self.buckets) * width - now
+            counters[current] = counters.get(current, 0) + 1
+            return None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    def check(self, key: str, limit: int, window: float) -> None:
+        """Lève un 429 (avec Retry-After) si `key` a dépassé `limit` tentatives sur `window` secondes."""
+        if not self.enabled or limit <= 0:
+            return
+        retry_after = self.backend.hit(key, limit, window)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, retry later",
+                headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+            )
+
+    def reset(self) -> None:
+        self.backend.reset()
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    settings = get_settings()
+    return RateLimiter(InMemorySlidingWindow(), enabled=settings.RATE_LIMIT_ENABLED)
@@ -0,0 +1,74 @@
+# Identifiant de requête (propagé dans les logs) et journal d'accès échantillonné
+
+import logging
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+access_logger = logging.getLogger("app.access")
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Identifiant fourni par le client / le proxy : accepté s'il reste court et sans caractère de contrôle
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def _incoming_request_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == REQUEST_ID_HEADER:
+            candidate = value.decode("latin-1")
+            return candidate if _VALID_REQUEST_ID.match(candidate) else None
+    return None
+
+
+class RequestLogMiddleware:
+    """
+    Middleware ASGI : attribue un identifiant à chaque requête (en-tête
+    `X-Request-ID` repris ou généré, renvoyé dans la réponse) et écrit une
+    ligne d'accès pour une fraction `sample_rate` des requêtes. Les erreurs
+    serveur (5xx) sont toujours journalisées, les `quiet_paths` (sondes de
+    santé) seulement dans ce cas.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, quiet_paths: Iterable[str] = ()):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.quiet_paths = frozenset(quiet_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", ())) + [(REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        start = time.perf_counter()
+        sample_rate = 0.0 if scope["path"] in self.quiet_paths else self.sample_rate
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if status_code >= 500 or (sample_rate > 0 and random.random() < sample_rate):
+                access_logger.info(
+                    "%s %s %s",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    extra={"status": status_code, "duration_ms": round((time.perf_counter() - start) * 1000, 2)},
+                )
+            request_id_var.reset(token)
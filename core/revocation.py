@@ -0,0 +1,137 @@
+# Révocation des tokens : copie en mémoire de la table token_revocations dans chaque worker
+
+import asyncio
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from core.config import get_settings
+from core.database import db_session, run_db
+from core.user_cache import TokenIdentity, get_user_cache
+from v1.crud import revocation as revocation_crud
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    """
+    Révocations encore utiles : `jti` révoqués (logout) jusqu'à l'expiration
+    de leur token, et par utilisateur la date d'émission jusqu'à laquelle tous
+    ses tokens sont refusés (sessions coupées par un admin).
+
+    `is_revoked` se limite à deux lectures de dictionnaire, sans requête SQL :
+    la table n'est lue que par `sync`, en tâche de fond, à partir de la dernière
+    insertion vue moins `overlap` secondes. Un filtre de Bloom devant le dictionnaire ne ferait pas gagner de temps
+    en Python (ses k hachages coûtent plus qu'un accès au `dict`), et les
+    entrées expirées sont retirées à chaque synchronisation.
+    """
+
+    def __init__(self, overlap: float = 30.0):
+        self.overlap = overlap
+        self._tokens: Dict[str, float] = {}  # jti -> exp du token
+        self._cutoffs: Dict[int, Tuple[float, float]] = {}  # user_id -> (émis jusqu'à, fin de validité de la règle)
+        self._seen_until = 0.0  # `created_at` le plus récent déjà lu
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._cutoffs)
+
+    def is_revoked(self, identity: TokenIdentity) -> bool:
+        if identity.jti is not None and identity.jti in self._tokens:
+            return True
+        cutoff = self._cutoffs.get(identity.user_id)
+        # Token sans `iat` (ancien format) : date d'émission inconnue, refusé dès qu'une coupure existe
+        return cutoff is not None and (identity.issued_at is None or identity.issued_at <= cutoff[0])
+
+    def add(self, user_id: int, jti: Optional[str], revoked_at: float, expires_at: float) -> None:
+        """
+        Révocation faite par ce worker : appliquée tout de suite. Le curseur ne
+        bouge pas, la ligne sera relue (sans effet) à la prochaine synchronisation.
+        Appliquer deux fois une révocation ne change rien : les relectures sont sans risque.
+        """
+        with self._lock:
+            self._apply(user_id, jti, revoked_at, expires_at)
+
+    def _apply(self, user_id: int, jti: Optional[str], revoked_at: float, expires_at: float) -> None:
+        if jti is not None:
+            self._tokens[jti] = expires_at
+            return
+        current = self._cutoffs.get(user_id)
+        if current is None or current[0] < revoked_at:
+            self._cutoffs[user_id] = (revoked_at, expires_at)
+
+    def sync(self, db) -> int:
+        """Applique les révocations insérées depuis la dernière lecture (toutes au premier appel) ; retourne le nombre de lignes lues."""
+        # Les lignes des `overlap` dernières secondes sont relues : une insertion validée après une
+        # autre plus récente (transactions concurrentes) ou horodatée par une horloge en retard
+        # n'est pas perdue. Ni l'ordre ni la réutilisation des ids n'interviennent.
+        since = self._seen_until - self.overlap if self._seen_until else 0.0
+        rows = revocation_crud.revocations_since(db, since)
+        now = time.time()
+        with self._lock:
+            for row in rows:
+                if row.expires_at > now:
+                    self._apply(row.user_id, row.jti, row.revoked_at, row.expires_at)
+            if rows:
+                self._seen_until = max(self._seen_until, rows[-1].created_at)
+            # Dictionnaires remplacés d'un bloc : `is_revoked` lit sans verrou
+            self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+            self._cutoffs = {user_id: rule for user_id, rule in self._cutoffs.items() if rule[1] > now}
+        return len(rows)
+
+
+@lru_cache
+def get_revocation_list() -> RevocationList:
+    return RevocationList(get_settings().REVOCATION_SYNC_OVERLAP)
+
+
+async def sync_revocations(prune: bool = False) -> bool:
+    """
+    Une synchronisation (et la purge des lignes expirées si `prune`). False si
+    la base n'a pas répondu : les révocations déjà chargées restent appliquées.
+    """
+    try:
+        async with db_session() as db:
+            await run_db(db, get_revocation_list().sync)
+            if prune:
+                await run_db(db, revocation_crud.prune_revocations, time.time())
+    except Exception:
+        logger.exception("Synchronisation des révocations de tokens impossible")
+        return False
+    return True
+
+
+async def sync_revocations_periodically(interval: float, prune_interval: float):
+    next_prune = time.monotonic() + prune_interval
+    while True:
+        await asyncio.sleep(interval)
+        prune = time.monotonic() >= next_prune
+        if await sync_revocations(prune) and prune:
+            next_prune = time.monotonic() + prune_interval
+
+
+async def _record(db, user_id: int, jti: Optional[str], revoked_at: float, expires_at: float) -> None:
+    await run_db(db, revocation_crud.add_revocation, user_id, jti, revoked_at, expires_at)
+    get_revocation_list().add(user_id, jti, revoked_at, expires_at)
+
+
+async def revoke_token(db, identity: TokenIdentity) -> None:
+    """Logout : révoque ce token jusqu'à son expiration."""
+    if identity.jti is not None:
+        await _record(db, identity.user_id, identity.jti, time.time(), identity.expires_at)
+        return
+    # Token sans `jti` (émis avant leur introduction) : on coupe les sessions émises jusqu'à lui
+    await _record(db, identity.user_id, None, identity.issued_at or time.time(), identity.expires_at)
+
+
+async def revoke_user_sessions(db, user_id: int) -> None:
+    """Refuse tous les tokens de l'utilisateur émis jusqu'à maintenant ; un nouveau login reste possible."""
+    settings = get_settings()
+    now = time.time()
+    lifetime = 60 * max(settings.ACCESS_TOKEN_EXPIRE_MINUTES, settings.CLAIMS_TOKEN_EXPIRE_MINUTES)
+    await _record(db, user_id, None, now, now + lifetime)
+    # Mode AUTH_TRUST_TOKEN_CLAIMS : la version incrémentée invalide ses tokens dans les
+    # autres workers de la machine sans attendre leur prochaine synchronisation
+    get_user_cache().invalidate(user_id)
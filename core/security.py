@@ -1,27 +1,73 @@
+import uuid
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from core.config import get_settings
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from core.database import get_db
+from core.database import get_db, run_db
 from v1.models.user import User
+from core.user_cache import TokenIdentity, UserSnapshot, get_user_cache
+from core.revocation import get_revocation_list
 
-settings = get_settings()
+# --- Password hashing ---
+@dataclass(frozen=True)
+class Argon2Profile:
+    """Coût Argon2id : passes, mémoire (Kio), voies parallèles."""
+    time_cost: int
+    memory_cost: int
+    parallelism: int
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+    def describe(self) -> str:
+        return f"t={self.time_cost} m={self.memory_cost} p={self.parallelism}"
+
+# Profil de la suite de tests (quelques dizaines de µs par hachage). Hors Settings,
+# qui refuse moins de ARGON2_MIN_MEMORY_COST : aucune configuration ne peut le choisir
+TEST_ARGON2_PROFILE = Argon2Profile(time_cost=1, memory_cost=8, parallelism=1)
+
+_profile_override: Optional[Argon2Profile] = None
+
+def settings_profile(settings=None) -> Argon2Profile:
+    settings = settings or get_settings()
+    return Argon2Profile(settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM)
+
+def build_pwd_context(profile: Argon2Profile) -> CryptContext:
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__rounds=profile.time_cost,
+        argon2__memory_cost=profile.memory_cost,
+        argon2__parallelism=profile.parallelism,
+    )
+
+@lru_cache
+def get_pwd_context() -> CryptContext:
+    """Contexte construit au premier hachage depuis Settings (ou le profil imposé par `use_password_profile`)."""
+    return build_pwd_context(_profile_override or settings_profile())
+
+def use_password_profile(profile: Optional[Argon2Profile]) -> None:
+    """Tests : impose `profile` à tous les hachages du processus ; None = revenir au profil de Settings."""
+    global _profile_override
+    _profile_override = profile
+    get_pwd_context.cache_clear()
 
-# --- Password hashing ---
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Hash produit avec d'autres paramètres que le profil courant (profil recalibré, ancien défaut)."""
+    return get_pwd_context().needs_update(hashed_password)
 
 # --- JWT Handling ---
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    settings = get_settings()
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
@@ -29,26 +75,114 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 def decode_access_token(token: str) -> Optional[dict]:
+    settings = get_settings()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
         return None
 
+def create_user_access_token(user) -> str:
+    """
+    Token de login : identité et rôle en claims, plus la version courante de
+    l'utilisateur (`ver`) pour le mode `AUTH_TRUST_TOKEN_CLAIMS` et un
+    identifiant unique (`jti`) pour la révocation. `iat` garde ses fractions de
+    seconde : un login juste après une coupure des sessions n'est pas refusé.
+    """
+    settings = get_settings()
+    claims = {
+        "sub": str(user.id),
+        "email": user.email,
+        "role": user.role,
+        "ver": get_user_cache().version(user.id),
+        "jti": uuid.uuid4().hex,
+        "iat": datetime.now(timezone.utc).timestamp(),
+    }
+    expires_delta = timedelta(minutes=settings.CLAIMS_TOKEN_EXPIRE_MINUTES) if settings.AUTH_TRUST_TOKEN_CLAIMS else None
+    return create_access_token(claims, expires_delta)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/users/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _identity(payload: dict) -> TokenIdentity:
+    return TokenIdentity(int(payload["sub"]), payload.get("jti"), payload.get("iat"), payload.get("exp"))
+
+def _check_revocation(identity: TokenIdentity) -> TokenIdentity:
+    # Lecture en mémoire seulement (voir core.revocation.RevocationList)
+    if get_revocation_list().is_revoked(identity):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    return identity
+
+def _resolve_token(token: str) -> TokenIdentity:
+    cache = get_user_cache()
+    identity = cache.resolve_token(token)
+    if identity is None:
+        payload = decode_access_token(token)
+        if not payload or "sub" not in payload:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        identity = _identity(payload)
+        cache.remember_token(token, identity)
+    return _check_revocation(identity)
+
+def _user_from_claims(token: str) -> Optional[UserSnapshot]:
+    """
+    Mode `AUTH_TRUST_TOKEN_CLAIMS` : identité et rôle lus dans le token signé,
+    sans requête SQL. Toute modification de l'utilisateur incrémente sa version
+    (voir `core.user_cache.VersionBoard`), ce qui invalide les tokens émis avant.
+    """
+    if not get_settings().AUTH_TRUST_TOKEN_CLAIMS:
+        return None
+    board = get_user_cache().board
     payload = decode_access_token(token)
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if board is None or "ver" not in payload or "iat" not in payload:
+        # Token sans version (ancien format) ou cache désactivé : chemin classique
+        return None
     user_id = int(payload["sub"])
+    if payload["iat"] < board.created_at or payload["ver"] != board.get(user_id):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token outdated, please log in again")
+    _check_revocation(_identity(payload))
+    return UserSnapshot(id=user_id, email=payload.get("email"), role=payload.get("role"), is_active=True, created_at=None)
+
+def _load_user(db: Session, user_id: int) -> UserSnapshot:
+    cache = get_user_cache()
+    # La version est lue avant la requête : une invalidation concurrente rend l'entrée obsolète
+    version = cache.version(user_id)
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    snapshot = UserSnapshot.from_orm(user)
+    cache.put(snapshot, version)
+    return snapshot
+
+def _require_active(user: UserSnapshot) -> UserSnapshot:
+    # Mode claims : une désactivation incrémente la version, le token est déjà refusé
+    if user.is_active is False:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user")
     return user
 
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserSnapshot:
+    claims_user = _user_from_claims(token)
+    if claims_user is not None:
+        return claims_user
+    user_id = _resolve_token(token).user_id
+    return _require_active(get_user_cache().get(user_id) or _load_user(db, user_id))
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserSnapshot:
+    """Variante async : le cache est consulté sur la boucle, seule la requête SQL est déportée."""
+    claims_user = _user_from_claims(token)
+    if claims_user is not None:
+        return claims_user
+    user_id = _resolve_token(token).user_id
+    return _require_active(get_user_cache().get(user_id) or await run_db(db, _load_user, user_id))
+
+async def get_current_token(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> TokenIdentity:
+    """Token de la requête (`jti`, expiration), une fois son utilisateur authentifié : pour le logout."""
+    await get_current_user_async(token, db)
+    return _resolve_token(token)
+
 def require_role(role: str):
-    def guard(user: User = Depends(get_current_user)):
+    async def guard(user: UserSnapshot = Depends(get_current_user_async)):
         if user.role != role:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
         return user
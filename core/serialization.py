@@ -0,0 +1,31 @@
+# Sérialisation rapide des réponses (orjson + convertisseurs ligne -> dict précompilés)
+
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Type
+
+from pydantic import BaseModel
+
+
+def model_fields(model: Type[BaseModel]) -> List[str]:
+    """Champs du schéma, dans l'ordre où pydantic les sérialise."""
+    return list(model.__fields__)
+
+
+def model_columns(model: Type[BaseModel], entity) -> list:
+    """Colonnes de `entity` correspondant aux champs de `model` (requête sans instances ORM)."""
+    return [getattr(entity, name) for name in model_fields(model)]
+
+
+def compile_serializer(model: Type[BaseModel]) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Convertisseur objet/ligne -> dict pour `model`, sans validation pydantic.
+
+    Réservé aux données de confiance (colonnes lues en base) : les types sont
+    déjà ceux du schéma, orjson se charge des dates. Le résultat est identique
+    à `model.from_orm(obj).dict()` sérialisé par FastAPI.
+    """
+    names = tuple(model_fields(model))
+    getter = attrgetter(*names)
+    if len(names) == 1:
+        return lambda obj: {names[0]: getter(obj)}
+    return lambda obj: dict(zip(names, getter(obj)))
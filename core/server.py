@@ -0,0 +1,190 @@
+# Lancement en production : migrations si nécessaire, puis Gunicorn + workers Uvicorn dimensionnés depuis Settings
+#
+#   python -m core.server                 # ce que lance docker/entrypoint.sh
+#   python -m core.server --print-config  # affiche le dimensionnement calculé et s'arrête
+
+import argparse
+import itertools
+import math
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.config import WORKER_SLOT_ENV, Settings, get_settings
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+ALEMBIC_INI = PROJECT_ROOT / "alembic.ini"
+
+
+def available_cpus() -> int:
+    """Coeurs réellement utilisables : affinité du processus et quota cgroup v2 (conteneur)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def worker_count(settings: Settings, cpus: int) -> int:
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    # async : une boucle d'évènements par coeur suffit à les occuper ;
+    # sync : les threads attendent la base une bonne partie du temps, deux workers par coeur
+    count = cpus if settings.DB_MODE == "async" else cpus * 2
+    return max(1, min(count, settings.SERVER_MAX_WORKERS))
+
+
+def worker_threads(settings: Settings, cpus: Optional[int] = None) -> int:
+    """Taille du threadpool de chaque worker (appliquée par le lifespan de l'application)."""
+    if settings.SERVER_THREADS > 0:
+        return settings.SERVER_THREADS
+    if settings.DB_MODE == "async":
+        # SQL hors threadpool : il ne sert plus qu'aux calculs (plongements, index de vecteurs)
+        return max(4, cpus or available_cpus())
+    # Chaque run_db occupe un thread et une connexion : au-delà de la capacité du pool, un thread ne ferait qu'attendre
+    return settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+
+@dataclass
+class ServerPlan:
+    bind: str
+    workers: int
+    threads: int
+    preload: bool
+    max_requests: int
+    max_requests_jitter: int
+    timeout: int
+    graceful_timeout: int
+    keepalive: int
+
+    def gunicorn_options(self) -> Dict[str, Any]:
+        return {
+            "bind": self.bind,
+            "workers": self.workers,
+            "worker_class": "uvicorn.workers.UvicornWorker",
+            "preload_app": self.preload,
+            "max_requests": self.max_requests,
+            "max_requests_jitter": self.max_requests_jitter if self.max_requests else 0,
+            "timeout": self.timeout,
+            "graceful_timeout": self.graceful_timeout,
+            "keepalive": self.keepalive,
+            "pre_fork": _pre_fork,
+            "child_exit": _child_exit,
+        }
+
+    def describe(self) -> str:
+        return " ".join(f"{key}={value}" for key, value in asdict(self).items())
+
+
+def plan_server(settings: Settings, cpus: Optional[int] = None) -> ServerPlan:
+    cpus = cpus or available_cpus()
+    return ServerPlan(
+        bind=f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+        workers=worker_count(settings, cpus),
+        threads=worker_threads(settings, cpus),
+        preload=settings.SERVER_PRELOAD,
+        max_requests=settings.SERVER_MAX_REQUESTS,
+        max_requests_jitter=settings.SERVER_MAX_REQUESTS_JITTER,
+        timeout=settings.SERVER_TIMEOUT,
+        graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT,
+        keepalive=settings.SERVER_KEEPALIVE,
+    )
+
+
+def _pre_fork(server, worker) -> None:
+    # Plus petit numéro libre parmi les workers vivants : un worker recyclé (max_requests)
+    # reprend celui du worker qu'il remplace, le nombre de numéros reste celui des workers
+    taken = {getattr(sibling, "slot", None) for sibling in server.WORKERS.values()}
+    worker.slot = next(slot for slot in itertools.count() if slot not in taken)
+    os.environ[WORKER_SLOT_ENV] = str(worker.slot)
+
+
+def _child_exit(server, worker) -> None:
+    # Retire les jauges "live" du worker terminé des métriques agrégées (voir PROMETHEUS_MULTIPROC_DIR)
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    return config
+
+
+def schema_is_current(settings: Settings, config=None) -> bool:
+    """
+    Vrai si la base est déjà à la révision head. Lecture de `alembic_version`
+    seulement : ni env.py, ni import des modèles, ni transaction de migration.
+    """
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+
+    heads = set(ScriptDirectory.from_config(config or _alembic_config()).get_heads())
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            current = set(MigrationContext.configure(connection).get_current_heads())
+    finally:
+        engine.dispose()
+    return current == heads
+
+
+def migrate(settings: Settings) -> bool:
+    """`alembic upgrade head` si nécessaire ; retourne False quand le schéma était déjà à jour."""
+    from alembic import command
+
+    config = _alembic_config()
+    if schema_is_current(settings, config):
+        return False
+    command.upgrade(config, "head")
+    return True
+
+
+def serve(plan: ServerPlan, app_uri: str = "main:app") -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in plan.gunicorn_options().items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from gunicorn.util import import_app
+
+            return import_app(app_uri)
+
+    Application().run()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Lance l'API en production (Gunicorn + Uvicorn)")
+    parser.add_argument("--print-config", action="store_true", help="Affiche le dimensionnement calculé et s'arrête")
+    parser.add_argument("--no-migrate", action="store_true", help="Ne pas appliquer les migrations au démarrage")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    plan = plan_server(settings)
+    if args.print_config:
+        print(plan.describe())
+        return
+    if settings.SERVER_MIGRATE and not args.no_migrate:
+        print("[INFO] Migrations appliquées" if migrate(settings) else "[INFO] Schéma déjà à jour, migrations sautées")
+    print(f"[INFO] Démarrage : {plan.describe()}")
+    serve(plan)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Mesure du démarrage : imports, construction de l'application, lifespan, première requête
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Durées (secondes) des phases de démarrage du processus, dans l'ordre où elles sont mesurées."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[phase] = seconds
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Durées en millisecondes, arrondies."""
+        with self._lock:
+            return {f"{phase}_ms": round(seconds * 1000, 2) for phase, seconds in self.timings.items()}
+
+    def log(self) -> None:
+        logger.info("startup: %s", " ".join(f"{key}={value}" for key, value in self.as_dict().items()))
+
+
+startup_report = StartupReport()
+
+
+class FirstRequestTimer:
+    """
+    Middleware ASGI qui chronomètre la première requête HTTP du processus
+    (création paresseuse des engines, du cache, premier import d'argon2...)
+    puis journalise le rapport de démarrage. Ensuite, un simple test booléen.
+    """
+
+    def __init__(self, app, report: StartupReport = startup_report):
+        self.app = app
+        self.report = report
+        self.done = False
+
+    async def __call__(self, scope, receive, send):
+        if self.done or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.done = True
+        try:
+            with self.report.measure("first_request"):
+                await self.app(scope, receive, send)
+        finally:
+            self.report.log()
@@ -0,0 +1,164 @@
+# Réponses en flux (Server-Sent Events) : déconnexions, contre-pression, limite de flux par utilisateur
+
+import json
+import logging
+from collections import defaultdict
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, Hashable, Optional
+
+import anyio
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+PING = b": ping\n\n"
+
+
+def sse_event(event: str, data) -> bytes:
+    """Un évènement SSE ; `data` en JSON (une seule ligne, les retours à la ligne du texte restent échappés)."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+
+class EventSourceResponse(Response):
+    """
+    Réponse ASGI `text/event-stream` alimentée par un générateur asynchrone.
+
+    - Contre-pression : le générateur remplit une file de `buffer` évènements
+      et attend quand elle est pleine ; il n'avance qu'au rythme du client.
+    - Client lent : un envoi bloqué plus de `send_timeout` secondes coupe le flux.
+    - Déconnexion : `http.disconnect` annule immédiatement le générateur (le
+      modèle cesse de produire des tokens que personne ne lira).
+    - Keep-alive : un commentaire `: ping` quand rien n'a été envoyé depuis
+      `ping_interval` secondes, pour que les proxys ne ferment pas la connexion.
+
+    `on_close(outcome)` est appelé une fois, à la fin : `completed`,
+    `disconnected`, `slow_client` ou `error`.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(
+        self,
+        events: AsyncIterator[bytes],
+        buffer: int = 32,
+        send_timeout: float = 30.0,
+        ping_interval: float = 15.0,
+        on_close: Optional[Callable[[str], None]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        # Pas de Response.__init__ : il poserait un corps vide et Content-Length: 0
+        self.status_code = 200
+        self.background = None
+        self.events = events
+        self.buffer = buffer
+        self.send_timeout = send_timeout
+        self.ping_interval = ping_interval
+        self.on_close = on_close
+        headers = {
+            "content-type": self.media_type,
+            "cache-control": "no-cache",
+            "x-accel-buffering": "no",  # nginx : pas de mise en tampon de la réponse
+            **(headers or {}),
+        }
+        self.raw_headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+    async def __call__(self, scope, receive, send):
+        outcome = "completed"
+        finished = anyio.Event()
+        sender, receiver = anyio.create_memory_object_stream(self.buffer)
+
+        async def produce():
+            nonlocal outcome
+            try:
+                async with sender:
+                    async for event in self.events:
+                        await sender.send(event)
+            except anyio.BrokenResourceError:
+                pass  # le consommateur a abandonné (client lent)
+            except anyio.get_cancelled_exc_class():
+                raise
+            except Exception:
+                logger.exception("Event stream generator failed")
+                outcome = "error"
+            finally:
+                with anyio.CancelScope(shield=True):
+                    await self.events.aclose()
+
+        async def consume(cancel_scope):
+            nonlocal outcome
+            async with receiver:
+                while True:
+                    chunk = PING
+                    with anyio.move_on_after(self.ping_interval):
+                        try:
+                            chunk = await receiver.receive()
+                        except anyio.EndOfStream:
+                            break
+                    try:
+                        with anyio.fail_after(self.send_timeout):
+                            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    except TimeoutError:
+                        outcome = "slow_client"
+                        break
+            if outcome != "slow_client":
+                finished.set()
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            cancel_scope.cancel()
+
+        async def watch_disconnect(cancel_scope):
+            nonlocal outcome
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            # Le serveur signale aussi la déconnexion une fois la réponse terminée
+            if not finished.is_set():
+                outcome = "disconnected"
+            cancel_scope.cancel()
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(produce)
+                tg.start_soon(consume, tg.cancel_scope)
+                tg.start_soon(watch_disconnect, tg.cancel_scope)
+        except OSError:
+            # Socket fermée pendant un envoi (serveur qui ne signale pas la déconnexion avant)
+            outcome = "disconnected"
+        finally:
+            if self.on_close is not None:
+                self.on_close(outcome)
+        if self.background is not None:
+            await self.background()
+
+
+class StreamLimiter:
+    """
+    Flux ouverts par clé (utilisateur), en mémoire du worker : comme la
+    limitation de débit, la limite réelle est `limit x nombre de workers`.
+    Utilisé depuis la boucle d'évènements uniquement, pas de verrou.
+    """
+
+    def __init__(self):
+        self._active: Dict[Hashable, int] = defaultdict(int)
+
+    def acquire(self, key: Hashable, limit: int) -> bool:
+        if limit > 0 and self._active[key] >= limit:
+            return False
+        self._active[key] += 1
+        return True
+
+    def release(self, key: Hashable) -> None:
+        self._active[key] -= 1
+        if self._active[key] <= 0:
+            del self._active[key]
+
+    def active(self, key: Hashable) -> int:
+        return self._active.get(key, 0)
+
+
+@lru_cache
+def get_stream_limiter() -> StreamLimiter:
+    return StreamLimiter()
@@ -0,0 +1,228 @@
+# Cache des utilisateurs authentifiés (LRU + TTL) partagé entre requêtes
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from slugify import slugify
+
+from core.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+_SLOT = struct.Struct("Q")
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    Copie immuable des champs d'un utilisateur nécessaires à l'authentification.
+    """
+    id: int
+    email: str
+    role: str
+    is_active: Optional[bool]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_orm(cls, user) -> "UserSnapshot":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=user.is_active, created_at=user.created_at)
+
+
+class TokenIdentity(NamedTuple):
+    """Claims d'un token vérifié utiles à chaque requête : utilisateur, `jti`, `iat`, `exp`."""
+    user_id: int
+    jti: Optional[str]
+    issued_at: Optional[float]
+    expires_at: Optional[float]
+
+
+class VersionBoard:
+    """
+    Compteurs de version par utilisateur dans un fichier mappé en mémoire.
+
+    Tous les workers gunicorn d'une même machine ouvrent le même fichier :
+    incrémenter le compteur d'un utilisateur invalide son entrée dans le cache
+    de chaque worker, sans requête SQL ni service externe. Les identifiants
+    sont répartis sur un nombre fixe de cases ; une collision ne provoque
+    qu'un défaut de cache supplémentaire.
+
+    La première case contient la date de création du fichier : un token émis
+    avant cette date porte des versions qui ne signifient plus rien (fichier
+    recréé, par exemple au redémarrage du conteneur).
+    """
+
+    def __init__(self, path: str, slots: int = 65536):
+        self.path = path
+        self.slots = slots
+        size = (slots + 1) * _SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock_file()
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+            if _SLOT.unpack_from(self._map, 0)[0] == 0:
+                _SLOT.pack_into(self._map, 0, int(time.time()))
+        finally:
+            self._unlock_file()
+        self._lock = threading.Lock()
+
+    @property
+    def created_at(self) -> int:
+        """Date de création (timestamp Unix, secondes) du fichier de versions."""
+        return _SLOT.unpack_from(self._map, 0)[0]
+
+    def _lock_file(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def _unlock_file(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, user_id: int) -> int:
+        return (user_id % self.slots + 1) * _SLOT.size
+
+    def get(self, user_id: int) -> int:
+        return _SLOT.unpack_from(self._map, self._offset(user_id))[0]
+
+    def bump(self, user_id: int) -> int:
+        offset = self._offset(user_id)
+        with self._lock:
+            self._lock_file()
+            try:
+                version = _SLOT.unpack_from(self._map, offset)[0] + 1
+                _SLOT.pack_into(self._map, offset, version)
+            finally:
+                self._unlock_file()
+        return version
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class UserCache:
+    """
+    Cache LRU + TTL d'instantanés utilisateur indexés par id, plus un petit
+    index empreinte de token -> identité pour éviter de décoder le JWT à chaque requête.
+
+    Une entrée n'est servie que si la version lue dans le `VersionBoard` au
+    moment du chargement est toujours la version courante.
+    """
+
+    def __init__(self, board: Optional[VersionBoard], maxsize: int = 10000, ttl: float = 30.0, enabled: bool = True):
+        self.board = board
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self._users: "OrderedDict[int, Tuple[UserSnapshot, int, float]]" = OrderedDict()
+        self._tokens: "OrderedDict[bytes, TokenIdentity]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # --- Versions ---
+    def version(self, user_id: int) -> int:
+        return self.board.get(user_id) if self.board is not None else 0
+
+    # --- Utilisateurs ---
+    def get(self, user_id: int) -> Optional[UserSnapshot]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                snapshot, version, expires_at = entry
+                if expires_at > now and version == self.version(user_id):
+                    self._users.move_to_end(user_id)
+                    self.hits += 1
+                    return snapshot
+                del self._users[user_id]
+            self.misses += 1
+        return None
+
+    def put(self, snapshot: UserSnapshot, version: int) -> None:
+        """`version` doit avoir été lue *avant* la requête SQL qui a produit `snapshot`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._users[snapshot.id] = (snapshot, version, time.monotonic() + self.ttl)
+            self._users.move_to_end(snapshot.id)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        if self.board is not None:
+            self.board.bump(user_id)
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    # --- Tokens ---
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def resolve_token(self, token: str) -> Optional[TokenIdentity]:
+        if not self.enabled:
+            return None
+        key = self._digest(token)
+        with self._lock:
+            identity = self._tokens.get(key)
+            if identity is None:
+                return None
+            if identity.expires_at <= time.time():
+                del self._tokens[key]
+                return None
+            self._tokens.move_to_end(key)
+            return identity
+
+    def remember_token(self, token: str, identity: TokenIdentity) -> None:
+        if not self.enabled or identity.expires_at is None:
+            return
+        key = self._digest(token)
+        with self._lock:
+            self._tokens[key] = identity
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+            self._tokens.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def default_version_file(app_name: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f"{slugify(app_name)}-user-versions.bin")
+
+
+@lru_cache
+def get_user_cache() -> UserCache:
+    settings = get_settings()
+    board = None
+    if settings.USER_CACHE_ENABLED:
+        path = settings.USER_CACHE_VERSION_FILE or default_version_file(settings.APP_NAME)
+        board = VersionBoard(path, slots=settings.USER_CACHE_VERSION_SLOTS)
+    return UserCache(
+        board,
+        maxsize=settings.USER_CACHE_SIZE,
+        ttl=settings.USER_CACHE_TTL,
+        enabled=settings.USER_CACHE_ENABLED,
+    )
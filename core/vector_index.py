@@ -0,0 +1,345 @@
+# Index de vecteurs sur disque (.npy mappés en mémoire) pour la recherche sémantique
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+MANIFEST = "manifest.json"
+# Relectures du manifest quand un segment qu'il cite vient d'être supprimé par un écrivain
+REFRESH_ATTEMPTS = 5
+
+
+@dataclass
+class _Segment:
+    name: str
+    vectors: np.ndarray  # (count, dim) mappé en lecture seule
+    ids: np.ndarray  # (count,) int64
+    digests: np.ndarray  # (count,) int64, empreinte du texte plongé (0 si inconnue)
+    deleted: Optional[np.ndarray]  # positions supprimées, ou None
+
+
+class VectorIndex:
+    """
+    Vecteurs normalisés répartis en segments `.npy` immuables, ouverts avec
+    `mmap_mode="r"` : tous les workers d'une machine partagent les mêmes pages
+    (cache du système), sans copie ni chargement au démarrage.
+
+    `manifest.json` liste les segments ; un ajout écrit un nouveau segment (ou
+    réécrit le dernier s'il fait moins de `segment_rows` lignes) puis remplace
+    le manifest atomiquement. Les lecteurs voient le changement au prochain
+    `refresh()` (un `stat` par recherche). Supprimer ou réindexer un id pose
+    une pierre tombale sur son ancienne position ; `compact()` réécrit tout.
+    Chaque id garde l'empreinte du texte plongé (`entries()`) : la
+    synchronisation repère un texte modifié sous le même id.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dim: int,
+        dtype: str = "float32",
+        embedder: str = "",
+        segment_rows: int = 65536,
+        block_rows: int = 16384,
+    ):
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.embedder = embedder
+        self.segment_rows = segment_rows
+        self.block_rows = block_rows
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._stamp = None
+        self.refresh()
+
+    # --- Lecture ---
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._file(MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {"dim": self.dim, "dtype": self.dtype.name, "embedder": self.embedder, "next_segment": 1, "segments": []}
+        if manifest["dim"] != self.dim or manifest["dtype"] != self.dtype.name or manifest["embedder"] != self.embedder:
+            raise ValueError(
+                f"Vector index {self.path} was built with {manifest['embedder']} "
+                f"({manifest['dim']}, {manifest['dtype']}), not {self.embedder} ({self.dim}, {self.dtype.name})"
+            )
+        return manifest
+
+    def _manifest_stamp(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self._file(MANIFEST))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self) -> None:
+        """
+        Recharge la liste des segments si un autre processus a modifié l'index.
+
+        Un écrivain supprime les fichiers que son nouveau manifest ne cite plus :
+        entre la lecture du manifest et l'ouverture d'un segment, celui-ci peut
+        disparaître. Le manifest a alors déjà changé, il est relu.
+        """
+        for attempt in range(REFRESH_ATTEMPTS):
+            stamp = self._manifest_stamp()
+            if stamp == self._stamp:
+                return
+            try:
+                with self._lock:
+                    self._load(stamp)
+                return
+            except FileNotFoundError:
+                if attempt == REFRESH_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.001 * (attempt + 1))
+
+    def _load(self, stamp: Optional[tuple]) -> None:
+        manifest = self._read_manifest()
+        opened = {segment.name: segment for segment in self._segments}
+        segments = []
+        for entry in manifest["segments"]:
+            segment = opened.get(entry["name"])
+            if segment is None:
+                segment = _Segment(
+                    entry["name"],
+                    np.load(self._file(f"{entry['name']}.vectors.npy"), mmap_mode="r"),
+                    np.load(self._file(f"{entry['name']}.ids.npy")),
+                    self._load_digests(entry),
+                    None,
+                )
+            deleted = entry.get("deleted")
+            # Copie : les segments en service ne changent pas si un fichier manque en cours de route
+            segments.append(replace(segment, deleted=np.load(self._file(deleted)) if deleted else None))
+        self._segments = segments
+        self._stamp = stamp
+
+    def _load_digests(self, entry: dict) -> np.ndarray:
+        # Segment écrit avant l'ajout des empreintes : inconnues, l'article sera replongé
+        if not entry.get("digests"):
+            return np.zeros(entry["count"], dtype=np.int64)
+        return np.load(self._file(entry["digests"]))
+
+    def __len__(self) -> int:
+        return sum(len(s.ids) - (len(s.deleted) if s.deleted is not None else 0) for s in self._segments)
+
+    def ids(self) -> np.ndarray:
+        """Identifiants présents (non supprimés)."""
+        self.refresh()
+        parts = [self._live_ids(segment) for segment in self._segments]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def entries(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, empreintes) présents, dans le même ordre."""
+        self.refresh()
+        ids = [self._live_ids(segment) for segment in self._segments]
+        digests = [self._live_ids(segment, segment.digests) for segment in self._segments]
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(ids), np.concatenate(digests)
+
+    @staticmethod
+    def _live_ids(segment: _Segment, values: Optional[np.ndarray] = None) -> np.ndarray:
+        values = segment.ids if values is None else values
+        if segment.deleted is None:
+            return values
+        return np.delete(values, segment.deleted)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-`k` par produit scalaire pour chaque ligne de `queries` (n, dim).
+        Retourne (scores, ids), triés par score décroissant ; moins de `k`
+        colonnes si l'index contient moins de `k` vecteurs.
+
+        Produit matriciel par blocs de `block_rows` lignes (conversion float32
+        bornée en mémoire) et `argpartition` : sélection en O(n) par bloc au
+        lieu d'un tri complet.
+        """
+        self.refresh()
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        for segment in self._segments:
+            for start in range(0, len(segment.ids), self.block_rows):
+                block = segment.vectors[start:start + self.block_rows]
+                # bloc @ questions (et non l'inverse) : ~2x plus rapide quand il y a plusieurs questions
+                scores = (block.astype(np.float32, copy=False) @ queries.T).T
+                if segment.deleted is not None:
+                    deleted = segment.deleted[(segment.deleted >= start) & (segment.deleted < start + len(block))]
+                    scores[:, deleted - start] = -np.inf
+                # Top-k du bloc, puis fusion avec les k meilleurs des blocs précédents
+                top = _top_k_positions(scores, k)
+                best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+                best_ids = np.concatenate([best_ids, segment.ids[start + top]], axis=1)
+                top = _top_k_positions(best_scores, k)
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+                best_ids = np.take_along_axis(best_ids, top, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_ids = np.take_along_axis(best_ids, order, axis=1)
+        # Lignes supprimées (-inf) retenues faute de mieux quand il reste moins de k vecteurs
+        keep = int(np.isfinite(best_scores).sum(axis=1).min()) if len(best_scores) else 0
+        return best_scores[:, :keep], best_ids[:, :keep]
+
+    # --- Écriture (un seul écrivain à la fois, tous processus confondus) ---
+    @contextmanager
+    def _write_lock(self) -> Iterator[dict]:
+        with self._lock, open(self._file(".lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield self._read_manifest()
+
+    def _save(self, name: str, array: np.ndarray) -> None:
+        # Fichier temporaire + rename : un lecteur ne voit jamais un fichier à moitié écrit
+        tmp = self._file(f".{name}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, self._file(name))
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp = self._file(f".{MANIFEST}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._file(MANIFEST))
+
+    def _new_segment(self, manifest: dict, ids: np.ndarray, vectors: np.ndarray, digests: np.ndarray) -> dict:
+        name = f"seg-{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+        self._save(f"{name}.vectors.npy", vectors.astype(self.dtype))
+        self._save(f"{name}.ids.npy", ids.astype(np.int64))
+        self._save(f"{name}.digests.npy", digests.astype(np.int64))
+        return {"name": name, "count": len(ids), "digests": f"{name}.digests.npy"}
+
+    def _mark_deleted(self, manifest: dict, ids: np.ndarray) -> None:
+        for entry in manifest["segments"]:
+            segment_ids = np.load(self._file(f"{entry['name']}.ids.npy"), mmap_mode="r")
+            positions = np.flatnonzero(np.isin(segment_ids, ids))
+            if positions.size == 0:
+                continue
+            if entry.get("deleted"):
+                positions = np.union1d(np.load(self._file(entry["deleted"])), positions)
+            deleted = f"{entry['name']}.deleted-{manifest['next_segment']}.npy"
+            manifest["next_segment"] += 1
+            self._save(deleted, positions.astype(np.int64))
+            entry["deleted"] = deleted
+
+    def _live_rows(self, entry: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ids = np.load(self._file(f"{entry['name']}.ids.npy"))
+        vectors = np.load(self._file(f"{entry['name']}.vectors.npy"), mmap_mode="r")
+        digests = self._load_digests(entry)
+        if entry.get("deleted"):
+            keep = np.ones(len(ids), dtype=bool)
+            keep[np.load(self._file(entry["deleted"]))] = False
+            return ids[keep], vectors[keep], digests[keep]
+        return ids, np.asarray(vectors), digests
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray, digests: Optional[Sequence[int]] = None) -> None:
+        """
+        Ajoute (ou remplace) des vecteurs sans reconstruire l'index : seul le
+        dernier segment, s'il est petit, est réécrit avec les nouvelles lignes.
+        `digests` : empreintes des textes plongés (voir `entries()`), 0 par défaut.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors).reshape(-1, self.dim)
+        digests = np.zeros(len(ids), dtype=np.int64) if digests is None else np.asarray(digests, dtype=np.int64)
+        if len(ids) != len(vectors) or len(ids) != len(digests):
+            raise ValueError("ids, vectors and digests must have the same length")
+        if len(ids) == 0:
+            return
+        with self._write_lock() as manifest:
+            self._mark_deleted(manifest, ids)
+            segments = manifest["segments"]
+            if segments and segments[-1]["count"] + len(ids) <= self.segment_rows:
+                last = segments.pop()
+                last_ids, last_vectors, last_digests = self._live_rows(last)
+                ids = np.concatenate([last_ids, ids])
+                vectors = np.concatenate([last_vectors.astype(self.dtype), vectors.astype(self.dtype)])
+                digests = np.concatenate([last_digests, digests])
+            segments.append(self._new_segment(manifest, ids, vectors, digests))
+            self._write_manifest(manifest)
+            self._remove_unreferenced(manifest)
+        self.refresh()
+
+    def delete(self, ids: Sequence[int]) -> None:
+        with self._write_lock() as manifest:
+            self._mark_deleted(manifest, np.asarray(ids, dtype=np.int64))
+            self._write_manifest(manifest)
+            self._remove_unreferenced(manifest)
+        self.refresh()
+
+    def compact(self) -> None:
+        """Réécrit les lignes vivantes en segments pleins (après beaucoup de suppressions)."""
+        with self._write_lock() as manifest:
+            live = [self._live_rows(entry) for entry in manifest["segments"]]
+            ids = np.concatenate([part[0] for part in live]) if live else np.empty(0, dtype=np.int64)
+            vectors = np.concatenate([part[1] for part in live]) if live else np.empty((0, self.dim), dtype=self.dtype)
+            digests = np.concatenate([part[2] for part in live]) if live else np.empty(0, dtype=np.int64)
+            manifest["segments"] = [
+                self._new_segment(
+                    manifest,
+                    ids[start:start + self.segment_rows],
+                    vectors[start:start + self.segment_rows],
+                    digests[start:start + self.segment_rows],
+                )
+                for start in range(0, len(ids), self.segment_rows)
+            ]
+            self._write_manifest(manifest)
+            self._remove_unreferenced(manifest)
+        self.refresh()
+
+    def _remove_unreferenced(self, manifest: dict) -> None:
+        # Un lecteur qui a encore ouvert un ancien segment garde ses pages (unlink POSIX)
+        referenced = {MANIFEST, ".lock"}
+        for entry in manifest["segments"]:
+            referenced.update({f"{entry['name']}.vectors.npy", f"{entry['name']}.ids.npy", entry.get("digests"), entry.get("deleted")})
+        for name in os.listdir(self.path):
+            if name not in referenced and not name.startswith("."):
+                os.remove(self._file(name))
+
+    def close(self) -> None:
+        with self._lock:
+            self._segments = []
+            self._stamp = None
+
+
+def _top_k_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions (non triées) des `k` plus grands scores de chaque ligne."""
+    width = scores.shape[1]
+    if width <= k:
+        return np.broadcast_to(np.arange(width), scores.shape)
+    return np.argpartition(scores, width - k, axis=1)[:, width - k:]
+
+
+@lru_cache
+def get_vector_index() -> VectorIndex:
+    from core.embeddings import get_embedder
+
+    settings = get_settings()
+    embedder = get_embedder()
+    return VectorIndex(
+        settings.VECTOR_INDEX_DIR,
+        dim=embedder.dim,
+        dtype=settings.VECTOR_INDEX_DTYPE,
+        embedder=embedder.name,
+        segment_rows=settings.VECTOR_INDEX_SEGMENT_ROWS,
+        block_rows=settings.VECTOR_SEARCH_BLOCK_ROWS,
+    )
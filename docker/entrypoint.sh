@@ -1,9 +1,9 @@
 #!/bin/bash
 
-# Exécuter les migrations
-echo "Running migrations..."
-alembic upgrade head
+# Dossier partagé des métriques Prometheus (agrégées entre workers), vidé à chaque démarrage
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
 
-# Lancer l'application avec Gunicorn
-echo "Starting application with Gunicorn..."
-exec gunicorn --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000 --workers 4 main:app
+# Migrations (sautées si le schéma est déjà à jour) puis Gunicorn, dimensionné depuis la configuration (SERVER_*)
+exec python -m core.server
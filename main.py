@@ -1,29 +1,157 @@
-from fastapi import FastAPI
-from core.config import get_settings
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import anyio
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from core.config import Settings, configure_settings, get_settings
+from core.database import close_database, log_pool_stats, pool_stats
+from core.hashing import get_password_hasher
+from core.health import HEALTH_PATHS, get_readiness_probe, healthz, readyz
 from core.logging_config import setup_logging
+from core.compression import CompressionMiddleware
+from core.metrics import MetricsMiddleware, metrics_endpoint
+from core.rate_limit import get_rate_limiter
+from core.request_log import RequestLogMiddleware
+from core.revocation import get_revocation_list, sync_revocations, sync_revocations_periodically
+from core.security import get_pwd_context, require_role
+from core.server import worker_threads
+from core.startup import FirstRequestTimer, startup_report
+from core.user_cache import get_user_cache
 from v1.api import api_router
-import os
 
-# Crée le dossier logs si nécessaire
-def ensure_log_dir():
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
+startup_report.record("import", time.perf_counter() - _IMPORT_STARTED)
+
+async def log_pool_stats_periodically(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        log_pool_stats()
+
+def release_resources():
+    """Libère les singletons construits à la demande ; ils seront reconstruits depuis la configuration courante."""
+    # Modules numpy, modèle et flux : importés ici plutôt qu'au chargement de main (voir create_app)
+    from core.chat_model import get_chat_model
+    from core.embeddings import get_embedder
+    from core.streaming import get_stream_limiter
+    from core.vector_index import get_vector_index
+    from v1.services.answer_cache import get_answer_cache
+
+    # Pool de hachage des mots de passe
+    if get_password_hasher.cache_info().currsize:
+        get_password_hasher().shutdown()
+    if get_user_cache.cache_info().currsize:
+        board = get_user_cache().board
+        if board is not None:
+            board.close()
+    if get_vector_index.cache_info().currsize:
+        get_vector_index().close()
+    get_password_hasher.cache_clear()
+    get_user_cache.cache_clear()
+    get_rate_limiter.cache_clear()
+    get_vector_index.cache_clear()
+    get_embedder.cache_clear()
+    get_chat_model.cache_clear()
+    get_stream_limiter.cache_clear()
+    get_answer_cache.cache_clear()
+    get_readiness_probe.cache_clear()
+    get_pwd_context.cache_clear()
+    get_revocation_list.cache_clear()
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Construit l'application pour `settings` (par défaut : variables d'environnement).
+
+    Aucune ressource n'est ouverte ici : engines, pools, cache des utilisateurs
+    et pool de hachage sont créés au premier usage et libérés par le lifespan.
+    """
+    build_started = time.perf_counter()
+    if settings is not None:
+        configure_settings(settings)
+    settings = get_settings()
+
+    setup_logging(settings)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        started = time.perf_counter()
+        # Plusieurs applications peuvent coexister (tests) : celle qui démarre impose sa configuration
+        configure_settings(settings)
+        anyio.to_thread.current_default_thread_limiter().total_tokens = worker_threads(settings)
+        stats_task = None
+        if settings.DB_POOL_STATS_LOG_INTERVAL > 0:
+            stats_task = asyncio.create_task(log_pool_stats_periodically(settings.DB_POOL_STATS_LOG_INTERVAL))
+        # Révocations chargées avant la première requête, puis relues en tâche de fond
+        await sync_revocations()
+        revocation_task = asyncio.create_task(
+            sync_revocations_periodically(settings.REVOCATION_SYNC_INTERVAL, settings.REVOCATION_PRUNE_INTERVAL)
+        )
+        startup_report.record("lifespan", time.perf_counter() - started)
+        yield
+        for task in (stats_task, revocation_task):
+            if task is not None:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        release_resources()
+        await close_database()
+
+    app = FastAPI(
+        title=settings.APP_NAME,
+        debug=settings.DEBUG,
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse if settings.FAST_SERIALIZATION else JSONResponse,
+    )
+
+    if settings.COMPRESSION_ENABLED:
+        # Au plus près des routes : les métriques et les logs voient la réponse compressée
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        app.get("/metrics", include_in_schema=False)(metrics_endpoint)
+    app.add_middleware(FirstRequestTimer)
+    # En dernier = le plus externe : l'id de requête couvre tous les logs émis pendant la requête
+    app.add_middleware(RequestLogMiddleware, sample_rate=settings.LOG_ACCESS_SAMPLE_RATE, quiet_paths=HEALTH_PATHS)
+
+    include_routers(app)
 
-ensure_log_dir()
-setup_logging()
+    # Racine simple
+    def root():
+        return {"msg": f"Welcome to {settings.APP_NAME}"}
 
-settings = get_settings()
+    app.get("/")(root)
+    # Sondes de l'orchestrateur : sans authentification, hors schéma OpenAPI
+    app.get("/healthz", include_in_schema=False)(healthz)
+    app.get("/readyz", include_in_schema=False)(readyz)
+    app.get("/internal/db/pool", include_in_schema=False)(db_pool_stats)
 
-app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
+    startup_report.record("create_app", time.perf_counter() - build_started)
+    return app
 
 # Monter les routes versionnées
 def include_routers(app: FastAPI):
     app.include_router(api_router, prefix="/v1")
 
-include_routers(app)
+# Statistiques du pool de connexions (interne, admin seulement)
+def db_pool_stats(_=Depends(require_role("admin"))):
+    return pool_stats()
 
-# Racine simple
-def root():
-    return {"msg": f"Welcome to {settings.APP_NAME}"}
+_default_app: Optional[FastAPI] = None
 
-app.get("/")(root)
\ No newline at end of file
+def __getattr__(name: str):
+    # `main:app` (uvicorn, gunicorn) : l'application par défaut n'est construite qu'à la
+    # première demande, `import main` seul ne lit pas la configuration
+    global _default_app
+    if name == "app":
+        if _default_app is None:
+            _default_app = create_app()
+        return _default_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
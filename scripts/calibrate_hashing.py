@@ -0,0 +1,53 @@
+import argparse
+from pathlib import Path
+from typing import Dict
+from pydantic import ValidationError
+from core.hashing import calibrate, measure_profile
+from core.security import settings_profile
+from core.server import available_cpus
+
+# Chargement des variables d'environnement depuis .env si présent
+from dotenv import load_dotenv
+load_dotenv()
+
+def write_env(path: str, values: Dict[str, object]) -> None:
+    """Remplace les lignes `CLE=...` existantes du fichier, ajoute les autres à la fin."""
+    env = Path(path)
+    lines = env.read_text(encoding="utf-8").splitlines() if env.exists() else []
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in remaining:
+            lines[i] = f"{key}={remaining.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in remaining.items())
+    env.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def main():
+    cpus = available_cpus()
+    parser = argparse.ArgumentParser(description="Mesure Argon2id sur cette machine et propose un profil (ARGON2_*) tenant dans un budget de latence.")
+    parser.add_argument("--target-ms", type=float, default=250, help="Durée visée d'un hachage au pic de charge (ms)")
+    parser.add_argument("--concurrency", type=int, default=cpus, help="Hachages simultanés au pic (par défaut : coeurs disponibles, comme HASHING_WORKERS=0)")
+    parser.add_argument("--memory-mib", type=int, default=64, help="Mémoire par hachage avant ajustement (Mio)")
+    parser.add_argument("--max-parallelism", type=int, default=cpus, help="Voies parallèles essayées au plus")
+    parser.add_argument("--write", metavar="ENV_FILE", help="Écrit le profil dans ce fichier (ex : .env)")
+    args = parser.parse_args()
+
+    try:
+        current = settings_profile()
+        print(f"[INFO] Profil actuel : {current.describe()} ({measure_profile(current, args.concurrency) * 1000:.0f} ms sous charge)")
+    except ValidationError:
+        print("[INFO] Profil actuel : configuration incomplète (.env), non mesuré")
+    profile, elapsed = calibrate(args.target_ms, args.concurrency, args.memory_mib * 1024, args.max_parallelism)
+    print(f"[STAT] {profile.describe()} : {elapsed * 1000:.0f} ms par hachage avec {args.concurrency} hachages simultanés")
+    values = {"ARGON2_TIME_COST": profile.time_cost, "ARGON2_MEMORY_COST": profile.memory_cost, "ARGON2_PARALLELISM": profile.parallelism}
+    if elapsed > args.target_ms / 1000 * 1.1:
+        print(f"[WARN] Le profil minimal dépasse déjà {args.target_ms:.0f} ms : réduire --concurrency ou augmenter le budget")
+    if args.write:
+        write_env(args.write, values)
+        print(f"[OK] Profil écrit dans {args.write} ; les hashes existants seront mis à jour au prochain login")
+    else:
+        for key, value in values.items():
+            print(f"{key}={value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import json
+import os
+import sys
+import time
+from sqlalchemy.orm import Session
+from core.database import SessionLocal, engine
+from core.db_base import Base
+from v1.services import user_import
+
+# Chargement des variables d'environnement depuis .env si présent
+from dotenv import load_dotenv
+load_dotenv()
+
+def import_users(path: str, fmt: str, batch_size: int, workers: int):
+    Base.metadata.create_all(bind=engine)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        candidates, rejected = user_import.parse_rows(f, fmt)
+    db: Session = SessionLocal()
+    try:
+        candidates, duplicates = user_import.filter_new(db, candidates)
+        start = time.perf_counter()
+        hashed_passwords = user_import.hash_passwords([c.user.password for c in candidates], workers)
+        print(f"[INFO] {len(hashed_passwords)} mots de passe hachés en {time.perf_counter() - start:.1f}s ({workers} workers)")
+        created = user_import.insert_rows(db, candidates, hashed_passwords, batch_size)
+    finally:
+        db.close()
+    return user_import.build_report(rejected + duplicates + created)
+
+def main():
+    parser = argparse.ArgumentParser(description="Importe des utilisateurs depuis un fichier CSV ou JSONL.")
+    parser.add_argument("path", help="Fichier CSV (email,password,role,is_active) ou JSONL")
+    parser.add_argument("--format", choices=user_import.IMPORT_FORMATS, help="Format du fichier (déduit de l'extension par défaut)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Nombre de lignes insérées par lot")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Threads de hachage")
+    parser.add_argument("--report", help="Écrit le rapport ligne par ligne dans ce fichier JSONL")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    report = import_users(args.path, fmt, args.batch_size, args.workers)
+    for row in report.rows:
+        if row.status != "created":
+            print(f"[WARN] ligne {row.line} ({row.email}): {row.status} - {row.detail}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            for row in report.rows:
+                f.write(json.dumps(row.dict(), ensure_ascii=False) + "\n")
+    print(f"[OK] {report.created} utilisateurs créés, {report.rejected} lignes rejetées")
+    sys.exit(1 if report.rejected else 0)
+
+if __name__ == "__main__":
+    main()
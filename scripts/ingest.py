@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+from sqlalchemy.orm import Session
+from core.database import SessionLocal, engine
+from core.db_base import Base
+from v1.services import ingestion
+import v1.models.answer_cache  # noqa: F401 (corpus_state, mis à jour par les triggers du corpus)
+
+# Chargement des variables d'environnement depuis .env si présent
+from dotenv import load_dotenv
+load_dotenv()
+
+def print_progress(report: ingestion.IngestReport):
+    print(f"[INFO] {report.read} documents lus, {report.inserted} insérés, {report.updated} mis à jour, "
+          f"{report.unchanged} inchangés, {report.chunks} articles écrits", flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingère des textes juridiques (JSONL, XML ou texte brut) dans le corpus.")
+    parser.add_argument("paths", nargs="+", help="Fichiers ou répertoires à ingérer")
+    parser.add_argument("--format", choices=ingestion.INGEST_FORMATS, help="Format des fichiers (déduit de l'extension par défaut)")
+    parser.add_argument("--code", help="Code par défaut (ex: \"Code civil\") pour les documents qui n'en précisent pas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processus de nettoyage / découpage")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Articles écrits par transaction")
+    parser.add_argument("--max-chars", type=int, default=4000, help="Taille maximale d'un article avant découpage")
+    parser.add_argument("--quiet", action="store_true", help="Pas de progression par lot")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db: Session = SessionLocal()
+    try:
+        report = ingestion.ingest(
+            db, args.paths, args.format, args.code, args.workers, args.batch_size, args.max_chars,
+            on_batch=None if args.quiet else print_progress,
+        )
+    finally:
+        db.close()
+
+    for error in report.errors:
+        print(f"[WARN] {error.origin}: {error.detail}")
+    if report.rejected > len(report.errors):
+        print(f"[WARN] ... {report.rejected - len(report.errors)} autres documents rejetés")
+    for stage, stats in report.stages.items():
+        print(f"[STAT] {stage:<6} {stats.describe()}")
+    parse = report.stages["parse"]
+    print(f"[OK] {report.inserted} documents insérés, {report.updated} mis à jour, {report.unchanged} inchangés, "
+          f"{report.rejected} rejetés ; {report.chunks} articles écrits en {report.seconds:.1f}s "
+          f"({parse.bytes / 1e6 / report.seconds if report.seconds else 0:.1f} Mo/s)")
+    sys.exit(1 if report.rejected else 0)
+
+if __name__ == "__main__":
+    main()
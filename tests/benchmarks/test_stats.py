@@ -0,0 +1,20 @@
+from benchmarks.stats import compare, percentile, summarize
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+def test_summarize():
+    summary = summarize([0.001, 0.002, 0.003], errors=1, wall_time=2.0)
+    assert summary["requests"] == 4
+    assert summary["throughput_rps"] == 2.0
+    assert summary["p50_ms"] == 2.0
+
+def test_compare_flags_regressions_over_threshold():
+    baseline = {"get_user": {"p95_ms": 10.0, "throughput_rps": 100.0, "errors": 0}}
+    ok = {"get_user": {"p95_ms": 11.0, "throughput_rps": 95.0, "errors": 0}}
+    slow = {"get_user": {"p95_ms": 15.0, "throughput_rps": 60.0, "errors": 0}}
+    assert compare(ok, baseline, threshold=0.2) == []
+    assert len(compare(slow, baseline, threshold=0.2)) == 2
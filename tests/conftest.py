@@ -3,24 +3,38 @@ os.environ["ENV_FILE"] = ".env.test"
 
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=os.environ["ENV_FILE"], override=True)
-os.environ["DATABASE_URL"] = "sqlite:///file::memory:?cache=shared"
 
 import pytest
+from datetime import date
 from core.db_base import Base
-from core.database import get_db, engine, SessionLocal
-from main import app
+from core.config import Settings
+from core.database import get_database
+from core.query_plan import QueryPlanGuard
+from core.security import TEST_ARGON2_PROFILE, use_password_profile
+from core.user_cache import get_user_cache
+from core.rate_limit import get_rate_limiter
+from main import create_app
+from v1.crud import document as document_crud
+from v1.services.answer_cache import get_answer_cache
 from fastapi.testclient import TestClient
 import uuid
-# Ensure all models are imported so their tables are created
 
-print(f"[TEST DEBUG] Using engine: {engine}")
+# Base SQLite temporaire (fichier réel : partagée entre les sessions sync et async)
+@pytest.fixture(scope="session")
+def test_settings(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("db")
+    return Settings(
+        DATABASE_URL=f"sqlite:///{tmp / 'test.db'}",
+        USER_CACHE_VERSION_FILE=str(tmp / "user-versions.bin"),
+        VECTOR_INDEX_DIR=str(tmp / "vectors"),
+        LOG_FILE="",  # console seulement : la suite ne laisse aucun fichier dans logs/
+        CHAT_FAKE_FIRST_TOKEN_DELAY=0,
+        CHAT_FAKE_TOKEN_DELAY=0,
+    )
 
-# Ensure tables are created for the in-memory DB before tests
-@pytest.fixture(scope="session", autouse=True)
-def create_test_tables():
-    Base.metadata.create_all(bind=engine)
-    yield
-    # Optionally: Base.metadata.drop_all(bind=engine)
+@pytest.fixture(scope="session")
+def app(test_settings):
+    return create_app(test_settings)
 
 # Ajout de fixtures pour générer des emails uniques et des données utilisateur, admin, etc.
 @pytest.fixture
@@ -63,42 +77,74 @@ def user_token(client, user_data):
     assert resp.status_code == 200
     return resp.json()["access_token"]
 
+def auth_headers(token):
+    return {"Authorization": f"Bearer {token}"}
+
+# Petit corpus juridique (recherche plein texte, index de vecteurs) ; ids des documents par nom
+@pytest.fixture
+def corpus():
+    with get_database().SessionLocal() as db:
+        civil = document_crud.create_document(db, "Code civil", "Code civil", [
+            {"article_number": "1240", "heading": "Responsabilité extracontractuelle",
+             "text": "Tout fait quelconque de l'homme, qui cause à autrui un dommage, oblige celui par la faute duquel il est arrivé à le réparer."},
+            {"article_number": "1241", "heading": None,
+             "text": "Chacun est responsable du dommage qu'il a causé non seulement par son fait, mais encore par sa négligence ou par son imprudence."},
+            {"article_number": "1728", "heading": "Obligations du preneur",
+             "text": "Le preneur est tenu de payer le prix du bail aux termes convenus."},
+        ], published_at=date(2016, 10, 1))
+        travail = document_crud.create_document(db, "Code du travail", "Code du travail", [
+            {"article_number": "L1231-1", "heading": "Rupture du contrat",
+             "text": "Le contrat de travail à durée indéterminée peut être rompu à l'initiative de l'employeur ou du salarié."},
+        ], published_at=date(2008, 5, 1))
+        return {"civil": civil.id, "travail": travail.id}
+
+# Argon2 au coût minimal : la suite ne mesure pas le hachage (voir benchmarks/)
+@pytest.fixture(scope="session", autouse=True)
+def cheap_password_hashing():
+    use_password_profile(TEST_ARGON2_PROFILE)
+    yield
+    use_password_profile(None)
+
 @pytest.fixture(scope="function", autouse=True)
-def setup_test_db():
-    print(f"[TEST DEBUG] Creating/dropping tables on engine: {engine}")
+def setup_test_db(app):
+    engine = get_database().engine
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Les ids repartent de 1 à chaque test : le cache des utilisateurs doit être vidé
+    get_user_cache().clear()
+    get_rate_limiter().reset()
+    if get_answer_cache() is not None:
+        get_answer_cache().clear()
     yield
-    Base.metadata.drop_all(bind=engine)
+    Base.metadata.drop_all(bind=get_database().engine)
+
+# Chaque requête des tests passe par EXPLAIN QUERY PLAN : un parcours complet d'une table
+# (hors requêtes marquées ALLOW_FULL_SCAN) fait échouer le test qui l'a émise
+@pytest.fixture(scope="session")
+def query_plan_guard():
+    guard = QueryPlanGuard(Base.metadata.tables)
+    guard.install()
+    yield guard
+    guard.uninstall()
+
+@pytest.fixture(autouse=True)
+def no_full_scans(query_plan_guard):
+    query_plan_guard.take()
+    yield
+    violations = query_plan_guard.take()
+    if violations:
+        pytest.fail("Parcours complets de table inattendus (EXPLAIN QUERY PLAN) :\n" + "\n".join(map(str, violations)), pytrace=False)
 
 @pytest.fixture
 def db_session():
-    db = SessionLocal()
+    db = get_database().SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 @pytest.fixture
-def client(db_session):
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-    app.dependency_overrides[get_db] = override_get_db
+def client(app):
+    # DB_MODE=async pytest : même suite, get_db fournit alors une AsyncSession
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
-
-# --- Suppression automatique du fichier file::memory: à la fin des tests ---
-@pytest.fixture(scope="session", autouse=True)
-def cleanup_memory_file():
-    yield
-    memfile = "file::memory:"
-    if os.path.exists(memfile):
-        try:
-            os.remove(memfile)
-            print(f"[TEST CLEANUP] Fichier supprimé : {memfile}")
-        except Exception as e:
-            print(f"[TEST CLEANUP] Erreur suppression {memfile} : {e}")
@@ -0,0 +1,28 @@
+from sqlalchemy import insert
+
+from core.compression import accepted_encodings
+from v1.models.user import User
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br;q=0.5") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=1.0") == {"gzip"}
+    assert accepted_encodings("") == {""}
+
+
+def test_large_responses_are_compressed(client, admin_token, db_session):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    db_session.execute(insert(User), [{"email": f"compress{i}@example.com", "hashed_password": "-"} for i in range(30)])
+    db_session.commit()
+    for encoding in ("br", "gzip"):
+        resp = client.get("/v1/users/?limit=50", headers={**headers, "Accept-Encoding": encoding})
+        assert resp.headers["Content-Encoding"] == encoding and "Accept-Encoding" in resp.headers["Vary"]
+        assert int(resp.headers["Content-Length"]) < len(resp.content) / 3
+        assert len(resp.json()) == 31
+        # Export en flux : compressé morceau par morceau
+        resp = client.get("/v1/users/export?batch_size=5", headers={**headers, "Accept-Encoding": encoding})
+        assert resp.headers["Content-Encoding"] == encoding and len(resp.text.splitlines()) == 31
+    resp = client.get("/v1/users/1", headers={**headers, "Accept-Encoding": "br, gzip"})
+    assert "Content-Encoding" not in resp.headers
+    resp = client.get("/v1/users/?limit=50", headers={**headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in resp.headers
@@ -0,0 +1,26 @@
+import pytest
+from pydantic import ValidationError
+
+from core.config import Settings
+from core.hashing import calibrate
+from core.security import Argon2Profile
+
+
+def test_calibrate_fits_the_latency_budget():
+    def measure(profile, concurrency):
+        # Temps simulé : proportionnel aux passes et à la mémoire, deux voies 30 % plus rapides sous charge
+        lanes = 0.7 if profile.parallelism >= 2 else 1.0
+        return profile.time_cost * profile.memory_cost / 65536 * 0.040 * concurrency / 2 * lanes
+
+    profile, elapsed = calibrate(250, concurrency=2, memory_kib=65536, max_parallelism=4, measure=measure)
+    assert profile == Argon2Profile(time_cost=8, memory_cost=65536, parallelism=2) and elapsed <= 0.25
+    # Une seule passe trop lente : la mémoire descend, jamais sous le plancher
+    profile, _ = calibrate(30, concurrency=8, memory_kib=262144, measure=measure)
+    assert (profile.time_cost, profile.memory_cost) == (1, 19456)
+
+
+def test_settings_refuse_weak_argon2_profiles():
+    with pytest.raises(ValidationError):
+        Settings(DATABASE_URL="sqlite://", SECRET_KEY="x", ARGON2_MEMORY_COST=8)
+    with pytest.raises(ValidationError):
+        Settings(DATABASE_URL="sqlite://", SECRET_KEY="x", ARGON2_TIME_COST=0)
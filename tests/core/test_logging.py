@@ -0,0 +1,62 @@
+import json
+import logging
+import queue
+
+from core.config import WORKER_SLOT_ENV
+from core.logging_config import BoundedQueueHandler, JsonFormatter, process_log_file
+from core.request_log import request_id_var
+
+
+def _record(msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_request_id_and_extra():
+    handler = BoundedQueueHandler(queue.Queue())
+    token = request_id_var.set("req-42")
+    try:
+        record = handler.prepare(_record(status=200))
+    finally:
+        request_id_var.reset(token)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "hello world"
+    assert entry["request_id"] == "req-42"
+    assert entry["status"] == 200
+    assert entry["level"] == "INFO"
+
+
+def test_prepare_renders_exceptions_in_caller_thread():
+    handler = BoundedQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        import sys
+        record = _record(exc_info=sys.exc_info())
+    prepared = handler.prepare(record)
+    assert prepared.exc_info is None
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(prepared))["exc"]
+
+
+def test_drop_policy_never_blocks_when_queue_is_full():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2), policy="drop")
+    for _ in range(5):
+        handler.emit(_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_log_file_is_per_worker_slot(monkeypatch):
+    monkeypatch.delenv(WORKER_SLOT_ENV, raising=False)
+    assert process_log_file("logs/app.log") == "logs/app.log"
+    monkeypatch.setenv(WORKER_SLOT_ENV, "3")
+    assert process_log_file("logs/app.log") == "logs/app.3.log"
+    assert process_log_file("logs/app.log", per_process=False) == "logs/app.log"
+
+
+def test_request_id_is_echoed_or_generated(client):
+    resp = client.get("/", headers={"X-Request-ID": "abc-123"})
+    assert resp.headers["x-request-id"] == "abc-123"
+    generated = client.get("/", headers={"X-Request-ID": "bad id\x7f"}).headers["x-request-id"]
+    assert generated != "bad id\x7f" and len(generated) == 32
@@ -0,0 +1,26 @@
+from sqlalchemy import select, text
+
+from core.database import get_database
+from core.query_plan import find_scans
+from v1.crud import user as user_crud
+from v1.models.user import User
+
+
+def test_find_scans_resolves_aliases():
+    statement = "SELECT * FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid JOIN documents AS d ON d.id = c.document_id"
+    plan = ["SCAN chunks_fts VIRTUAL TABLE INDEX 0:M1", "SEARCH c USING INTEGER PRIMARY KEY (rowid=?)", "SCAN d", "SCAN CONSTANT ROW"]
+    assert [v.table for v in find_scans(statement, plan, {"chunks", "documents"})] == ["documents"]
+    assert find_scans("SELECT email FROM users", ["SCAN users USING COVERING INDEX ix_users_email"], {"users"})[0].table == "users"
+    assert find_scans("SELECT * FROM users WHERE id = 1", ["SEARCH users USING INTEGER PRIMARY KEY (rowid=?)"], {"users"}) == []
+
+
+def test_guard_reports_unexpected_scans(query_plan_guard):
+    with get_database().SessionLocal() as db:
+        # admin_exists() passe par l'index sur role (plus de parcours de users à chaque création d'admin)
+        user_crud.admin_exists(db)
+        assert query_plan_guard.take() == []
+        db.execute(select(User.id).where(User.is_active.is_(True)))
+        db.execute(select(User.id).where(User.is_active.is_(True)).execution_options(allow_full_scan=True))
+        db.execute(text("SELECT 1"))
+    violations = query_plan_guard.take()
+    assert [(v.table, v.plan) for v in violations] == [("users", "SCAN users")]
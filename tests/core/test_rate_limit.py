@@ -0,0 +1,29 @@
+import pytest
+from fastapi import HTTPException
+from core.rate_limit import InMemorySlidingWindow, RateLimiter
+
+def test_sliding_window_blocks_then_recovers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("core.rate_limit.time.monotonic", lambda: now[0])
+    backend = InMemorySlidingWindow(buckets=10)
+    assert backend.hit("k", limit=2, window=10) is None
+    now[0] += 5
+    assert backend.hit("k", limit=2, window=10) is None
+    retry_after = backend.hit("k", limit=2, window=10)
+    assert retry_after == pytest.approx(5)
+    now[0] += retry_after
+    assert backend.hit("k", limit=2, window=10) is None
+
+def test_keys_are_evicted_beyond_capacity():
+    backend = InMemorySlidingWindow(max_keys=2)
+    for key in ("a", "b", "c"):
+        backend.hit(key, limit=5, window=60)
+    assert list(backend._counters) == ["b", "c"]
+
+def test_limiter_raises_429_with_retry_after():
+    limiter = RateLimiter(InMemorySlidingWindow())
+    limiter.check("k", limit=1, window=60)
+    with pytest.raises(HTTPException) as exc:
+        limiter.check("k", limit=1, window=60)
+    assert exc.value.status_code == 429
+    assert "Retry-After" in exc.value.headers
@@ -0,0 +1,67 @@
+import time
+from sqlalchemy import insert
+from core.revocation import RevocationList
+from core.user_cache import TokenIdentity
+from v1.crud.revocation import add_revocation, prune_revocations
+from v1.models.revocation import TokenRevocation
+
+def _token(user_id=1, jti="a" * 32, issued_at=None):
+    return TokenIdentity(user_id, jti, issued_at if issued_at is not None else time.time(), time.time() + 60)
+
+def test_logout_and_session_cutoff():
+    revocations = RevocationList()
+    old, new = _token(jti="a" * 32, issued_at=100.0), _token(jti="b" * 32, issued_at=300.0)
+    revocations.add(1, "a" * 32, time.time(), time.time() + 60)
+    assert revocations.is_revoked(old)
+    assert not revocations.is_revoked(new)
+    # Coupure des sessions : tokens émis jusqu'à `revoked_at` refusés, ceux d'après acceptés
+    revocations.add(1, None, 200.0, time.time() + 60)
+    assert revocations.is_revoked(_token(jti=None, issued_at=150.0))
+    assert not revocations.is_revoked(new)
+    assert not revocations.is_revoked(_token(user_id=2, jti="c" * 32, issued_at=150.0))
+
+def test_revocations_reach_other_workers(db_session):
+    # Deux listes sur la même base simulent deux workers
+    worker_a, worker_b = RevocationList(), RevocationList()
+    assert worker_b.sync(db_session) == 0
+    now = time.time()
+    add_revocation(db_session, 1, "a" * 32, now, now + 60)
+    worker_a.add(1, "a" * 32, now, now + 60)
+    assert not worker_b.is_revoked(_token())
+    assert worker_b.sync(db_session) == 1
+    assert worker_b.is_revoked(_token())
+    # Hors de la fenêtre de recouvrement, les lignes déjà lues ne sont plus relues
+    worker_b.overlap = 0
+    worker_b._seen_until += 1
+    assert worker_b.sync(db_session) == 0
+
+def test_revocation_after_prune_reaches_other_workers(db_session):
+    # Purger la ligne la plus récente libère son id (SQLite sans AUTOINCREMENT) : la synchronisation ne doit pas en dépendre
+    worker = RevocationList()
+    now = time.time()
+    add_revocation(db_session, 1, "a" * 32, now - 120, now - 1)
+    worker.sync(db_session)
+    assert prune_revocations(db_session, now) == 1
+    add_revocation(db_session, 1, "b" * 32, now, now + 60)
+    worker.sync(db_session)
+    assert worker.is_revoked(_token(jti="b" * 32))
+
+def test_late_commit_within_overlap_is_applied(db_session):
+    # Ligne horodatée avant la dernière lue (transaction concurrente validée en retard)
+    worker = RevocationList(overlap=30)
+    now = time.time()
+    add_revocation(db_session, 1, "a" * 32, now, now + 60)
+    worker.sync(db_session)
+    db_session.execute(insert(TokenRevocation).values(user_id=2, jti="b" * 32, revoked_at=now, expires_at=now + 60, created_at=now - 10))
+    db_session.commit()
+    worker.sync(db_session)
+    assert worker.is_revoked(_token(user_id=2, jti="b" * 32))
+
+def test_expired_revocations_are_dropped(db_session):
+    now = time.time()
+    add_revocation(db_session, 1, "a" * 32, now - 120, now - 60)
+    add_revocation(db_session, 1, "b" * 32, now, now + 60)
+    revocations = RevocationList()
+    revocations.sync(db_session)
+    assert len(revocations) == 1
+    assert prune_revocations(db_session, now) == 1
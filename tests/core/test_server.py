@@ -0,0 +1,77 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import anyio
+from sqlalchemy import create_engine, text
+
+from core import health
+from core.config import WORKER_SLOT_ENV, Settings, get_settings
+from core.server import _alembic_config, _pre_fork, plan_server, schema_is_current, worker_threads
+
+
+def test_server_plan_follows_db_mode():
+    settings = Settings(DATABASE_URL="sqlite://", SECRET_KEY="x", DB_MODE="sync", DB_POOL_SIZE=5, DB_MAX_OVERFLOW=3)
+    plan = plan_server(settings, cpus=3)
+    assert (plan.workers, plan.threads) == (6, 8)
+    assert plan_server(settings, cpus=16).workers == settings.SERVER_MAX_WORKERS
+    async_settings = settings.copy(update={"DB_MODE": "async"})
+    assert (plan_server(async_settings, cpus=3).workers, plan_server(async_settings, cpus=3).threads) == (3, 4)
+    fixed = settings.copy(update={"SERVER_WORKERS": 2, "SERVER_THREADS": 40, "SERVER_MAX_REQUESTS": 0})
+    options = plan_server(fixed, cpus=16).gunicorn_options()
+    assert (options["workers"], options["max_requests"], options["max_requests_jitter"]) == (2, 0, 0)
+    assert options["worker_class"] == "uvicorn.workers.UvicornWorker" and options["preload_app"] is True
+
+
+def test_schema_is_current(tmp_path):
+    url = f"sqlite:///{tmp_path / 'schema.db'}"
+    settings = Settings(DATABASE_URL=url, SECRET_KEY="x")
+    assert not schema_is_current(settings)
+    head = _alembic_config()
+    from alembic.script import ScriptDirectory
+    script = ScriptDirectory.from_config(head)
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        connection.execute(text("INSERT INTO alembic_version VALUES (:rev)"), {"rev": script.get_revision(script.get_current_head()).down_revision})
+    assert not schema_is_current(settings)
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE alembic_version SET version_num = :rev"), {"rev": script.get_current_head()})
+    engine.dispose()
+    assert schema_is_current(settings)
+
+
+def test_health_endpoints(client, monkeypatch):
+    assert client.get("/healthz").json() == {"status": "ok"}
+    resp = client.get("/readyz")
+    assert resp.status_code == 200 and resp.json()["database"]["ok"] is True
+    # Threadpool dimensionné par le lifespan (mode sync : pool + overflow)
+    limiter = client.portal.call(anyio.to_thread.current_default_thread_limiter)
+    assert limiter.total_tokens == worker_threads(get_settings())
+
+    async def slow_ping():
+        await asyncio.sleep(1)
+    monkeypatch.setattr(health, "ping_database", slow_ping)
+    monkeypatch.setattr(health.get_readiness_probe(), "timeout", 0.05)
+    # Résultat précédent encore valide : pas de nouveau ping
+    assert client.get("/readyz").status_code == 200
+    monkeypatch.setattr(health.get_readiness_probe(), "_expires_at", 0.0)
+    resp = client.get("/readyz")
+    assert resp.status_code == 503
+    assert resp.json()["database"]["error"] == "timeout"
+
+def test_worker_slots_are_reused(monkeypatch):
+    monkeypatch.delenv(WORKER_SLOT_ENV, raising=False)
+    arbiter = SimpleNamespace(WORKERS={})
+    workers = []
+    for pid in (101, 102, 103):
+        worker = SimpleNamespace()
+        _pre_fork(arbiter, worker)
+        arbiter.WORKERS[pid] = worker
+        workers.append(worker)
+    assert [worker.slot for worker in workers] == [0, 1, 2]
+    # Le worker 102 (numéro 1) est recyclé : son remplaçant reprend le numéro et donc le fichier de log
+    del arbiter.WORKERS[102]
+    replacement = SimpleNamespace()
+    _pre_fork(arbiter, replacement)
+    assert replacement.slot == 1 and os.environ[WORKER_SLOT_ENV] == "1"
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from core import database
+from core.startup import StartupReport
+from core.user_cache import get_user_cache
+
+
+def test_startup_report_in_milliseconds():
+    report = StartupReport()
+    report.record("import", 0.25)
+    with report.measure("first_request"):
+        pass
+    timings = report.as_dict()
+    assert timings["import_ms"] == 250.0
+    assert timings["first_request_ms"] >= 0
+
+
+def test_lifespan_releases_lazy_resources(app):
+    with TestClient(app) as client:
+        assert client.get("/").status_code == 200
+        get_user_cache()
+        assert database._database is not None
+    # Engines et cache libérés à l'arrêt, reconstruits au prochain usage
+    assert database._database is None
+    assert get_user_cache.cache_info().currsize == 0
+    assert database.get_database().engine is not None
+
+
+def test_first_request_is_timed(app):
+    from core.startup import startup_report
+    with TestClient(app) as client:
+        client.get("/")
+    assert "first_request_ms" in startup_report.as_dict()
+
+
+def test_create_app_does_not_import_numpy():
+    # Processus neuf : dans celui des tests, numpy est déjà chargé par d'autres modules
+    code = (
+        "import sys, main; main.create_app(); "
+        "print(sorted(m for m in ('numpy', 'core.embeddings', 'core.vector_index', 'v1.services.answer_cache') if m in sys.modules))"
+    )
+    env = {**os.environ, "DATABASE_URL": "sqlite://", "SECRET_KEY": "x", "LOG_FILE": ""}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert result.stdout.strip() == "[]"
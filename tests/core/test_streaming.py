@@ -0,0 +1,80 @@
+import asyncio
+
+from core.streaming import PING, EventSourceResponse, StreamLimiter, sse_event
+
+def _run(response, send_delay=0.0, disconnect_after=None):
+    """Exécute la réponse ASGI ; retourne (corps envoyés, issue)."""
+    bodies, outcomes = [], []
+    response.on_close = outcomes.append
+
+    async def receive():
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            await asyncio.sleep(send_delay)
+            bodies.append(message["body"])
+
+    asyncio.run(response(None, receive, send))
+    return bodies, outcomes
+
+def test_stream_completes():
+    async def events():
+        for i in range(3):
+            yield sse_event("token", {"text": str(i)})
+
+    bodies, outcomes = _run(EventSourceResponse(events()))
+    assert bodies == [b'event: token\ndata: {"text": "0"}\n\n', sse_event("token", {"text": "1"}), sse_event("token", {"text": "2"}), b""]
+    assert outcomes == ["completed"]
+
+def test_disconnect_stops_generator():
+    state = {"produced": 0, "closed": False}
+
+    async def events():
+        try:
+            while True:
+                await asyncio.sleep(0.005)
+                state["produced"] += 1
+                yield b"data: x\n\n"
+        finally:
+            state["closed"] = True
+
+    _, outcomes = _run(EventSourceResponse(events()), disconnect_after=0.05)
+    assert outcomes == ["disconnected"]
+    assert state["closed"] and state["produced"] < 50
+
+def test_slow_client_is_cut_and_generator_does_not_run_ahead():
+    state = {"produced": 0, "closed": False}
+
+    async def events():
+        try:
+            while True:
+                state["produced"] += 1
+                yield b"data: x\n\n"
+        finally:
+            state["closed"] = True
+
+    _, outcomes = _run(EventSourceResponse(events(), buffer=4, send_timeout=0.05), send_delay=1)
+    assert outcomes == ["slow_client"]
+    # Un envoi bloqué : au plus `buffer` évènements d'avance (+ celui en cours d'envoi et celui en attente de place)
+    assert state["closed"] and state["produced"] <= 4 + 2
+
+def test_ping_when_generator_is_silent():
+    async def events():
+        await asyncio.sleep(0.1)
+        yield b"data: x\n\n"
+
+    bodies, _ = _run(EventSourceResponse(events(), ping_interval=0.02))
+    assert PING in bodies and bodies[-2:] == [b"data: x\n\n", b""]
+
+def test_stream_limiter():
+    limiter = StreamLimiter()
+    assert limiter.acquire(1, 2) and limiter.acquire(1, 2)
+    assert not limiter.acquire(1, 2)
+    assert limiter.acquire(2, 2)
+    limiter.release(1)
+    assert limiter.active(1) == 1 and limiter.acquire(1, 2)
+    assert limiter.acquire(1, 0)  # 0 = illimité
@@ -0,0 +1,29 @@
+from core.user_cache import UserCache, UserSnapshot, VersionBoard
+
+def _snapshot(user_id=1, role="admin"):
+    return UserSnapshot(id=user_id, email="user@example.com", role=role, is_active=True, created_at=None)
+
+def test_cache_hit_and_ttl(tmp_path):
+    cache = UserCache(VersionBoard(str(tmp_path / "versions.bin"), slots=16), ttl=60)
+    cache.put(_snapshot(), cache.version(1))
+    assert cache.get(1) == _snapshot()
+    cache.ttl = 0
+    cache.put(_snapshot(), cache.version(1))
+    assert cache.get(1) is None
+
+def test_invalidation_reaches_other_workers(tmp_path):
+    # Deux caches sur le même fichier simulent deux workers gunicorn
+    path = str(tmp_path / "versions.bin")
+    worker_a = UserCache(VersionBoard(path, slots=16))
+    worker_b = UserCache(VersionBoard(path, slots=16))
+    worker_b.put(_snapshot(), worker_b.version(1))
+    assert worker_b.get(1) is not None
+    worker_a.invalidate(1)
+    assert worker_b.get(1) is None
+
+def test_lru_eviction(tmp_path):
+    cache = UserCache(VersionBoard(str(tmp_path / "versions.bin"), slots=16), maxsize=2)
+    for user_id in (1, 2, 3):
+        cache.put(_snapshot(user_id), cache.version(user_id))
+    assert cache.get(1) is None
+    assert cache.get(3) is not None
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from core.embeddings import HashingEmbedder, normalize_rows
+from core.vector_index import VectorIndex
+
+def _vectors(n, dim=8, seed=0):
+    return normalize_rows(np.random.default_rng(seed).standard_normal((n, dim)))
+
+def _index(path, **kwargs):
+    return VectorIndex(str(path), dim=8, embedder="test", **kwargs)
+
+def test_search_matches_brute_force(tmp_path):
+    # Petits segments et blocs : la fusion des top-k entre blocs est exercée
+    vectors = _vectors(500)
+    index = _index(tmp_path, segment_rows=128, block_rows=50)
+    index.add(np.arange(500) + 1000, vectors)
+    queries = _vectors(3, seed=1)
+    scores, ids = index.search(queries, k=5)
+    expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :5] + 1000
+    assert (ids == expected).all()
+    assert (np.diff(scores, axis=1) <= 0).all()
+    assert len(index) == 500
+
+def test_append_delete_and_replace(tmp_path):
+    vectors = _vectors(20)
+    index = _index(tmp_path, segment_rows=8)
+    index.add(range(10), vectors[:10], digests=np.arange(10) + 100)
+    index.add(range(10, 20), vectors[10:])
+    assert sorted(index.ids().tolist()) == list(range(20))
+    index.delete([3])
+    assert 3 not in index.search(vectors[3], k=20)[1][0]
+    # Réindexer un id remplace son vecteur au lieu de le dupliquer
+    index.add([5], vectors[7:8])
+    assert len(index) == 19
+    assert index.search(vectors[7], k=2)[1][0].tolist().count(5) == 1
+    index.add([6], vectors[6:7], digests=[7])
+    index.compact()
+    assert len(index) == 19 and sorted(index.ids().tolist()) == sorted(set(range(20)) - {3})
+    # Les empreintes suivent leurs ids (remplacement, compaction) ; 0 quand elles ne sont pas fournies
+    digests = dict(zip(*(part.tolist() for part in index.entries())))
+    assert (digests[0], digests[5], digests[6], digests[15]) == (100, 0, 7, 0)
+
+def test_float16_storage_and_refresh_across_workers(tmp_path):
+    # Deux instances sur le même répertoire simulent deux workers
+    writer, reader = _index(tmp_path, dtype="float16"), _index(tmp_path, dtype="float16")
+    vectors = _vectors(50)
+    writer.add(range(50), vectors)
+    scores, ids = reader.search(vectors[:2], k=1)
+    assert ids[:, 0].tolist() == [0, 1]
+    assert np.allclose(scores[:, 0], 1.0, atol=1e-2)
+    assert np.load(tmp_path / "seg-000001.vectors.npy", mmap_mode="r").dtype == np.float16
+    with pytest.raises(ValueError):
+        VectorIndex(str(tmp_path), dim=16, dtype="float16", embedder="test")
+
+def test_hashing_embedder_is_deterministic():
+    embedder = HashingEmbedder(dim=64)
+    a, b, c = embedder.embed(["Responsabilité du fait d'autrui", "responsabilite du FAIT d'autrui", "bail commercial"])
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > a @ c
+
+def test_refresh_rereads_manifest_when_segment_was_removed(tmp_path, monkeypatch):
+    writer, reader = _index(tmp_path, segment_rows=64), _index(tmp_path, segment_rows=64)
+    vectors = _vectors(20)
+    writer.add(range(10), vectors[:10])
+    stale = reader._read_manifest()
+    # Le dernier segment est réécrit : seg-000001 est supprimé du disque
+    writer.add(range(10, 20), vectors[10:])
+    assert not (tmp_path / "seg-000001.ids.npy").exists()
+    # Le lecteur a lu l'ancien manifest juste avant la suppression
+    reads = iter([stale])
+    fresh = reader._read_manifest
+    monkeypatch.setattr(reader, "_read_manifest", lambda: next(reads, None) or fresh())
+    assert sorted(reader.ids().tolist()) == list(range(20))
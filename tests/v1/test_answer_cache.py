@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from core.database import get_database
+from core.embeddings import HashingEmbedder
+from tests.conftest import auth_headers
+from v1.crud import answer_cache as answer_cache_crud
+from v1.crud import document as document_crud
+from v1.services.answer_cache import AnswerCache, CachedEntry, get_answer_cache, normalize_question
+
+
+def ask(client, token, message):
+    """Réponse complète et évènement `done` d'un POST /v1/chat."""
+    resp = client.post("/v1/chat", json={"message": message, "k": 0}, headers=auth_headers(token))
+    assert resp.status_code == 200
+    events = [block.split("\n") for block in resp.text.strip().split("\n\n")]
+    data = [(lines[0][len("event: "):], json.loads(lines[1][len("data: "):])) for lines in events]
+    answer = "".join(payload["text"] for name, payload in data if name == "token")
+    return answer, data[-1][1]
+
+
+def test_normalize_question():
+    assert normalize_question("Quel est le DÉLAI de préavis ?") == normalize_question("  quel délai  de preavis") == "delai preavis"
+    # Les négations comptent
+    assert normalize_question("Peut-on ne pas payer le loyer ?") == "peut ne pas payer loyer"
+
+
+def test_repeated_question_is_served_from_cache(client, user_token, admin_token):
+    first, done = ask(client, user_token, "Quel est le délai de préavis ?")
+    assert done["cached"] is False
+    second, done = ask(client, user_token, "quel est le delai de PREAVIS")
+    assert done["cached"] is True and second == first
+
+    # Niveau persistant : un worker neuf (ou redémarré) retrouve la réponse en base
+    get_answer_cache().clear()
+    third, done = ask(client, user_token, "Quel est le délai de préavis ?")
+    assert done["cached"] is True and third == first
+
+    stats = client.get("/v1/chat/cache", headers=auth_headers(admin_token)).json()
+    assert stats["enabled"] is True
+    assert (stats["memory_hits"], stats["persistent_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["persistent_size"] == 1
+
+
+def test_corpus_change_and_clear_invalidate(client, user_token, admin_token):
+    ask(client, user_token, "rupture conventionnelle")
+    with get_database().SessionLocal() as db:
+        document_crud.create_document(db, "Code du travail", "Code du travail", [{"text": "La rupture conventionnelle..."}])
+    assert ask(client, user_token, "rupture conventionnelle")[1]["cached"] is False
+    assert ask(client, user_token, "rupture conventionnelle")[1]["cached"] is True
+
+    assert client.delete("/v1/chat/cache", headers=auth_headers(user_token)).status_code == 403
+    assert client.delete("/v1/chat/cache", headers=auth_headers(admin_token)).status_code == 204
+    assert ask(client, user_token, "rupture conventionnelle")[1]["cached"] is False
+    assert client.get("/v1/chat/cache", headers=auth_headers(admin_token)).json()["persistent_size"] == 1
+
+
+def test_memory_tier_lru_ttl_and_similarity():
+    cache = AnswerCache(max_size=2, ttl=60, similarity=0.5, persistent=False, embedder=HashingEmbedder(64))
+
+    async def scenario():
+        with get_database().SessionLocal() as db:
+            for question in ("délai de préavis démission", "bail commercial", "garde alternée"):
+                lookup = await cache.lookup(db, question, "fake", 0)
+                await cache.store(lookup, f"réponse : {question}", [])
+            assert (await cache.lookup(db, "délai de préavis démission", "fake", 0)).result == "miss"  # évincée (LRU)
+            assert (await cache.lookup(db, "garde alternée", "fake", 0)).result == "memory"
+            similar = await cache.lookup(db, "préavis de démission : quel délai ?", "fake", 0)
+            assert similar.result == "miss"  # réponse évincée plus haut
+            await cache.store(similar, "réponse préavis", [])
+            near = await cache.lookup(db, "délai du préavis de démission", "fake", 0)
+            assert near.result == "similar" and near.entry.answer == "réponse préavis"
+            assert (await cache.lookup(db, "délai du préavis de démission", "other-model", 0)).result == "miss"
+            cache.ttl = 0
+            assert (await cache.lookup(db, "garde alternée", "fake", 0)).result == "miss"
+
+    asyncio.run(scenario())
+    assert cache.stats["evictions"] >= 1 and cache.stats["similar_hits"] == 1
+
+
+def test_expired_near_match_does_not_hide_the_next_one():
+    cache = AnswerCache(ttl=60, similarity=0.5, persistent=False)
+    now = time.time()
+    closest, next_best = np.array([1.0, 0.0], dtype=np.float32), np.array([0.8, 0.6], dtype=np.float32)
+    cache._put("fake:0:expiree", CachedEntry("ancienne", [], now - 120, closest))
+    cache._put("fake:0:valable", CachedEntry("récente", [], now, next_best))
+    entry = cache._nearest("fake:0:", np.array([1.0, 0.0], dtype=np.float32), now)
+    assert entry is not None and entry.answer == "récente"
+    # L'entrée expirée a quitté le niveau mémoire et la matrice des plongements
+    assert "fake:0:expiree" not in cache._entries
+    keys, vectors = cache._matrix
+    assert keys == ["fake:0:valable"] and vectors.shape == (1, 2)
+
+
+def test_put_answer_replaces_existing_key(db_session):
+    # Deux workers ratent le cache sur la même question : la seconde écriture remplace la première
+    answer_cache_crud.put_answer(db_session, "fake:0:bail", "première", "[]", None, 0, 1.0)
+    answer_cache_crud.put_answer(db_session, "fake:0:bail", "seconde", "[]", None, 0, 2.0)
+    row = answer_cache_crud.get_answer(db_session, "fake:0:bail", 0, 0.0, 3.0)
+    assert (row.answer, row.created_at) == ("seconde", 2.0)
+    assert answer_cache_crud.count_answers(db_session) == 1
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+from jose import jwt
+from starlette.websockets import WebSocketDisconnect
+
+from core.config import get_settings
+from core.streaming import get_stream_limiter
+from tests.conftest import auth_headers
+
+
+def parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_chat_streams_tokens(client, user_token):
+    with client.stream("POST", "/v1/chat", json={"message": "Qu'est-ce qu'un bail ?", "k": 0}, headers=auth_headers(user_token)) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "text/event-stream"
+        events = parse_sse(resp.read().decode())
+    assert events[0] == ("sources", {"sources": []})
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert "".join(tokens) == "Question reçue : Qu'est-ce qu'un bail ? Aucun article pertinent trouvé."
+    name, done = events[-1]
+    assert name == "done" and done["tokens"] == len(tokens) and done["first_token_ms"] >= 0
+    assert get_stream_limiter().active(int(jwt.get_unverified_claims(user_token)["sub"])) == 0
+
+
+def test_chat_limits_concurrent_streams(client, user_token, monkeypatch):
+    monkeypatch.setattr(get_settings(), "CHAT_MAX_STREAMS_PER_USER", 1)
+    user_id = int(jwt.get_unverified_claims(user_token)["sub"])
+    limiter = get_stream_limiter()
+    assert limiter.acquire(user_id, 1)
+    try:
+        resp = client.post("/v1/chat", json={"message": "bonjour"}, headers=auth_headers(user_token))
+        assert resp.status_code == 429
+        assert resp.headers["Retry-After"] == "1"
+    finally:
+        limiter.release(user_id)
+    assert client.post("/v1/chat", json={"message": "bonjour", "k": 0}, headers=auth_headers(user_token)).status_code == 200
+
+
+def test_chat_websocket(client, user_token):
+    with client.websocket_connect(f"/v1/chat/ws?token={user_token}") as ws:
+        for question in ("premier", "second"):
+            ws.send_json({"message": question, "k": 0})
+            messages = []
+            while not messages or messages[-1]["event"] != "done":
+                messages.append(ws.receive_json())
+            text = "".join(m["data"]["text"] for m in messages if m["event"] == "token")
+            assert text.startswith(f"Question reçue : {question}")
+        ws.send_json({"message": ""})
+        assert ws.receive_json() == {"event": "error", "data": {"detail": "Invalid message"}}
+
+
+def test_chat_requires_auth(client):
+    assert client.post("/v1/chat", json={"message": "bonjour"}).status_code == 401
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/v1/chat/ws?token=invalid") as ws:
+            ws.receive_json()
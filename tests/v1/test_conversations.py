@@ -0,0 +1,112 @@
+import time
+
+from sqlalchemy import select
+
+from core.chat_model import FakeChatModel
+from tests.conftest import auth_headers
+from v1.crud import conversation as conversation_crud
+from v1.models.conversation import Message
+
+
+def create_conversation(client, token, title=None):
+    resp = client.post("/v1/conversations", json={"title": title}, headers=auth_headers(token))
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def add_message(client, token, conversation_id, content, role="user"):
+    resp = client.post(f"/v1/conversations/{conversation_id}/messages", json={"role": role, "content": content}, headers=auth_headers(token))
+    assert resp.status_code == 201
+    return resp.json()
+
+
+def test_conversations_are_listed_by_activity(client, user_token, admin_token):
+    first = create_conversation(client, user_token, "Bail")
+    second = create_conversation(client, user_token)
+    third = create_conversation(client, user_token)
+    time.sleep(0.01)
+    add_message(client, user_token, first, "Quelles sont les obligations du preneur ?")
+
+    resp = client.get("/v1/conversations", params={"limit": 2}, headers=auth_headers(user_token))
+    assert resp.status_code == 200
+    page = resp.json()
+    assert [c["id"] for c in page] == [first, third]
+    assert page[0]["message_count"] == 1 and page[0]["title"] == "Bail"
+    resp = client.get("/v1/conversations", params={"limit": 2, "cursor": resp.headers["X-Next-Cursor"]}, headers=auth_headers(user_token))
+    assert [c["id"] for c in resp.json()] == [second]
+    assert "X-Next-Cursor" not in resp.headers
+
+    # Sans titre : début de la première question
+    add_message(client, user_token, second, "Comment   rompre un contrat de travail ?")
+    assert client.get(f"/v1/conversations/{second}", headers=auth_headers(user_token)).json()["title"] == "Comment rompre un contrat de travail ?"
+
+    # Les conversations des autres utilisateurs n'existent pas pour eux
+    assert client.get("/v1/conversations", headers=auth_headers(admin_token)).json() == []
+    assert client.get(f"/v1/conversations/{first}/messages", headers=auth_headers(admin_token)).status_code == 404
+    assert client.delete(f"/v1/conversations/{first}", headers=auth_headers(admin_token)).status_code == 404
+    assert client.delete(f"/v1/conversations/{first}", headers=auth_headers(user_token)).status_code == 204
+    assert client.get(f"/v1/conversations/{first}", headers=auth_headers(user_token)).status_code == 404
+    assert client.get("/v1/conversations", params={"cursor": "bad"}, headers=auth_headers(user_token)).status_code == 400
+
+
+def test_messages_paging_and_compressed_bodies(client, user_token, db_session):
+    conversation_id = create_conversation(client, user_token)
+    long_text = "Le bailleur est obligé, par la nature du contrat, de délivrer la chose louée. " * 40
+    ids = [add_message(client, user_token, conversation_id, f"Message {i}")["id"] for i in range(4)]
+    long_id = add_message(client, user_token, conversation_id, long_text, role="assistant")["id"]
+
+    resp = client.get(f"/v1/conversations/{conversation_id}/messages", params={"limit": 3}, headers=auth_headers(user_token))
+    page = resp.json()
+    assert [m["id"] for m in page] == [long_id, ids[3], ids[2]]
+    assert page[0]["truncated"] and len(page[0]["preview"]) == conversation_crud.PREVIEW_CHARS
+    assert page[0]["length"] == len(long_text) and not page[1]["truncated"]
+    assert page[1]["preview"] == "Message 3"
+    resp = client.get(
+        f"/v1/conversations/{conversation_id}/messages",
+        params={"limit": 3, "cursor": resp.headers["X-Next-Cursor"]}, headers=auth_headers(user_token),
+    )
+    assert [m["id"] for m in resp.json()] == [ids[1], ids[0]]
+
+    resp = client.get(f"/v1/conversations/{conversation_id}/messages/{long_id}", headers=auth_headers(user_token))
+    assert resp.status_code == 200 and resp.json()["content"] == long_text
+    assert client.get(f"/v1/conversations/{conversation_id}/messages/{long_id + 1}", headers=auth_headers(user_token)).status_code == 404
+    # Texte long compressé en base, texte court sans `body`
+    bodies = dict(db_session.execute(select(Message.id, Message.body).where(Message.conversation_id == conversation_id)).all())
+    assert bodies[ids[0]] is None and len(bodies[long_id]) < len(long_text) / 5
+
+
+def test_recent_messages_within_budget(client, user_token, db_session):
+    conversation_id = create_conversation(client, user_token)
+    for i in range(6):
+        add_message(client, user_token, conversation_id, f"Question {i} " + "x" * 36)  # 12 tokens estimés
+    history = conversation_crud.load_recent_messages(db_session, conversation_id, max_messages=4, max_tokens=1000)
+    assert [m.content.split()[1] for m in history] == ["2", "3", "4", "5"]
+    history = conversation_crud.load_recent_messages(db_session, conversation_id, max_messages=10, max_tokens=30)
+    assert [m.content.split()[1] for m in history] == ["4", "5"]
+    assert conversation_crud.load_recent_messages(db_session, conversation_id, max_messages=10, max_tokens=5) == []
+
+
+def test_chat_in_conversation(client, user_token, admin_token, monkeypatch):
+    histories = []
+
+    class RecordingModel(FakeChatModel):
+        async def stream(self, question, context, history=()):
+            histories.append(list(history))
+            async for token in super().stream(question, context, history):
+                yield token
+
+    monkeypatch.setattr("v1.endpoints.chat.get_chat_model", lambda: RecordingModel())
+    conversation_id = create_conversation(client, user_token)
+    for message in ("Qu'est-ce qu'un bail ?", "Et sa durée ?"):
+        resp = client.post("/v1/chat", json={"message": message, "k": 0, "conversation_id": conversation_id}, headers=auth_headers(user_token))
+        assert resp.status_code == 200 and "event: done" in resp.text
+
+    assert histories[0] == []
+    assert [role for role, _ in histories[1]] == ["user", "assistant"]
+    assert histories[1][0] == ("user", "Qu'est-ce qu'un bail ?")
+    messages = client.get(f"/v1/conversations/{conversation_id}/messages", headers=auth_headers(user_token)).json()
+    assert [m["role"] for m in messages] == ["assistant", "user", "assistant", "user"]
+    assert messages[0]["preview"].startswith("Question reçue : Et sa durée ?")
+
+    resp = client.post("/v1/chat", json={"message": "Bonjour", "conversation_id": conversation_id}, headers=auth_headers(admin_token))
+    assert resp.status_code == 404
@@ -140,3 +140,336 @@ def test_admin_can_delete_user(client, admin_token, user_data):
     client.post("/v1/users/", json=user_data)
     resp = client.delete("/v1/users/1", headers={"Authorization": f"Bearer {admin_token}"})
     assert resp.status_code == 204, f"Response: {resp.status_code}, Body: {resp.text}"
+
+def test_login_hashing_saturated(client, user_data):
+    from core.hashing import get_password_hasher
+    client.post("/v1/users/", json=user_data)
+    hasher = get_password_hasher()
+    max_pending = hasher.max_pending
+    hasher.max_pending = 0
+    try:
+        resp = client.post("/v1/users/token", data={"username": user_data["email"], "password": user_data["password"]})
+    finally:
+        hasher.max_pending = max_pending
+    assert resp.status_code == 503, f"Response: {resp.status_code}, Body: {resp.text}"
+    assert "Retry-After" in resp.headers
+
+def test_demoted_admin_loses_access(client, admin_token):
+    email = f"admin_{uuid.uuid4().hex[:8]}@example.com"
+    resp = client.post("/v1/users/", json={"email": email, "password": "adminpass", "role": "admin"}, headers={"Authorization": f"Bearer {admin_token}"})
+    assert resp.status_code == 201, f"Response: {resp.status_code}, Body: {resp.text}"
+    second_id = resp.json()["id"]
+    second_token = client.post("/v1/users/token", data={"username": email, "password": "adminpass"}).json()["access_token"]
+    # Premier appel : l'utilisateur est mis en cache
+    assert client.get("/v1/users/", headers={"Authorization": f"Bearer {second_token}"}).status_code == 200
+    resp = client.patch(f"/v1/users/{second_id}", json={"role": "user"}, headers={"Authorization": f"Bearer {admin_token}"})
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    resp = client.get("/v1/users/", headers={"Authorization": f"Bearer {second_token}"})
+    assert resp.status_code == 403, f"Response: {resp.status_code}, Body: {resp.text}"
+
+def test_db_pool_stats_admin_only(client, admin_token, user_token):
+    resp = client.get("/internal/db/pool", headers={"Authorization": f"Bearer {user_token}"})
+    assert resp.status_code == 403, f"Response: {resp.status_code}, Body: {resp.text}"
+    resp = client.get("/internal/db/pool", headers={"Authorization": f"Bearer {admin_token}"})
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    stats = resp.json()["sync"]
+    assert "checked_out" in stats
+    assert "wait_max_ms" in stats
+
+def test_list_users_cursor_pagination(client, admin_token):
+    for i in range(4):
+        client.post("/v1/users/", json={"email": f"page{i}@example.com", "password": "strongpassword"})
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    seen = []
+    resp = client.get("/v1/users/?limit=2", headers=headers)
+    while True:
+        assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+        seen.extend(u["id"] for u in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        resp = client.get(f"/v1/users/?limit=2&cursor={cursor}", headers=headers)
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+def test_list_users_invalid_cursor(client, admin_token):
+    resp = client.get("/v1/users/?cursor=not-a-cursor", headers={"Authorization": f"Bearer {admin_token}"})
+    assert resp.status_code == 400, f"Response: {resp.status_code}, Body: {resp.text}"
+
+def test_export_users(client, admin_token, user_data):
+    import json
+    client.post("/v1/users/", json=user_data)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    resp = client.get("/v1/users/export?format=ndjson&batch_size=1", headers=headers)
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row["email"] for row in rows][1] == user_data["email"]
+    resp = client.get("/v1/users/export?format=csv", headers=headers)
+    assert resp.status_code == 200
+    lines = resp.text.splitlines()
+    assert lines[0] == "id,email,is_active,role,created_at"
+    assert len(lines) == 3
+
+def test_user_cannot_export_users(client, user_token):
+    resp = client.get("/v1/users/export", headers={"Authorization": f"Bearer {user_token}"})
+    assert resp.status_code == 403, f"Response: {resp.status_code}, Body: {resp.text}"
+
+def test_bulk_create_users_csv(client, admin_token, user_data):
+    client.post("/v1/users/", json=user_data)
+    body = "\n".join([
+        "email,password,role,is_active",
+        "bulk1@example.com,strongpassword,user,",
+        "bulk2@example.com,strongpassword,admin,false",
+        f"{user_data['email']},strongpassword,user,",
+        "bulk1@example.com,strongpassword,user,",
+        "not-an-email,strongpassword,user,",
+    ])
+    resp = client.post("/v1/users/bulk", content=body, headers={"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"})
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    report = resp.json()
+    assert report["created"] == 2
+    assert report["rejected"] == 3
+    assert [row["status"] for row in report["rows"]] == ["created", "created", "duplicate", "duplicate", "error"]
+    # Mot de passe importé correct, mais compte importé inactif : login refusé
+    login = client.post("/v1/users/token", data={"username": "bulk2@example.com", "password": "strongpassword"})
+    assert login.status_code == 401 and login.json()["detail"] == "Inactive user"
+    login = client.post("/v1/users/token", data={"username": "bulk1@example.com", "password": "strongpassword"})
+    assert login.status_code == 200
+
+def test_bulk_create_users_jsonl(client, admin_token):
+    body = '{"email": "jsonl@example.com", "password": "strongpassword"}\n{bad json}\n'
+    resp = client.post("/v1/users/bulk?format=jsonl", content=body, headers={"Authorization": f"Bearer {admin_token}"})
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    assert resp.json()["created"] == 1
+    assert resp.json()["rows"][1]["detail"] == "Invalid JSON"
+
+def test_bulk_create_users_keeps_multiline_csv_fields(client, admin_token):
+    body = 'email,password\r\nmulti@example.com,"strong\r\npassword"\r\n'
+    resp = client.post("/v1/users/bulk", content=body, headers={"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"})
+    assert resp.json()["created"] == 1
+    login = client.post("/v1/users/token", data={"username": "multi@example.com", "password": "strong\r\npassword"})
+    assert login.status_code == 200, f"Response: {login.status_code}, Body: {login.text}"
+
+def test_bulk_create_users_is_capped(client, admin_token, monkeypatch):
+    from core.config import get_settings
+    monkeypatch.setattr(get_settings(), "BULK_IMPORT_MAX_ROWS", 2)
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"}
+    body = "email,password\n" + "".join(f"cap{i}@example.com,strongpassword\n" for i in range(3))
+    resp = client.post("/v1/users/bulk", content=body, headers=headers)
+    assert resp.status_code == 413, f"Response: {resp.status_code}, Body: {resp.text}"
+    # Rien n'a été importé
+    assert client.post("/v1/users/token", data={"username": "cap0@example.com", "password": "strongpassword"}).status_code == 401
+    monkeypatch.setattr(get_settings(), "BULK_IMPORT_MAX_BYTES", 32)
+    assert client.post("/v1/users/bulk", content=body, headers=headers).status_code == 413
+
+def test_bulk_insert_reports_only_conflicting_rows(db_session):
+    from v1.services import user_import
+    candidates, _ = user_import.parse_rows(
+        ["email,password\n"] + [f"race{i}@example.com,strongpassword\n" for i in range(3)], "csv"
+    )
+    # Email inséré par une autre requête entre `filter_new` et l'insertion
+    user_import.insert_rows(db_session, candidates[1:2], ["hash"])
+    rows = user_import.insert_rows(db_session, candidates, ["hash"] * 3, batch_size=3)
+    assert [row.status for row in rows] == ["created", "duplicate", "created"]
+    assert rows[0].id is not None and rows[2].id is not None
+
+def test_user_cannot_bulk_create_users(client, user_token):
+    resp = client.post("/v1/users/bulk", content="email,password\n", headers={"Authorization": f"Bearer {user_token}", "Content-Type": "text/csv"})
+    assert resp.status_code == 403, f"Response: {resp.status_code}, Body: {resp.text}"
+
+def test_metrics_endpoint(client, user_token):
+    client.get("/v1/users/1", headers={"Authorization": f"Bearer {user_token}"})
+    resp = client.get("/metrics")
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    body = resp.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/v1/users/{user_id}",status="200"}' in body
+    assert 'http_request_db_queries_count{route="/v1/users/{user_id}"}' in body
+    assert 'password_hashing_seconds_count{operation="verify"}' in body
+    sums = [line for line in body.splitlines() if line.startswith('http_request_db_queries_sum{route="/v1/users/{user_id}"}')]
+    assert float(sums[0].split()[-1]) >= 1
+
+def test_login_rate_limited_per_account(client, user_data, monkeypatch):
+    from core.config import get_settings
+    monkeypatch.setattr(get_settings(), "LOGIN_RATE_LIMIT_ACCOUNT", 2)
+    client.post("/v1/users/", json=user_data)
+    for _ in range(2):
+        resp = client.post("/v1/users/token", data={"username": user_data["email"], "password": "wrong"})
+        assert resp.status_code == 401, f"Response: {resp.status_code}, Body: {resp.text}"
+    resp = client.post("/v1/users/token", data={"username": user_data["email"], "password": user_data["password"]})
+    assert resp.status_code == 429, f"Response: {resp.status_code}, Body: {resp.text}"
+    assert int(resp.headers["Retry-After"]) >= 1
+
+def test_signup_rate_limited_per_ip(client, monkeypatch):
+    from core.config import get_settings
+    monkeypatch.setattr(get_settings(), "SIGNUP_RATE_LIMIT_IP", 1)
+    resp = client.post("/v1/users/", json={"email": "first@example.com", "password": "strongpassword"})
+    assert resp.status_code == 201, f"Response: {resp.status_code}, Body: {resp.text}"
+    resp = client.post("/v1/users/", json={"email": "second@example.com", "password": "strongpassword"})
+    assert resp.status_code == 429, f"Response: {resp.status_code}, Body: {resp.text}"
+
+def test_claims_only_authorization(client, admin_data, monkeypatch):
+    from core import security
+    from core.config import get_settings
+    monkeypatch.setattr(get_settings(), "AUTH_TRUST_TOKEN_CLAIMS", True)
+    client.post("/v1/users/", json=admin_data)
+    token = client.post("/v1/users/token", data={"username": admin_data["email"], "password": admin_data["password"]}).json()["access_token"]
+
+    def no_lookup(db, user_id):
+        raise AssertionError("claims-only mode must not load the current user")
+    monkeypatch.setattr(security, "_load_user", no_lookup)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/v1/users/", headers=headers).status_code == 200
+    # Toute modification de l'utilisateur invalide les tokens déjà émis
+    resp = client.patch("/v1/users/1", json={"role": "user"}, headers=headers)
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    resp = client.get("/v1/users/", headers=headers)
+    assert resp.status_code == 401, f"Response: {resp.status_code}, Body: {resp.text}"
+
+def test_fast_serialization_is_byte_compatible(client, admin_token, monkeypatch):
+    from core.config import get_settings
+    for i in range(3):
+        client.post("/v1/users/", json={"email": f"fast{i}@example.com", "password": "strongpassword"})
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    slow_list = client.get("/v1/users/?limit=3", headers=headers)
+    slow_user = client.get("/v1/users/2", headers=headers)
+    monkeypatch.setattr(get_settings(), "FAST_SERIALIZATION", True)
+    fast_list = client.get("/v1/users/?limit=3", headers=headers)
+    fast_user = client.get("/v1/users/2", headers=headers)
+    assert fast_list.content == slow_list.content
+    assert fast_list.headers["X-Next-Cursor"] == slow_list.headers["X-Next-Cursor"]
+    assert fast_user.content == slow_user.content
+    assert client.get("/v1/users/9999", headers=headers).status_code == 404
+
+def test_update_and_delete_unknown_user(client, admin_token, user_data):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert client.patch("/v1/users/9999", json={"is_active": False}, headers=headers).status_code == 404
+    assert client.delete("/v1/users/9999", headers=headers).status_code == 404
+    client.post("/v1/users/", json=user_data)
+    resp = client.patch("/v1/users/1", json={"email": user_data["email"]}, headers=headers)
+    assert resp.status_code == 400, f"Response: {resp.status_code}, Body: {resp.text}"
+    assert resp.json()["detail"] == "Email already registered"
+
+def test_batch_update_users(client, admin_token, user_token):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    ids = [client.post("/v1/users/", json={"email": f"batch{i}@example.com", "password": "strongpassword"}).json()["id"] for i in range(3)]
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    body = {"users": [
+        {"id": ids[0], "is_active": False},
+        {"id": ids[1], "is_active": False, "email": "renamed@example.com"},
+        {"id": ids[2], "role": "admin", "password": "newstrongpassword"},
+        {"id": 9999, "is_active": False},
+    ]}
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        resp = client.patch("/v1/users/batch", json=body, headers=headers)
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    result = resp.json()
+    assert result["not_found"] == [9999]
+    assert [(u["id"], u["email"], u["is_active"], u["role"]) for u in result["updated"]] == [
+        (ids[0], "batch0@example.com", False, "user"),
+        (ids[1], "renamed@example.com", False, "user"),
+        (ids[2], "batch2@example.com", True, "admin"),
+    ]
+    # Une seule requête d'écriture pour tout le lot
+    assert sum(s.lstrip().upper().startswith("UPDATE USERS") for s in statements) == 1
+    assert client.post("/v1/users/token", data={"username": "batch2@example.com", "password": "newstrongpassword"}).status_code == 200
+
+    # Doublon d'email : tout le lot est annulé
+    resp = client.patch("/v1/users/batch", json={"users": [{"id": ids[0], "is_active": True}, {"id": ids[2], "email": "renamed@example.com"}]}, headers=headers)
+    assert resp.status_code == 400, f"Response: {resp.status_code}, Body: {resp.text}"
+    assert client.get(f"/v1/users/{ids[0]}", headers=headers).json()["is_active"] is False
+    resp = client.patch("/v1/users/batch", json={"users": [{"id": ids[0]}, {"id": ids[0], "role": "admin"}]}, headers=headers)
+    assert resp.status_code == 422
+    assert client.patch("/v1/users/batch", json=body, headers={"Authorization": f"Bearer {user_token}"}).status_code == 403
+
+def test_user_reads_are_conditional(client, admin_token, user_data, monkeypatch):
+    from core.config import get_settings
+    client.post("/v1/users/", json=user_data)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for fast in (False, True):
+        monkeypatch.setattr(get_settings(), "FAST_SERIALIZATION", fast)
+        resp = client.get("/v1/users/2", headers=headers)
+        etag = resp.headers["ETag"]
+        assert etag.startswith('W/"') and resp.headers["Cache-Control"] == "private, no-cache"
+        resp = client.get("/v1/users/2", headers={**headers, "If-None-Match": etag.removeprefix("W/")})
+        assert resp.status_code == 304 and resp.content == b"" and resp.headers["ETag"] == etag
+        resp = client.get("/v1/users/2", headers={**headers, "If-Modified-Since": resp.headers["Last-Modified"]})
+        assert resp.status_code == 304
+        page = client.get("/v1/users/?limit=1", headers=headers)
+        resp = client.get("/v1/users/?limit=1", headers={**headers, "If-None-Match": page.headers["ETag"]})
+        assert resp.status_code == 304 and resp.headers["X-Next-Cursor"] == page.headers["X-Next-Cursor"]
+
+    # Toute modification (unitaire ou en lot) change l'ETag de l'utilisateur et de la page
+    page_etag = client.get("/v1/users/", headers=headers).headers["ETag"]
+    client.patch("/v1/users/batch", json={"users": [{"id": 2, "is_active": False}]}, headers=headers)
+    resp = client.get("/v1/users/2", headers={**headers, "If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag and resp.json()["is_active"] is False
+    assert client.get("/v1/users/", headers={**headers, "If-None-Match": page_etag}).status_code == 200
+
+def test_login_rehashes_outdated_password(client, user_data, db_session):
+    from sqlalchemy import select
+    from core.security import TEST_ARGON2_PROFILE, Argon2Profile, use_password_profile
+    from v1.models.user import User
+    client.post("/v1/users/", json=user_data)
+    stored = select(User.hashed_password, User.updated_at).where(User.email == user_data["email"])
+    old_hash, updated_at = db_session.execute(stored).one()
+    assert "t=1" in old_hash
+    # Profil recalibré : le hash est refait au login suivant, sans changer updated_at (ni l'ETag)
+    use_password_profile(Argon2Profile(time_cost=2, memory_cost=8, parallelism=1))
+    try:
+        resp = client.post("/v1/users/token", data={"username": user_data["email"], "password": user_data["password"]})
+        assert resp.status_code == 200
+        new_hash, new_updated_at = db_session.execute(stored).one()
+        assert "t=2" in new_hash and new_updated_at == updated_at
+        assert client.post("/v1/users/token", data={"username": user_data["email"], "password": user_data["password"]}).status_code == 200
+    finally:
+        use_password_profile(TEST_ARGON2_PROFILE)
+
+def _login(client, data):
+    resp = client.post("/v1/users/token", data={"username": data["email"], "password": data["password"]})
+    assert resp.status_code == 200, f"Response: {resp.status_code}, Body: {resp.text}"
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+def test_logout_revokes_only_current_token(client, user_data):
+    client.post("/v1/users/", json=user_data)
+    first, second = _login(client, user_data), _login(client, user_data)
+    assert client.get("/v1/users/1", headers=first).status_code == 200
+    assert client.post("/v1/users/logout", headers=first).status_code == 204
+    resp = client.get("/v1/users/1", headers=first)
+    assert resp.status_code == 401 and resp.json()["detail"] == "Token revoked"
+    assert client.get("/v1/users/1", headers=second).status_code == 200
+
+def test_admin_revokes_all_sessions(client, admin_token, user_data):
+    user_id = client.post("/v1/users/", json=user_data).json()["id"]
+    sessions = [_login(client, user_data), _login(client, user_data)]
+    assert client.delete(f"/v1/users/{user_id}/sessions", headers=sessions[0]).status_code == 403
+    assert client.delete(f"/v1/users/{user_id}/sessions", headers={"Authorization": f"Bearer {admin_token}"}).status_code == 204
+    assert all(client.get("/v1/users/1", headers=headers).status_code == 401 for headers in sessions)
+    # Les tokens émis après la coupure restent valides
+    assert client.get("/v1/users/1", headers=_login(client, user_data)).status_code == 200
+    assert client.delete("/v1/users/9999/sessions", headers={"Authorization": f"Bearer {admin_token}"}).status_code == 404
+
+def test_logout_with_claims_only_authorization(client, user_data, monkeypatch):
+    from core.config import get_settings
+    monkeypatch.setattr(get_settings(), "AUTH_TRUST_TOKEN_CLAIMS", True)
+    client.post("/v1/users/", json=user_data)
+    headers = _login(client, user_data)
+    assert client.post("/v1/users/logout", headers=headers).status_code == 204
+    assert client.get("/v1/users/1", headers=headers).status_code == 401
+
+def test_deactivated_user_is_rejected(client, admin_token, user_data):
+    user_id = client.post("/v1/users/", json=user_data).json()["id"]
+    headers = _login(client, user_data)
+    assert client.get("/v1/users/1", headers=headers).status_code == 200
+    assert client.patch(f"/v1/users/{user_id}", json={"is_active": False}, headers={"Authorization": f"Bearer {admin_token}"}).status_code == 200
+    resp = client.get("/v1/users/1", headers=headers)
+    assert resp.status_code == 401 and resp.json()["detail"] == "Inactive user"
+    resp = client.post("/v1/users/token", data={"username": user_data["email"], "password": user_data["password"]})
+    assert resp.status_code == 401
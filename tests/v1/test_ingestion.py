@@ -0,0 +1,98 @@
+import json
+
+from sqlalchemy import select
+
+from v1.crud import document as document_crud
+from v1.models.document import Chunk, Document
+from v1.services import ingestion
+
+
+def write_jsonl(path, documents):
+    path.write_text("".join(json.dumps(d, ensure_ascii=False) + "\n" for d in documents), encoding="utf-8")
+    return str(path)
+
+
+CIVIL = {
+    "code": "Code civil", "title": "Code civil", "source": "legi:civil", "published_at": "2016-10-01",
+    "articles": [
+        {"article_number": "1240", "heading": "Responsabilité", "text": "Tout fait quelconque de l'homme, qui cause à autrui un dommage,  oblige celui par la faute duquel il est arrivé à le réparer."},
+        {"article_number": "1241", "text": "Chacun est responsable du dommage qu'il a causé."},
+    ],
+}
+TRAVAIL = {
+    "code": "Code du travail", "title": "Code du travail", "source": "legi:travail",
+    "text": "Partie législative\n\nArticle L1231-1 : Rupture\nLe contrat de travail peut être rompu.\nArticle L1231-2\nLes dispositions s'appliquent.",
+}
+
+
+def test_clean_and_chunk():
+    assert ingestion.clean_text(" Le preneur­  est\r\n\r\n\r\n  tenu :\x00 ") == "Le preneur est\n\ntenu :"
+    articles = ingestion.split_articles("Préambule\nArticle 1er\nPremier.\nArt. L. 121-1 - Intitulé\nSecond.")
+    assert [(a["article_number"], a["heading"], a["text"]) for a in articles] == [
+        (None, None, "Préambule"), ("1er", None, "Premier."), ("L. 121-1", "Intitulé", "Second."),
+    ]
+    text = "\n\n".join(" ".join(["Le bailleur est obligé de délivrer la chose."] * 8) for _ in range(5))
+    fragments = ingestion.split_long(text, 200)
+    assert len(fragments) > 1 and max(map(len, fragments)) <= 200
+    assert " ".join(" ".join(fragments).split()) == " ".join(text.split())
+
+
+def test_text_files_are_split_line_by_line(tmp_path):
+    body = "Préambule\nArticle\u00a01er\nPremier.\n\nSuite.\nArt. L. 121-1 - Intitulé\nSecond.\nArticle 2\n"
+    (tmp_path / "loi.txt").write_text("\n  Loi test\n" + body, encoding="utf-8")
+    (raw,) = ingestion.parse_text(str(tmp_path / "loi.txt"))
+    assert raw.title == "Loi test" and raw.text is None
+    # Même découpage que sur le texte entier, mais sans jamais le charger d'un bloc
+    processed = ingestion.process_document(raw)
+    expected = ingestion.split_articles(ingestion.clean_text(body))
+    assert [(c["article_number"], c["heading"], c["text"]) for c in processed.chunks] == [
+        (a["article_number"], a["heading"], a["text"]) for a in expected
+    ]
+
+
+def test_ingest_formats_and_rejections(tmp_path, db_session):
+    jsonl = write_jsonl(tmp_path / "dump.jsonl", [CIVIL, TRAVAIL])
+    with open(jsonl, "a", encoding="utf-8") as f:
+        f.write("{not json\n")
+        f.write(json.dumps({"code": "Code civil", "articles": []}) + "\n")
+    (tmp_path / "xml").mkdir()
+    (tmp_path / "xml" / "conso.xml").write_text(
+        '<corpus><document code="Code de la consommation" title="Code de la consommation" published_at="2016-07-01">'
+        '<article number="L. 221-18" heading="Rétractation">Le consommateur dispose d\'un délai de quatorze jours.</article>'
+        "</document></corpus>",
+        encoding="utf-8",
+    )
+    (tmp_path / "xml" / "bail.txt").write_text("Loi du 6 juillet 1989\nArticle 7\nLe locataire est obligé de payer le loyer.", encoding="utf-8")
+
+    report = ingestion.ingest(db_session, [jsonl, str(tmp_path / "xml")], default_code="Loi")
+    assert (report.read, report.inserted, report.rejected) == (6, 4, 2)
+    assert [error.detail for error in report.errors] == ["Invalid JSON", "title is required"]
+    assert report.stages["parse"].items == 6 and report.stages["write"].items == 4
+
+    documents = {d.source: d for d in db_session.execute(select(Document).execution_options(allow_full_scan=True)).scalars()}
+    assert set(documents) == {"legi:civil", "legi:travail", "Code de la consommation / Code de la consommation", str(tmp_path / "xml" / "bail.txt")}
+    assert all(len(d.content_hash) == 64 for d in documents.values())
+    travail = documents["legi:travail"]
+    assert [(c.article_number, c.heading) for c in travail.chunks] == [(None, None), ("L1231-1", "Rupture"), ("L1231-2", None)]
+    assert documents["legi:civil"].chunks[0].text.startswith("Tout fait quelconque de l'homme, qui cause à autrui un dommage, oblige")
+    # Les articles ingérés sont indexés en plein texte (triggers FTS5)
+    hits = document_crud.search_chunks(db_session, document_crud.build_match_query("quatorze jours"))
+    assert [hit.article_number for hit in hits] == ["L. 221-18"]
+
+
+def test_reingestion_is_incremental(tmp_path, db_session):
+    path = write_jsonl(tmp_path / "dump.jsonl", [CIVIL, TRAVAIL])
+    assert ingestion.ingest(db_session, [path]).inserted == 2
+    civil_id, = db_session.execute(select(Document.id).where(Document.source == "legi:civil")).scalars()
+
+    report = ingestion.ingest(db_session, [path], workers=2, batch_size=1)
+    assert (report.inserted, report.updated, report.unchanged, report.chunks) == (0, 0, 2, 0)
+
+    changed = {**CIVIL, "articles": CIVIL["articles"][:1]}
+    path = write_jsonl(tmp_path / "dump.jsonl", [changed, TRAVAIL])
+    report = ingestion.ingest(db_session, [path], workers=2)
+    assert (report.inserted, report.updated, report.unchanged, report.chunks) == (0, 1, 1, 1)
+    db_session.expire_all()
+    # Même document (id conservé), articles remplacés
+    assert db_session.execute(select(Chunk.article_number).where(Chunk.document_id == civil_id)).scalars().all() == ["1240"]
+    assert db_session.query(Document).execution_options(allow_full_scan=True).count() == 2
@@ -0,0 +1,85 @@
+import json
+import shutil
+
+import pytest
+
+from core.database import get_database
+from core.config import get_settings
+from core.embeddings import get_embedder
+from core.vector_index import get_vector_index
+from tests.conftest import auth_headers
+from v1.crud import document as document_crud
+from v1.services import ingestion
+
+
+@pytest.fixture(autouse=True)
+def empty_index():
+    # La base est recréée à chaque test : l'index de vecteurs aussi
+    get_vector_index.cache_clear()
+    shutil.rmtree(get_settings().VECTOR_INDEX_DIR, ignore_errors=True)
+    yield
+    get_vector_index.cache_clear()
+
+
+def test_sync_then_retrieve(client, admin_token, corpus):
+    resp = client.post("/v1/retrieve/sync", headers=auth_headers(admin_token))
+    assert resp.status_code == 200
+    assert resp.json() == {"added": 4, "updated": 0, "removed": 0, "indexed": 4}
+    assert client.post("/v1/retrieve/sync", headers=auth_headers(admin_token)).json()["added"] == 0
+
+    resp = client.post("/v1/retrieve", json={"query": "payer le prix du bail", "k": 1}, headers=auth_headers(admin_token))
+    assert resp.status_code == 200
+    hits = resp.json()
+    assert [hit["article_number"] for hit in hits] == ["1728"]
+    assert hits[0]["text"].startswith("Le preneur")
+
+
+def test_sync_removes_deleted_chunks(client, admin_token, corpus):
+    client.post("/v1/retrieve/sync", headers=auth_headers(admin_token))
+    with get_database().SessionLocal() as db:
+        document_crud.delete_document(db, document_crud.get_document(db, corpus["civil"]))
+    # Vecteurs encore dans l'index, mais articles ignorés puisqu'absents de la base
+    hits = client.post("/v1/retrieve", json={"query": "bail"}, headers=auth_headers(admin_token)).json()
+    assert [hit["article_number"] for hit in hits] == ["L1231-1"]
+    assert client.post("/v1/retrieve/sync", headers=auth_headers(admin_token)).json() == {"added": 0, "updated": 0, "removed": 3, "indexed": 1}
+
+
+def test_sync_reembeds_reingested_text(client, admin_token, tmp_path):
+    def ingest(text):
+        path = tmp_path / "bail.jsonl"
+        path.write_text(json.dumps({
+            "code": "Code civil", "title": "Code civil", "source": "legi:bail",
+            "articles": [{"article_number": "1728", "text": text}],
+        }) + "\n", encoding="utf-8")
+        with get_database().SessionLocal() as db:
+            ingestion.ingest(db, [str(path)])
+
+    ingest("Le preneur est tenu de payer le prix du bail aux termes convenus.")
+    assert client.post("/v1/retrieve/sync", headers=auth_headers(admin_token)).json()["added"] == 1
+    # Articles remplacés : SQLite redonne le même id (le plus élevé) au nouveau texte
+    new_text = "Le bailleur est obligé de délivrer au preneur la chose louée en bon état."
+    ingest(new_text)
+    resp = client.post("/v1/retrieve/sync", headers=auth_headers(admin_token))
+    assert resp.json() == {"added": 0, "updated": 1, "removed": 0, "indexed": 1}
+    hits = client.post("/v1/retrieve", json={"query": "délivrer la chose louée", "k": 1}, headers=auth_headers(admin_token)).json()
+    assert hits[0]["text"] == new_text
+    # Score calculé sur le vecteur du nouveau texte, pas sur celui de l'ancien
+    query, expected = get_embedder().embed(["délivrer la chose louée", new_text])
+    assert hits[0]["score"] == pytest.approx(float(query @ expected), abs=1e-3)
+
+
+def test_sync_reembeds_text_edited_in_place(client, admin_token, corpus):
+    client.post("/v1/retrieve/sync", headers=auth_headers(admin_token))
+    with get_database().SessionLocal() as db:
+        chunk = document_crud.get_document(db, corpus["civil"]).chunks[2]
+        chunk.text = "Le bailleur doit entretenir la chose louée."
+        db.commit()
+    assert client.post("/v1/retrieve/sync", headers=auth_headers(admin_token)).json()["updated"] == 1
+    hits = client.post("/v1/retrieve", json={"query": "entretenir la chose louée", "k": 1}, headers=auth_headers(admin_token)).json()
+    assert hits[0]["text"] == "Le bailleur doit entretenir la chose louée."
+
+
+def test_retrieve_requires_auth_and_sync_requires_admin(client, user_token):
+    assert client.post("/v1/retrieve", json={"query": "bail"}).status_code == 401
+    assert client.post("/v1/retrieve/sync", headers=auth_headers(user_token)).status_code == 403
+    assert client.post("/v1/retrieve", json={"query": "bail", "k": 0}, headers=auth_headers(user_token)).status_code == 422
@@ -0,0 +1,76 @@
+from core.database import get_database
+from tests.conftest import auth_headers
+from v1.crud import document as document_crud
+
+
+def test_search_ranks_and_highlights(client, user_token, corpus):
+    resp = client.get("/v1/search", params={"q": "dommage"}, headers=auth_headers(user_token))
+    assert resp.status_code == 200
+    hits = resp.json()
+    assert {hit["article_number"] for hit in hits} == {"1240", "1241"}
+    assert all("<mark>dommage</mark>" in hit["snippet"] for hit in hits)
+    assert hits[0]["score"] <= hits[1]["score"]
+    assert hits[0]["code"] == "Code civil"
+
+
+def test_snippet_escapes_corpus_text(client, user_token):
+    with get_database().SessionLocal() as db:
+        document_crud.create_document(db, "Code test", "Code test", [
+            {"article_number": "1", "heading": None, "text": "Clause <script>alert(1)</script> & pénalité si a < b."},
+        ])
+    resp = client.get("/v1/search", params={"q": "pénalité"}, headers=auth_headers(user_token))
+    (hit,) = resp.json()
+    assert hit["snippet"] == "Clause &lt;script&gt;alert(1)&lt;/script&gt; &amp; <mark>pénalité</mark> si a &lt; b."
+    resp = client.get("/v1/search", params={"q": "pénalité", "code": "Code test"}, headers=auth_headers(user_token))
+    assert resp.json()[0]["snippet"] == hit["snippet"]
+
+
+def test_search_ignores_accents_and_fts_syntax(client, user_token, corpus):
+    resp = client.get("/v1/search", params={"q": 'responsabilite" OR NEAR(*'}, headers=auth_headers(user_token))
+    assert resp.status_code == 200
+    assert resp.json() == []
+    resp = client.get("/v1/search", params={"q": "responsabilite"}, headers=auth_headers(user_token))
+    assert [hit["article_number"] for hit in resp.json()] == ["1240"]
+
+
+def test_search_filters(client, user_token, corpus):
+    params = {"q": "contrat dommage", "match": "any"}
+    assert len(client.get("/v1/search", params=params, headers=auth_headers(user_token)).json()) == 3
+    hits = client.get("/v1/search", params={**params, "code": "Code du travail"}, headers=auth_headers(user_token)).json()
+    assert [hit["article_number"] for hit in hits] == ["L1231-1"]
+    hits = client.get("/v1/search", params={**params, "article": "1241"}, headers=auth_headers(user_token)).json()
+    assert [hit["article_number"] for hit in hits] == ["1241"]
+    hits = client.get("/v1/search", params={**params, "date_to": "2010-01-01"}, headers=auth_headers(user_token)).json()
+    assert [hit["code"] for hit in hits] == ["Code du travail"]
+    hits = client.get("/v1/search", params={**params, "date_from": "2010-01-01"}, headers=auth_headers(user_token)).json()
+    assert {hit["code"] for hit in hits} == {"Code civil"}
+
+
+def test_search_cursor_pagination(client, user_token, corpus):
+    params = {"q": "contrat dommage", "match": "any", "limit": 2}
+    first = client.get("/v1/search", params=params, headers=auth_headers(user_token))
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/v1/search", params={**params, "cursor": cursor}, headers=auth_headers(user_token))
+    assert "X-Next-Cursor" not in second.headers
+    ids = [hit["chunk_id"] for hit in first.json() + second.json()]
+    assert len(ids) == len(set(ids)) == 3
+
+
+def test_search_index_follows_updates_and_deletes(client, user_token, corpus):
+    with get_database().SessionLocal() as db:
+        document = document_crud.get_document(db, corpus["travail"])
+        document.chunks[0].text = "Le licenciement doit reposer sur une cause réelle et sérieuse."
+        db.commit()
+    hits = client.get("/v1/search", params={"q": "licenciement"}, headers=auth_headers(user_token)).json()
+    assert [hit["article_number"] for hit in hits] == ["L1231-1"]
+    assert client.get("/v1/search", params={"q": "indéterminée"}, headers=auth_headers(user_token)).json() == []
+
+    with get_database().SessionLocal() as db:
+        document_crud.delete_document(db, document_crud.get_document(db, corpus["civil"]))
+    assert client.get("/v1/search", params={"q": "dommage"}, headers=auth_headers(user_token)).json() == []
+
+
+def test_search_requires_auth_and_valid_cursor(client, user_token):
+    assert client.get("/v1/search", params={"q": "dommage"}).status_code == 401
+    resp = client.get("/v1/search", params={"q": "dommage", "cursor": "not-a-cursor"}, headers=auth_headers(user_token))
+    assert resp.status_code == 400
@@ -1,5 +1,13 @@
 from fastapi import APIRouter
+from v1.endpoints.chat import router as chat_router
+from v1.endpoints.conversation import router as conversation_router
 from v1.endpoints.endpoint import router as user_router
+from v1.endpoints.retrieve import router as retrieve_router
+from v1.endpoints.search import router as search_router
 
 api_router = APIRouter()
-api_router.include_router(user_router)
\ No newline at end of file
+api_router.include_router(user_router)
+api_router.include_router(search_router)
+api_router.include_router(retrieve_router)
+api_router.include_router(chat_router)
+api_router.include_router(conversation_router)
@@ -0,0 +1,94 @@
+# Accès base de données pour le cache persistant des réponses du chat (v1)
+
+from typing import Optional
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from v1.models.answer_cache import CachedAnswer
+from v1.models.document import CorpusState
+
+_UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def get_corpus_version(db: Session) -> int:
+    return db.execute(select(CorpusState.version).where(CorpusState.id == 1)).scalar() or 0
+
+def get_answer(db: Session, key: str, corpus_version: int, not_before: float, now: float):
+    """Réponse encore valable pour `key` (même version du corpus, créée après `not_before`), ou None."""
+    row = db.execute(
+        select(CachedAnswer.answer, CachedAnswer.sources, CachedAnswer.embedding, CachedAnswer.created_at).where(
+            CachedAnswer.key == key,
+            CachedAnswer.corpus_version == corpus_version,
+            CachedAnswer.created_at >= not_before,
+        )
+    ).first()
+    if row is not None:
+        db.execute(update(CachedAnswer).where(CachedAnswer.key == key).values(last_used_at=now))
+        db.commit()
+    return row
+
+def put_answer(
+    db: Session,
+    key: str,
+    answer: str,
+    sources: str,
+    embedding: Optional[bytes],
+    corpus_version: int,
+    now: float,
+) -> None:
+    values = dict(
+        key=key, answer=answer, sources=sources, embedding=embedding,
+        corpus_version=corpus_version, created_at=now, last_used_at=now,
+    )
+    upsert = _UPSERTS.get(db.get_bind().dialect.name)
+    if upsert is not None:
+        # Deux workers qui génèrent la même réponse : la dernière écriture l'emporte, sans conflit
+        statement = upsert(CachedAnswer).values(**values)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[CachedAnswer.key],
+            set_={name: statement.excluded[name] for name in values if name != "key"},
+        ))
+        db.commit()
+        return
+    # Autres bases : remplacement dans une transaction ; une insertion concurrente sur la même clé
+    # est ignorée (simple écriture de cache, la réponse a déjà été envoyée)
+    try:
+        db.execute(delete(CachedAnswer).where(CachedAnswer.key == key))
+        db.add(CachedAnswer(**values))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+def delete_stale(db: Session, corpus_version: int, not_before: float) -> int:
+    """Supprime les réponses d'une autre version du corpus ou expirées."""
+    # Une fois par changement de version du corpus, quand presque toutes les lignes sont périmées
+    result = db.execute(delete(CachedAnswer).where(
+        or_(CachedAnswer.corpus_version != corpus_version, CachedAnswer.created_at < not_before)
+    ).execution_options(allow_full_scan=True))
+    db.commit()
+    return result.rowcount
+
+def prune(db: Session, max_rows: int) -> int:
+    """Ne garde que les `max_rows` réponses utilisées le plus récemment (LRU, à égalité près)."""
+    # Parcours de l'index last_used_at arrêté après `max_rows` entrées, puis suppression par plage d'index
+    cutoff = db.execute(
+        select(CachedAnswer.last_used_at).order_by(CachedAnswer.last_used_at.desc()).offset(max_rows).limit(1)
+        .execution_options(allow_full_scan=True)
+    ).scalar()
+    if cutoff is None:
+        return 0
+    result = db.execute(delete(CachedAnswer).where(CachedAnswer.last_used_at <= cutoff))
+    db.commit()
+    return result.rowcount
+
+def count_answers(db: Session) -> int:
+    return db.execute(select(func.count()).select_from(CachedAnswer).execution_options(allow_full_scan=True)).scalar()
+
+def clear_answers(db: Session) -> int:
+    result = db.execute(delete(CachedAnswer))
+    db.commit()
+    return result.rowcount
+
+def bump_corpus_version(db: Session) -> None:
+    db.execute(update(CorpusState).where(CorpusState.id == 1).values(version=CorpusState.version + 1))
+    db.commit()
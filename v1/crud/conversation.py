@@ -0,0 +1,146 @@
+# Accès base de données pour les conversations et leurs messages (v1)
+
+import datetime
+import zlib
+from datetime import timezone
+from typing import List, NamedTuple, Optional, Tuple
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from v1.models.conversation import Conversation, Message
+
+# Au-delà, le texte complet est stocké compressé dans `body` et `preview` n'en garde que le début
+PREVIEW_CHARS = 500
+TITLE_CHARS = 80
+
+CONVERSATION_COLUMNS = (
+    Conversation.id, Conversation.title, Conversation.message_count, Conversation.created_at, Conversation.updated_at,
+)
+# Colonnes des listes de messages : jamais `body`
+MESSAGE_SUMMARY_COLUMNS = (Message.id, Message.role, Message.length, Message.token_count, Message.created_at, Message.preview)
+
+class HistoryMessage(NamedTuple):
+    role: str
+    content: str
+
+def estimate_tokens(text: str) -> int:
+    """Ordre de grandeur sans tokenizer : ~4 caractères par token pour du français (BPE)."""
+    return len(text) // 4 + 1
+
+def encode_body(text: str) -> Tuple[str, Optional[bytes]]:
+    """(preview, body) : `body` n'existe que pour un texte plus long que `PREVIEW_CHARS`."""
+    if len(text) <= PREVIEW_CHARS:
+        return text, None
+    return text[:PREVIEW_CHARS], zlib.compress(text.encode("utf-8"))
+
+def decode_body(preview: str, body: Optional[bytes]) -> str:
+    return preview if body is None else zlib.decompress(body).decode("utf-8")
+
+def create_conversation(db: Session, user_id: int, title: Optional[str] = None):
+    row = db.execute(insert(Conversation).values(user_id=user_id, title=title).returning(*CONVERSATION_COLUMNS)).one()
+    db.commit()
+    return row
+
+def get_conversation(db: Session, conversation_id: int, user_id: int):
+    """La conversation si elle appartient à `user_id`, sinon None (même réponse qu'une conversation inexistante)."""
+    return db.execute(
+        select(*CONVERSATION_COLUMNS).where(Conversation.id == conversation_id, Conversation.user_id == user_id)
+    ).first()
+
+def list_conversations(db: Session, user_id: int, after: Optional[Tuple[datetime.datetime, int]] = None, limit: int = 20) -> list:
+    """
+    Conversations de `user_id`, plus récemment modifiées d'abord. `after`
+    (updated_at, id) de la dernière ligne de la page précédente : pagination
+    par clé sur l'index (user_id, updated_at).
+    """
+    statement = (
+        select(*CONVERSATION_COLUMNS)
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        updated_at, conversation_id = after
+        statement = statement.where(or_(
+            Conversation.updated_at < updated_at,
+            and_(Conversation.updated_at == updated_at, Conversation.id < conversation_id),
+        ))
+    return db.execute(statement).all()
+
+def delete_conversation(db: Session, conversation_id: int, user_id: int) -> bool:
+    deleted = db.execute(
+        delete(Conversation).where(Conversation.id == conversation_id, Conversation.user_id == user_id)
+    ).rowcount
+    if deleted:
+        db.execute(delete(Message).where(Message.conversation_id == conversation_id))
+    db.commit()
+    return bool(deleted)
+
+def delete_user_conversations(db: Session, user_id: int) -> None:
+    """Sans commit : appelée dans la transaction de suppression de l'utilisateur (pas de cascade SQLite)."""
+    conversations = select(Conversation.id).where(Conversation.user_id == user_id).scalar_subquery()
+    db.execute(delete(Message).where(Message.conversation_id.in_(conversations)))
+    db.execute(delete(Conversation).where(Conversation.user_id == user_id))
+
+def add_message(db: Session, conversation_id: int, role: str, content: str):
+    """Ajoute le message et avance `updated_at` / `message_count` dans la même transaction."""
+    preview, body = encode_body(content)
+    now = datetime.datetime.now(timezone.utc)
+    row = db.execute(
+        insert(Message).values(
+            conversation_id=conversation_id, role=role, length=len(content), token_count=estimate_tokens(content),
+            created_at=now, preview=preview, body=body,
+        ).returning(*MESSAGE_SUMMARY_COLUMNS)
+    ).one()
+    values = {"updated_at": now, "message_count": Conversation.message_count + 1}
+    if role == "user":
+        # Titre par défaut : début de la première question
+        values["title"] = func.coalesce(Conversation.title, " ".join(content.split())[:TITLE_CHARS])
+    db.execute(update(Conversation).where(Conversation.id == conversation_id).values(**values))
+    db.commit()
+    return row
+
+def list_messages(db: Session, conversation_id: int, before_id: Optional[int] = None, limit: int = 50) -> list:
+    """Messages du plus récent au plus ancien, sans leur texte complet (index (conversation_id, id))."""
+    statement = (
+        select(*MESSAGE_SUMMARY_COLUMNS)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.id.desc())
+        .limit(limit)
+    )
+    if before_id is not None:
+        statement = statement.where(Message.id < before_id)
+    return db.execute(statement).all()
+
+def get_message(db: Session, conversation_id: int, message_id: int) -> Optional[dict]:
+    row = db.execute(
+        select(*MESSAGE_SUMMARY_COLUMNS, Message.body).where(Message.id == message_id, Message.conversation_id == conversation_id)
+    ).first()
+    if row is None:
+        return None
+    return {**row._asdict(), "content": decode_body(row.preview, row.body)}
+
+def load_recent_messages(db: Session, conversation_id: int, max_messages: int, max_tokens: int) -> List[HistoryMessage]:
+    """
+    Historique pour le prompt : les derniers messages, au plus `max_messages`
+    et `max_tokens` (estimés), dans l'ordre chronologique. Le fil n'est lu
+    qu'à rebours jusqu'à la limite, et seuls les textes retenus sont lus.
+    """
+    if max_messages <= 0 or max_tokens <= 0:
+        return []
+    rows = db.execute(
+        select(Message.id, Message.token_count)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.id.desc())
+        .limit(max_messages)
+    )
+    ids: List[int] = []
+    budget = max_tokens
+    for row in rows:
+        if row.token_count > budget:
+            break
+        budget -= row.token_count
+        ids.append(row.id)
+    if not ids:
+        return []
+    texts = db.execute(select(Message.role, Message.preview, Message.body).where(Message.id.in_(ids)).order_by(Message.id))
+    return [HistoryMessage(row.role, decode_body(row.preview, row.body)) for row in texts]
@@ -0,0 +1,161 @@
+# Accès base de données pour le corpus juridique et ses recherches plein texte et sémantique (v1)
+
+import html
+import re
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.orm import Session
+from v1.models.document import Chunk, Document, embedding_text, text_digest
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+# Marqueurs posés par snippet() : caractères de contrôle, retirés du texte à l'ingestion (voir clean_text).
+# Le texte est échappé pour HTML avant de les remplacer par les balises : rien du corpus n'est interprété
+_SNIPPET_START_MARKER = "\x02"
+_SNIPPET_END_MARKER = "\x03"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+class SearchRow(NamedTuple):
+    chunk_id: int
+    document_id: int
+    code: str
+    title: str
+    article_number: Optional[str]
+    heading: Optional[str]
+    published_at: Optional[date]
+    snippet: str
+    score: float
+
+def create_document(
+    db: Session,
+    code: str,
+    title: str,
+    chunks: Iterable[dict],
+    source: Optional[str] = None,
+    published_at: Optional[date] = None,
+) -> Document:
+    """`chunks` : dicts `text`, `heading`, `article_number` ; la position suit l'ordre donné."""
+    document = Document(code=code, title=title, source=source, published_at=published_at)
+    document.chunks = [Chunk(position=position, **chunk) for position, chunk in enumerate(chunks)]
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+    return document
+
+def get_document(db: Session, document_id: int) -> Optional[Document]:
+    return db.query(Document).filter(Document.id == document_id).first()
+
+def delete_document(db: Session, document: Document) -> None:
+    # Les articles suivent (cascade ORM) ; les triggers les retirent de l'index FTS
+    db.delete(document)
+    db.commit()
+
+def render_snippet(raw: str) -> str:
+    """Extrait FTS5 -> HTML : `<`, `>`, `&` du texte échappés, termes trouvés entourés de `<mark>`."""
+    escaped = html.escape(raw, quote=False)
+    return escaped.replace(_SNIPPET_START_MARKER, SNIPPET_START).replace(_SNIPPET_END_MARKER, SNIPPET_END)
+
+def _with_snippet(row, **extra) -> SearchRow:
+    values = {**row._asdict(), **extra}
+    values["snippet"] = render_snippet(values["snippet"])
+    return SearchRow(**values)
+
+def build_match_query(query: str, match: str = "all") -> Optional[str]:
+    """
+    Texte libre -> expression MATCH FTS5. Chaque mot est mis entre guillemets :
+    la syntaxe FTS5 (NEAR, *, ^, colonnes...) saisie par l'utilisateur n'est
+    jamais interprétée. `all` = tous les mots, `any` = au moins un.
+    """
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    return (" OR " if match == "any" else " ").join(f'"{token}"' for token in tokens)
+
+_HIT_COLUMNS = (
+    "c.id AS chunk_id, c.document_id, d.code, d.title, c.article_number, c.heading, d.published_at, "
+    "snippet(chunks_fts, 1, :start, :end, '…', :tokens) AS snippet"
+)
+_HIT_FROM = "FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid JOIN documents d ON d.id = c.document_id"
+_AFTER = "(chunks_fts.rank > :after_score OR (chunks_fts.rank = :after_score AND chunks_fts.rowid > :after_id))"
+
+def search_chunks(
+    db: Session,
+    match_query: str,
+    code: Optional[str] = None,
+    article_number: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    after: Optional[Tuple[float, int]] = None,
+    limit: int = 10,
+    snippet_tokens: int = 16,
+) -> List:
+    """
+    Articles correspondant à `match_query`, triés par BM25 puis id. `after`
+    (score, id) de la dernière ligne de la page précédente : pagination par
+    clé, sans OFFSET.
+    """
+    params = {"match": match_query, "limit": limit, "start": _SNIPPET_START_MARKER, "end": _SNIPPET_END_MARKER, "tokens": snippet_tokens}
+    clauses = ["chunks_fts MATCH :match"]
+    if after is not None:
+        clauses.append(_AFTER)
+        params["after_score"], params["after_id"] = after
+    filters = []
+    if code is not None:
+        filters.append("d.code = :code")
+        params["code"] = code
+    if article_number is not None:
+        filters.append("c.article_number = :article_number")
+        params["article_number"] = article_number
+    if date_from is not None:
+        filters.append("d.published_at >= :date_from")
+        params["date_from"] = date_from.isoformat()
+    if date_to is not None:
+        filters.append("d.published_at <= :date_to")
+        params["date_to"] = date_to.isoformat()
+
+    if filters:
+        # Les filtres portent sur chunks / documents : jointure sur toutes les correspondances
+        statement = text(
+            f"SELECT {_HIT_COLUMNS}, chunks_fts.rank AS score {_HIT_FROM} "
+            f"WHERE {' AND '.join(clauses + filters)} ORDER BY chunks_fts.rank, c.id LIMIT :limit"
+        ).columns(published_at=Document.published_at.type)
+        return [_with_snippet(row) for row in db.execute(statement, params)]
+
+    # Sans filtre : top-k dans l'index seul (pas de jointure par correspondance, ~2x plus
+    # rapide sur un terme fréquent), puis colonnes et extraits de ces k lignes uniquement.
+    # Le score n'est pas recalculé : BM25 relit les listes complètes de chaque terme.
+    top = db.execute(
+        text(f"SELECT chunks_fts.rowid AS id, chunks_fts.rank AS score FROM chunks_fts WHERE {' AND '.join(clauses)} "
+             "ORDER BY chunks_fts.rank, chunks_fts.rowid LIMIT :limit"),
+        params,
+    ).all()
+    if not top:
+        return []
+    statement = text(
+        f"SELECT {_HIT_COLUMNS} {_HIT_FROM} WHERE chunks_fts MATCH :match AND chunks_fts.rowid IN :ids"
+    ).bindparams(bindparam("ids", expanding=True)).columns(published_at=Document.published_at.type)
+    rows = {row.chunk_id: row for row in db.execute(statement, {**params, "ids": [hit.id for hit in top]})}
+    return [_with_snippet(rows[hit.id], score=hit.score) for hit in top if hit.id in rows]
+
+# --- Recherche sémantique : lectures pour l'index de vecteurs ---
+
+def list_chunk_digests(db: Session) -> List[Tuple[int, Optional[int]]]:
+    """(id, empreinte du texte) de tous les articles, volontairement : synchronisation de l'index de vecteurs."""
+    statement = select(Chunk.id, Chunk.text_digest).order_by(Chunk.id).execution_options(allow_full_scan=True)
+    return [tuple(row) for row in db.execute(statement)]
+
+def get_chunk_texts(db: Session, ids: List[int]) -> List[Tuple[int, str, int]]:
+    """(id, texte à plonger, empreinte) : l'empreinte est recalculée sur le texte lu, celui qui sera plongé."""
+    rows = db.execute(select(Chunk.id, Chunk.heading, Chunk.text).where(Chunk.id.in_(ids)).order_by(Chunk.id))
+    return [(row.id, embedding_text(row.heading, row.text), text_digest(row.heading, row.text)) for row in rows]
+
+def get_chunk_hits(db: Session, ids: List[int]) -> dict:
+    """Colonnes d'affichage des articles `ids`, indexées par id (l'ordre vient de l'index de vecteurs)."""
+    rows = db.execute(
+        select(
+            Chunk.id.label("chunk_id"), Chunk.document_id, Document.code, Document.title,
+            Chunk.article_number, Chunk.heading, Document.published_at, Chunk.text,
+        ).join(Document, Document.id == Chunk.document_id).where(Chunk.id.in_(ids))
+    )
+    return {row.chunk_id: row for row in rows}
@@ -0,0 +1,33 @@
+# Accès base de données pour les révocations de tokens (v1)
+
+import time
+from typing import Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from v1.models.revocation import TokenRevocation
+
+def add_revocation(db: Session, user_id: int, jti: Optional[str], revoked_at: float, expires_at: float) -> int:
+    row_id = db.execute(
+        insert(TokenRevocation)
+        .values(user_id=user_id, jti=jti, revoked_at=revoked_at, expires_at=expires_at, created_at=time.time())
+        .returning(TokenRevocation.id)
+    ).scalar_one()
+    db.commit()
+    return row_id
+
+def revocations_since(db: Session, since: float) -> list:
+    """Révocations insérées depuis `since` (plage de l'index created_at : seulement les lignes récentes)."""
+    return db.execute(
+        select(
+            TokenRevocation.user_id, TokenRevocation.jti, TokenRevocation.revoked_at,
+            TokenRevocation.expires_at, TokenRevocation.created_at,
+        )
+        .where(TokenRevocation.created_at >= since)
+        .order_by(TokenRevocation.created_at)
+    ).all()
+
+def prune_revocations(db: Session, now: float) -> int:
+    """Supprime les révocations dont tous les tokens visés ont expiré."""
+    result = db.execute(delete(TokenRevocation).where(TokenRevocation.expires_at <= now))
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,143 @@
+# Accès base de données pour les utilisateurs (v1)
+
+from typing import Dict, List, Optional
+from sqlalchemy import Select, case, delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from v1.models.user import User
+from v1.schemas.user import UserRead, UserUpdate
+from core.serialization import model_columns
+from core.user_cache import get_user_cache
+from v1.crud.conversation import delete_user_conversations
+
+# Colonnes de UserRead : lecture sans construire d'instances ORM (voir FAST_SERIALIZATION)
+USER_READ_COLUMNS = model_columns(UserRead, User)
+# Lectures servies avec un ETag : `updated_at` en plus (ignoré par serialize_user_read)
+USER_ROW_COLUMNS = [*USER_READ_COLUMNS, User.updated_at]
+
+def get_user(db: Session, user_id: int) -> Optional[User]:
+    return db.query(User).filter(User.id == user_id).first()
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+def list_users(db: Session, skip: int = 0, limit: int = 10) -> List[User]:
+    # Pagination par OFFSET : parcours de `skip + limit` lignes (voir list_users_after)
+    return db.query(User).order_by(User.id).offset(skip).limit(limit).execution_options(allow_full_scan=True).all()
+
+def list_users_after(db: Session, after_id: Optional[int], limit: int = 10) -> List[User]:
+    """Pagination par clé : `WHERE id > :after_id ORDER BY id`, coût constant quelle que soit la page."""
+    query = db.query(User)
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    return query.order_by(User.id).limit(limit).all()
+
+def get_user_row(db: Session, user_id: int):
+    return db.execute(select(*USER_ROW_COLUMNS).where(User.id == user_id)).first()
+
+def list_user_rows(db: Session, skip: int = 0, after_id: Optional[int] = None, limit: int = 10) -> list:
+    """Équivalent colonnes seules de `list_users` / `list_users_after`."""
+    statement = select(*USER_ROW_COLUMNS).order_by(User.id).limit(limit)
+    if after_id is not None:
+        statement = statement.where(User.id > after_id)
+    else:
+        statement = statement.offset(skip).execution_options(allow_full_scan=True)
+    return db.execute(statement).all()
+
+def export_statement(batch_size: int = 1000) -> Select:
+    """Colonnes seules (pas d'instances ORM), lues par lots via un curseur serveur."""
+    return (
+        select(User.id, User.email, User.is_active, User.role, User.created_at)
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size, allow_full_scan=True)
+    )
+
+def admin_exists(db: Session) -> bool:
+    return db.query(User).filter(User.role == "admin").first() is not None
+
+def create_user(db: Session, email: str, hashed_password: str, role: str = "user") -> User:
+    new_user = User(email=email, hashed_password=hashed_password, is_active=True, role=role)
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user
+
+def update_values(user_update: UserUpdate, hashed_password: Optional[str] = None) -> dict:
+    """Colonnes à modifier : champs fournis, mot de passe déjà haché (voir core.hashing)."""
+    values = user_update.dict(exclude_none=True, exclude={"password"})
+    if hashed_password is not None:
+        values["hashed_password"] = hashed_password
+    return values
+
+def _write(db: Session, statement) -> list:
+    """Exécute une écriture `... RETURNING` et valide la transaction (annulée sur doublon d'email)."""
+    try:
+        rows = db.execute(statement.execution_options(synchronize_session=False)).all()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    cache = get_user_cache()
+    for row in rows:
+        cache.invalidate(row.id)
+    return rows
+
+def update_user(db: Session, user_id: int, values: dict):
+    """
+    Un seul `UPDATE users SET ... WHERE id = ? RETURNING ...` : ni lecture
+    préalable ni `refresh`. Retourne la ligne modifiée, None si l'utilisateur
+    n'existe pas. IntegrityError si le nouvel email est déjà pris.
+    """
+    if not values:
+        return get_user_row(db, user_id)
+    rows = _write(db, update(User).where(User.id == user_id).values(**values).returning(*USER_READ_COLUMNS))
+    return rows[0] if rows else None
+
+def _batch_value(column, values_by_id: Dict[int, object], size: int):
+    """Valeur commune à tout le lot, sinon `CASE id WHEN ... THEN ... ELSE colonne END`."""
+    distinct = set(values_by_id.values())
+    if len(values_by_id) == size and len(distinct) == 1:
+        return distinct.pop()
+    return case(values_by_id, value=User.id, else_=column)
+
+def batch_update_users(db: Session, changes: Dict[int, dict]) -> list:
+    """
+    Applique `changes` (id -> colonnes à modifier) en une seule requête
+    `UPDATE users SET col = CASE id ... END WHERE id IN (...) RETURNING ...`,
+    donc en une transaction : un doublon d'email annule tout le lot.
+    Retourne les lignes modifiées triées par id (les ids inconnus n'y sont pas).
+    """
+    columns: Dict[str, Dict[int, object]] = {}
+    for user_id, values in changes.items():
+        for name, value in values.items():
+            columns.setdefault(name, {})[user_id] = value
+    ids = list(changes)
+    if not columns:
+        return db.execute(select(*USER_READ_COLUMNS).where(User.id.in_(ids)).order_by(User.id)).all()
+    statement = (
+        update(User)
+        .where(User.id.in_(ids))
+        .values({name: _batch_value(getattr(User, name), values, len(ids)) for name, values in columns.items()})
+        .returning(*USER_READ_COLUMNS)
+    )
+    return sorted(_write(db, statement), key=lambda row: row.id)
+
+def replace_password_hash(db: Session, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """
+    Mise à jour du hash après recalibrage d'Argon2 : seulement si le mot de passe
+    n'a pas changé entre-temps. Rien de visible ne change : ni `updated_at`, ni
+    version de l'utilisateur (les tokens déjà émis restent valides).
+    """
+    result = db.execute(
+        update(User)
+        .where(User.id == user_id, User.hashed_password == old_hash)
+        .values(hashed_password=new_hash, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def delete_user(db: Session, user_id: int) -> bool:
+    """`DELETE ... RETURNING id` avec les conversations, dans une transaction. False si l'utilisateur n'existe pas."""
+    delete_user_conversations(db, user_id)
+    return bool(_write(db, delete(User).where(User.id == user_id).returning(User.id)))
@@ -0,0 +1,171 @@
+import time
+from contextlib import aclosing
+from typing import AsyncIterator
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.security import OAuth2PasswordBearer
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from core.chat_model import get_chat_model
+from core.config import get_settings
+from core.database import db_session, get_db, run_db
+from core.security import get_current_user_async, require_role
+from core.streaming import EventSourceResponse, get_stream_limiter, sse_event
+from v1.crud import answer_cache as answer_cache_crud
+from v1.crud import conversation as conversation_crud
+from v1.schemas.chat import AnswerCacheStats, ChatRequest
+
+# Service du chat et cache des réponses (numpy) importés au premier appel d'une route : `create_app` reste léger
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/users/token")
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+def _context_k(body: ChatRequest) -> int:
+    return body.k if body.k is not None else get_settings().CHAT_CONTEXT_K
+
+async def _owns_conversation(db, body: ChatRequest, user_id: int) -> bool:
+    if body.conversation_id is None:
+        return True
+    return await run_db(db, conversation_crud.get_conversation, body.conversation_id, user_id) is not None
+
+async def _encode_sse(events) -> AsyncIterator[bytes]:
+    async with aclosing(events):
+        async for name, data in events:
+            yield sse_event(name, data)
+
+@router.post(
+    "",
+    response_class=EventSourceResponse,
+    summary="Poser une question (réponse en flux SSE)",
+    description=(
+        "Répond en Server-Sent Events : un évènement `sources` (articles utilisés comme contexte), "
+        "un évènement `token` par token généré, puis `done` (ou `error`). Le nombre de flux simultanés "
+        "par utilisateur est limité (429 au-delà). Auth requis."
+    ),
+)
+async def chat(body: ChatRequest, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    from v1.services import chat as chat_service
+
+    started = time.perf_counter()
+    user = await get_current_user_async(token, db)
+    if not await _owns_conversation(db, body, user.id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    settings = get_settings()
+    limiter = get_stream_limiter()
+    if not limiter.acquire(user.id, settings.CHAT_MAX_STREAMS_PER_USER):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many concurrent streams",
+            headers={"Retry-After": "1"},
+        )
+    stats = chat_service.ChatStats(started)
+    try:
+        events = await chat_service.open_answer(db, get_chat_model(), body.message, _context_k(body), stats, body.conversation_id)
+    except BaseException:
+        limiter.release(user.id)
+        raise
+    chat_service.stream_opened()
+
+    def on_close(outcome: str):
+        limiter.release(user.id)
+        chat_service.stream_closed(stats, "sse", outcome)
+
+    return EventSourceResponse(
+        _encode_sse(events),
+        buffer=settings.CHAT_STREAM_BUFFER,
+        send_timeout=settings.CHAT_SEND_TIMEOUT,
+        ping_interval=settings.CHAT_PING_INTERVAL,
+        on_close=on_close,
+    )
+
+@router.websocket("/ws")
+async def chat_ws(websocket: WebSocket, token: str = Query(..., description="Token JWT (pas d'en-tête Authorization en WebSocket)")):
+    """
+    Même flux que `POST /v1/chat` sur une connexion persistante : le client
+    envoie `{"message": ..., "k": ...}`, le serveur répond par des messages
+    `{"event": ..., "data": ...}`. Plusieurs questions par connexion.
+    """
+    from v1.services import chat as chat_service
+
+    try:
+        async with db_session() as db:
+            user = await get_current_user_async(token, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    settings = get_settings()
+    limiter = get_stream_limiter()
+    try:
+        while True:
+            try:
+                body = ChatRequest.parse_obj(await websocket.receive_json())
+            except (ValidationError, ValueError):
+                await websocket.send_json({"event": "error", "data": {"detail": "Invalid message"}})
+                continue
+            started = time.perf_counter()
+            if body.conversation_id is not None:
+                async with db_session() as db:
+                    owned = await _owns_conversation(db, body, user.id)
+                if not owned:
+                    await websocket.send_json({"event": "error", "data": {"detail": "Conversation not found"}})
+                    continue
+            if not limiter.acquire(user.id, settings.CHAT_MAX_STREAMS_PER_USER):
+                await websocket.send_json({"event": "error", "data": {"detail": "Too many concurrent streams"}})
+                continue
+            stats = chat_service.ChatStats(started)
+            chat_service.stream_opened()
+            outcome = "completed"
+            try:
+                async with db_session() as db:
+                    events = await chat_service.open_answer(db, get_chat_model(), body.message, _context_k(body), stats, body.conversation_id)
+                async with aclosing(events):
+                    async for name, data in events:
+                        # send_json attend que le message parte : la génération suit le rythme du client
+                        with anyio.fail_after(settings.CHAT_SEND_TIMEOUT):
+                            await websocket.send_json({"event": name, "data": data})
+            except TimeoutError:
+                outcome = "slow_client"
+                return
+            except WebSocketDisconnect:
+                outcome = "disconnected"
+                raise
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                limiter.release(user.id)
+                chat_service.stream_closed(stats, "websocket", outcome)
+    except WebSocketDisconnect:
+        return
+
+@router.get(
+    "/cache",
+    response_model=AnswerCacheStats,
+    summary="Statistiques du cache des réponses (admin seulement)",
+    description=(
+        "Succès par niveau (mémoire, persistant, quasi-doublon), échecs, évictions et invalidations "
+        "du worker qui répond, et taille de la table persistante. Auth admin requis."
+    ),
+)
+async def answer_cache_stats(db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+    from v1.services.answer_cache import get_answer_cache
+
+    cache = get_answer_cache()
+    if cache is None:
+        return AnswerCacheStats(enabled=False)
+    persistent_size = await run_db(db, answer_cache_crud.count_answers) if cache.persistent else None
+    return AnswerCacheStats(enabled=True, persistent_size=persistent_size, **cache.snapshot())
+
+@router.delete(
+    "/cache",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Vider le cache des réponses (admin seulement)",
+    description="Invalide toutes les réponses en cache, dans tous les workers. Auth admin requis.",
+)
+async def clear_answer_cache(db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+    from v1.services.answer_cache import get_answer_cache
+
+    cache = get_answer_cache()
+    if cache is not None:
+        await cache.invalidate(db)
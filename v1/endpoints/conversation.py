@@ -0,0 +1,145 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+from core.database import get_db, run_db
+from core.pagination import decode_cursor, encode_cursor
+from core.security import get_current_user_async
+from v1.crud import conversation as conversation_crud
+from v1.schemas.conversation import ConversationCreate, ConversationRead, MessageCreate, MessageRead, MessageSummary
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/users/token")
+
+router = APIRouter(prefix="/conversations", tags=["conversations"])
+
+def _decode_conversation_cursor(cursor: str):
+    values = decode_cursor(cursor)
+    try:
+        updated_at = datetime.fromisoformat(values.get("updated_at"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    conversation_id = values.get("id")
+    if not isinstance(conversation_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return updated_at, conversation_id
+
+def _message_summary(row) -> MessageSummary:
+    return MessageSummary(**row._asdict(), truncated=row.length > len(row.preview))
+
+async def _own_conversation(db: Session, token: str, conversation_id: int):
+    user = await get_current_user_async(token, db)
+    conversation = await run_db(db, conversation_crud.get_conversation, conversation_id, user.id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+@router.post(
+    "",
+    response_model=ConversationRead,
+    status_code=status.HTTP_201_CREATED,
+    summary="Créer une conversation",
+    description="Crée une conversation vide pour l'utilisateur connecté. Auth requis.",
+)
+async def create_conversation(body: ConversationCreate, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    user = await get_current_user_async(token, db)
+    return await run_db(db, conversation_crud.create_conversation, user.id, body.title)
+
+@router.get(
+    "",
+    response_model=List[ConversationRead],
+    summary="Lister ses conversations",
+    description=(
+        "Conversations de l'utilisateur connecté, de la plus récemment active à la plus ancienne, "
+        "sans leurs messages. Quand la page est pleine, l'en-tête `X-Next-Cursor` contient le curseur "
+        "de la page suivante. Auth requis."
+    ),
+)
+async def list_conversations(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100, description="Nombre maximum de conversations (max 100)"),
+    cursor: Optional[str] = Query(None, description="Curseur opaque issu de `X-Next-Cursor`"),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    user = await get_current_user_async(token, db)
+    after = _decode_conversation_cursor(cursor) if cursor is not None else None
+    conversations = await run_db(db, conversation_crud.list_conversations, user.id, after, limit)
+    if len(conversations) == limit:
+        last = conversations[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor({"updated_at": last.updated_at.isoformat(), "id": last.id})
+    return conversations
+
+@router.get(
+    "/{conversation_id}",
+    response_model=ConversationRead,
+    summary="Lire une conversation",
+    description="Métadonnées d'une conversation de l'utilisateur connecté (404 si elle ne lui appartient pas). Auth requis.",
+)
+async def get_conversation(conversation_id: int, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    return await _own_conversation(db, token, conversation_id)
+
+@router.delete(
+    "/{conversation_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Supprimer une conversation",
+    description="Supprime une conversation de l'utilisateur connecté et tous ses messages. Auth requis.",
+)
+async def delete_conversation(conversation_id: int, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    user = await get_current_user_async(token, db)
+    if not await run_db(db, conversation_crud.delete_conversation, conversation_id, user.id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+@router.post(
+    "/{conversation_id}/messages",
+    response_model=MessageRead,
+    status_code=status.HTTP_201_CREATED,
+    summary="Ajouter un message",
+    description="Ajoute un message à une conversation de l'utilisateur connecté. Auth requis.",
+)
+async def add_message(conversation_id: int, body: MessageCreate, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    await _own_conversation(db, token, conversation_id)
+    row = await run_db(db, conversation_crud.add_message, conversation_id, body.role, body.content)
+    return MessageRead(**row._asdict(), content=body.content)
+
+@router.get(
+    "/{conversation_id}/messages",
+    response_model=List[MessageSummary],
+    summary="Lister les messages d'une conversation",
+    description=(
+        "Messages du plus récent au plus ancien, avec le début de leur texte seulement (`truncated` "
+        "indique un texte plus long, à lire via `GET .../messages/{message_id}`). Quand la page est "
+        "pleine, l'en-tête `X-Next-Cursor` contient le curseur des messages plus anciens. Auth requis."
+    ),
+)
+async def list_messages(
+    conversation_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Nombre maximum de messages (max 200)"),
+    cursor: Optional[str] = Query(None, description="Curseur opaque issu de `X-Next-Cursor`"),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    await _own_conversation(db, token, conversation_id)
+    before_id = None
+    if cursor is not None:
+        before_id = decode_cursor(cursor).get("id")
+        if not isinstance(before_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    messages = await run_db(db, conversation_crud.list_messages, conversation_id, before_id, limit)
+    if len(messages) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor({"id": messages[-1].id})
+    return [_message_summary(row) for row in messages]
+
+@router.get(
+    "/{conversation_id}/messages/{message_id}",
+    response_model=MessageRead,
+    summary="Lire un message complet",
+    description="Texte complet d'un message (décompressé si besoin). Auth requis.",
+)
+async def get_message(conversation_id: int, message_id: int, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    await _own_conversation(db, token, conversation_id)
+    message = await run_db(db, conversation_crud.get_message, conversation_id, message_id)
+    if message is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return message
@@ -1,40 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from v1.models.user import User
-from v1.schemas.user import UserCreate, UserRead, UserUpdate
-from core.database import get_db
-from core.security import hash_password, verify_password, get_current_user, create_access_token
-from typing import List
+from v1.schemas.user import (
+    UserBatchResult, UserBatchUpdate, UserCreate, UserImportReport, UserRead, UserUpdate, serialize_user_read,
+)
+from v1.crud import user as user_crud
+from core.config import get_settings
+from core.database import db_session, get_db, run_db
+from core.http_cache import is_not_modified, not_modified, row_etag, rows_etag, validator_headers
+from core.pagination import decode_cursor, encode_cursor
+from core.security import get_current_token, get_current_user_async, create_user_access_token, password_needs_rehash
+from core.revocation import revoke_token, revoke_user_sessions
+from core.user_cache import TokenIdentity, UserSnapshot
+from v1.services import user_import
+from v1.services.user_export import EXPORT_MEDIA_TYPES, iter_export_async, iter_export_sync
+from core.rate_limit import get_rate_limiter
+from core.hashing import get_password_hasher, hash_password_async, verify_password_async
+from typing import List, Literal, Optional
+import io
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/users/token")
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+async def _rehash_password(user_id: int, old_hash: str, password: str) -> None:
+    """Après la réponse du login : hash refait avec le profil Argon2 courant."""
+    try:
+        new_hash = await hash_password_async(password)
+    except HTTPException:
+        return  # pool de hachage saturé : ce sera pour le prochain login
+    async with db_session() as db:
+        await run_db(db, user_crud.replace_password_hash, user_id, old_hash, new_hash)
+
 @router.post(
     "/token",
     summary="Obtenir un token JWT",
     description="Authentifie un utilisateur et retourne un token JWT à utiliser dans les endpoints protégés.",
 )
-def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login_for_access_token(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db),
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Avant toute requête SQL ou hachage : une rafale de tentatives ne doit pas occuper les coeurs
+    settings = get_settings()
+    limiter = get_rate_limiter()
+    limiter.check(f"login:ip:{_client_ip(request)}", settings.LOGIN_RATE_LIMIT_IP, settings.LOGIN_RATE_LIMIT_WINDOW)
+    limiter.check(f"login:account:{form_data.username.lower()}", settings.LOGIN_RATE_LIMIT_ACCOUNT, settings.LOGIN_RATE_LIMIT_WINDOW)
+    user = await run_db(db, user_crud.get_user_by_email, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Incorrect email or password")
-    access_token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
+    if user.is_active is False:
+        raise HTTPException(status_code=401, detail="Inactive user")
+    if password_needs_rehash(user.hashed_password):
+        # Profil Argon2 changé (recalibrage) : le second hachage ne retarde pas la réponse
+        background_tasks.add_task(_rehash_password, user.id, user.hashed_password, form_data.password)
+    access_token = create_user_access_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user_optional(request: Request, db: Session = Depends(get_db)):
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Se déconnecter",
+    description=(
+        "Révoque le token utilisé pour cette requête : il est refusé (401) jusqu'à son expiration, "
+        "par tous les workers au plus tard `REVOCATION_SYNC_INTERVAL` secondes après. Auth requis."
+    ),
+)
+async def logout(session: TokenIdentity = Depends(get_current_token), db: Session = Depends(get_db)):
+    await revoke_token(db, session)
+    return None
+
+async def get_current_user_optional(request: Request, db: Session = Depends(get_db)):
     auth: str = request.headers.get("Authorization")
     if auth and auth.startswith("Bearer "):
         token = auth.split(" ", 1)[1]
         try:
-            return get_current_user(token, db)
+            return await get_current_user_async(token, db)
         except Exception:
             return None
     return None
 
+async def _check_user_creation(db: Session, user: UserCreate, request: Request) -> None:
+    if user.role == "admin" and await run_db(db, user_crud.admin_exists):
+        # Des admins existent déjà : seul un admin authentifié peut en créer un autre
+        current_user = await get_current_user_optional(request, db)
+        if not current_user or current_user.role != "admin":
+            raise HTTPException(status_code=403, detail="Seul un admin peut créer un autre admin.")
+    if await run_db(db, user_crud.get_user_by_email, user.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
 @router.post(
     "/",
     response_model=UserRead,
@@ -42,64 +103,219 @@ def get_current_user_optional(request: Request, db: Session = Depends(get_db)):
     summary="Créer un utilisateur",
     description="Crée un nouvel utilisateur avec un email, un mot de passe et un rôle. L'email doit être unique. Seuls les admins peuvent créer des admins."
 )
-def create_user(
+async def create_user(
     user: UserCreate,
     request: Request,
     db: Session = Depends(get_db)
 ):
     """Crée un utilisateur et retourne ses informations publiques. Auth requis pour créer un admin (sauf si aucun admin n'existe)."""
-    if user.role == "admin":
-        admin_exists = db.query(User).filter(User.role == "admin").first()
-        if not admin_exists:
-            # Aucun admin n'existe, autoriser la création sans authentification
-            pass
-        else:
-            current_user = get_current_user_optional(request, db)
-            if not current_user or current_user.role != "admin":
-                raise HTTPException(status_code=403, detail="Seul un admin peut créer un autre admin.")
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    new_user = User(
-        email=user.email,
-        hashed_password=hash_password(user.password),
-        is_active=True,
-        role=user.role or "user"
+    settings = get_settings()
+    get_rate_limiter().check(f"signup:ip:{_client_ip(request)}", settings.SIGNUP_RATE_LIMIT_IP, settings.SIGNUP_RATE_LIMIT_WINDOW)
+    await _check_user_creation(db, user, request)
+    hashed_password = await hash_password_async(user.password)
+    return await run_db(db, user_crud.create_user, user.email, hashed_password, user.role or "user")
+
+@router.post(
+    "/bulk",
+    response_model=UserImportReport,
+    summary="Importer des utilisateurs en masse (admin seulement)",
+    description=(
+        "Crée des utilisateurs à partir d'un corps CSV (colonnes email, password, role, is_active) "
+        "ou JSONL (un objet par ligne). Les mots de passe sont hachés en parallèle, les emails "
+        "vérifiés en une passe et les insertions faites par lots. Retourne un rapport ligne par ligne. "
+        "Au plus `BULK_IMPORT_MAX_ROWS` lignes et `BULK_IMPORT_MAX_BYTES` octets par requête (413 au-delà). Auth admin requis."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_create_users(
+    request: Request,
+    format: Optional[Literal["csv", "jsonl"]] = Query(None, description="Format du corps (déduit du Content-Type si absent)"),
+    batch_size: int = Query(500, ge=1, le=5000, description="Nombre de lignes insérées par lot"),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    await _require_admin(db, token)
+    settings = get_settings()
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+    body = (await _read_body(request, settings.BULK_IMPORT_MAX_BYTES)).decode("utf-8-sig")
+    # Fins de ligne conservées : un champ CSV entre guillemets peut s'étendre sur plusieurs lignes
+    candidates, rejected = user_import.parse_rows(io.StringIO(body, newline=""), fmt)
+    if len(candidates) + len(rejected) > settings.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many rows, at most {settings.BULK_IMPORT_MAX_ROWS} per request",
+        )
+    candidates, duplicates = await run_db(db, user_import.filter_new, candidates)
+    hashed_passwords = await get_password_hasher().hash_many([c.user.password for c in candidates])
+    created = await run_db(db, user_import.insert_rows, candidates, hashed_passwords, batch_size)
+    return user_import.build_report(rejected + duplicates + created)
+
+@router.get(
+    "/export",
+    summary="Exporter tous les utilisateurs (admin seulement)",
+    description="Exporte tous les utilisateurs en flux NDJSON ou CSV, lot par lot, sans charger la table en mémoire. Auth admin requis.",
+    response_class=StreamingResponse,
+)
+async def export_users(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Format d'export : ndjson ou csv"),
+    batch_size: int = Query(1000, ge=1, le=10000, description="Nombre de lignes lues par lot"),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    await _require_admin(db, token)
+    if get_settings().DB_MODE == "async":
+        body = iter_export_async(format, batch_size)
+    else:
+        body = iter_export_sync(format, batch_size)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+
+@router.patch(
+    "/batch",
+    response_model=UserBatchResult,
+    summary="Modifier des utilisateurs en lot (admin seulement)",
+    description=(
+        "Applique jusqu'à 1000 modifications (email, mot de passe, statut, rôle ; "
+        "`{\"id\": 3, \"is_active\": false}` pour une désactivation) en une seule requête SQL "
+        "et une transaction : un email déjà pris annule tout le lot (400). Les ids inconnus sont "
+        "listés dans `not_found`. Auth admin requis."
+    ),
+)
+async def batch_update_users(body: UserBatchUpdate, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    await _require_admin(db, token)
+    with_password = [item for item in body.users if item.password is not None]
+    hashed_passwords = {}
+    if with_password:
+        hashed = await get_password_hasher().hash_many([item.password for item in with_password])
+        hashed_passwords = {item.id: value for item, value in zip(with_password, hashed)}
+    changes = {item.id: user_crud.update_values(item, hashed_passwords.get(item.id)) for item in body.users}
+    try:
+        rows = await run_db(db, user_crud.batch_update_users, changes)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    found = {row.id for row in rows}
+    not_found = [user_id for user_id in sorted(changes) if user_id not in found]
+    if get_settings().FAST_SERIALIZATION:
+        return ORJSONResponse({"updated": [serialize_user_read(row) for row in rows], "not_found": not_found})
+    return UserBatchResult(updated=rows, not_found=not_found)
 
 @router.get(
     "/{user_id}",
     response_model=UserRead,
     summary="Récupérer un utilisateur par ID",
-    description="Retourne les informations publiques d'un utilisateur à partir de son identifiant. Auth requis."
+    description=(
+        "Retourne les informations publiques d'un utilisateur à partir de son identifiant. Auth requis. "
+        "Avec `If-None-Match` (ETag) ou `If-Modified-Since`, 304 sans corps si l'utilisateur n'a pas changé."
+    )
 )
-def get_user(user_id: int, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(token, db)
-    user_obj = db.query(User).filter(User.id == user_id).first()
+async def get_user(
+    user_id: int, request: Request, response: Response, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+):
+    await get_current_user_async(token, db)
+    fast = get_settings().FAST_SERIALIZATION
+    user_obj = await run_db(db, user_crud.get_user_row if fast else user_crud.get_user, user_id)
     if not user_obj:
         raise HTTPException(status_code=404, detail="User not found")
+    etag = row_etag(user_obj.id, user_obj.updated_at)
+    headers = validator_headers(etag, user_obj.updated_at)
+    if is_not_modified(request, etag, user_obj.updated_at):
+        return not_modified(headers)
+    if fast:
+        return ORJSONResponse(serialize_user_read(user_obj), headers=headers)
+    response.headers.update(headers)
     return user_obj
 
 @router.get(
     "/",
     response_model=List[UserRead],
     summary="Lister les utilisateurs (admin seulement)",
-    description="Retourne une liste paginée d'utilisateurs. Auth admin requis."
+    description=(
+        "Retourne une liste paginée d'utilisateurs triée par id. Auth admin requis. "
+        "Quand la page est pleine, l'en-tête `X-Next-Cursor` contient un curseur opaque "
+        "à repasser dans `cursor` pour obtenir la page suivante (coût constant, contrairement à `skip`). "
+        "La réponse porte un ETag faible : avec `If-None-Match`, 304 sans corps si la page n'a pas changé."
+    )
 )
-def list_users(
+async def list_users(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Nombre d'utilisateurs à ignorer (pour la pagination)"),
     limit: int = Query(10, ge=1, le=100, description="Nombre maximum d'utilisateurs à retourner (max 100)"),
+    cursor: Optional[str] = Query(None, description="Curseur opaque issu de `X-Next-Cursor` (prioritaire sur skip)"),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
-    user = get_current_user(token, db)
+    await _require_admin(db, token)
+    after_id = None
+    if cursor is not None:
+        after_id = decode_cursor(cursor).get("id")
+        if not isinstance(after_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    fast = get_settings().FAST_SERIALIZATION
+    if fast:
+        users = await run_db(db, user_crud.list_user_rows, skip, after_id, limit)
+    elif after_id is not None:
+        users = await run_db(db, user_crud.list_users_after, after_id, limit)
+    else:
+        users = await run_db(db, user_crud.list_users, skip, limit)
+    headers = {"X-Next-Cursor": encode_cursor({"id": users[-1].id})} if len(users) == limit else {}
+    etag = rows_etag((user.id, user.updated_at) for user in users)
+    headers.update(validator_headers(etag))
+    if is_not_modified(request, etag):
+        return not_modified(headers)
+    if fast:
+        # Lignes de confiance : pas de validation pydantic ni de jsonable_encoder
+        return ORJSONResponse([serialize_user_read(row) for row in users], headers=headers)
+    response.headers.update(headers)
+    return users
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """Corps de la requête, lu par morceaux ; 413 dès que `max_bytes` est dépassé."""
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body too large, at most {max_bytes} bytes",
+    )
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+async def _require_admin(db: Session, token: str) -> UserSnapshot:
+    user = await get_current_user_async(token, db)
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
-    return db.query(User).offset(skip).limit(limit).all()
+    return user
+
+async def _update_user(db: Session, token: str, user_id: int, user_update: UserUpdate):
+    await _require_admin(db, token)
+    hashed_password = None
+    if user_update.password is not None:
+        hashed_password = await hash_password_async(user_update.password)
+    try:
+        row = await run_db(db, user_crud.update_user, user_id, user_crud.update_values(user_update, hashed_password))
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    if row is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if get_settings().FAST_SERIALIZATION:
+        return ORJSONResponse(serialize_user_read(row))
+    return row
 
 @router.put(
     "/{user_id}",
@@ -107,24 +323,8 @@ def list_users(
     summary="Mettre à jour complètement un utilisateur (admin seulement)",
     description="Remplace toutes les informations d'un utilisateur par les nouvelles valeurs. Auth admin requis."
 )
-def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(token, db)
-    if user.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin only")
-    user_obj = db.query(User).filter(User.id == user_id).first()
-    if not user_obj:
-        raise HTTPException(status_code=404, detail="User not found")
-    if user_update.email is not None:
-        user_obj.email = user_update.email
-    if user_update.password is not None:
-        user_obj.hashed_password = hash_password(user_update.password)
-    if user_update.is_active is not None:
-        user_obj.is_active = user_update.is_active
-    if user_update.role is not None:
-        user_obj.role = user_update.role
-    db.commit()
-    db.refresh(user_obj)
-    return user_obj
+async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    return await _update_user(db, token, user_id, user_update)
 
 @router.patch(
     "/{user_id}",
@@ -132,24 +332,8 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
     summary="Mettre à jour partiellement un utilisateur (admin seulement)",
     description="Met à jour partiellement les informations d'un utilisateur. Seuls les champs fournis sont modifiés. Auth admin requis."
 )
-def partial_update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(token, db)
-    if user.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin only")
-    user_obj = db.query(User).filter(User.id == user_id).first()
-    if not user_obj:
-        raise HTTPException(status_code=404, detail="User not found")
-    if user_update.email is not None:
-        user_obj.email = user_update.email
-    if user_update.password is not None:
-        user_obj.hashed_password = hash_password(user_update.password)
-    if user_update.is_active is not None:
-        user_obj.is_active = user_update.is_active
-    if user_update.role is not None:
-        user_obj.role = user_update.role
-    db.commit()
-    db.refresh(user_obj)
-    return user_obj
+async def partial_update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    return await _update_user(db, token, user_id, user_update)
 
 @router.delete(
     "/{user_id}",
@@ -157,13 +341,24 @@ def partial_update_user(user_id: int, user_update: UserUpdate, db: Session = Dep
     summary="Supprimer un utilisateur (admin seulement)",
     description="Supprime un utilisateur à partir de son identifiant. Auth admin requis."
 )
-def delete_user(user_id: int, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(token, db)
-    if user.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin only")
-    user_obj = db.query(User).filter(User.id == user_id).first()
-    if not user_obj:
+async def delete_user(user_id: int, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    await _require_admin(db, token)
+    if not await run_db(db, user_crud.delete_user, user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    db.delete(user_obj)
-    db.commit()
-    return None
\ No newline at end of file
+    return None
+
+@router.delete(
+    "/{user_id}/sessions",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Révoquer toutes les sessions d'un utilisateur (admin seulement)",
+    description=(
+        "Refuse tous les tokens de l'utilisateur émis jusqu'à maintenant ; il peut se reconnecter "
+        "(désactiver le compte pour l'en empêcher). Auth admin requis."
+    ),
+)
+async def revoke_sessions(user_id: int, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    await _require_admin(db, token)
+    if not await run_db(db, user_crud.get_user_row, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    await revoke_user_sessions(db, user_id)
+    return None
@@ -0,0 +1,47 @@
+from typing import List
+from fastapi import APIRouter, Depends
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+from core.database import get_db
+from core.security import get_current_user_async, require_role
+from v1.schemas.retrieve import RetrieveHit, RetrieveRequest, RetrieveSyncReport
+
+# numpy (plongements, index de vecteurs) n'est importé qu'au premier appel d'une route : `create_app` reste léger
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/users/token")
+
+router = APIRouter(prefix="/retrieve", tags=["retrieve"])
+
+@router.post(
+    "",
+    response_model=List[RetrieveHit],
+    summary="Retrouver les articles proches d'une question",
+    description=(
+        "Recherche sémantique : la question est plongée puis comparée (similarité cosinus) à tous les "
+        "articles de l'index de vecteurs. Retourne les `k` plus proches avec leur texte. Auth requis."
+    ),
+)
+async def retrieve(body: RetrieveRequest, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    from core.embeddings import get_embedder
+    from core.vector_index import get_vector_index
+    from v1.services import retrieval
+
+    await get_current_user_async(token, db)
+    return await retrieval.retrieve(db, get_vector_index(), get_embedder(), body.query, body.k)
+
+@router.post(
+    "/sync",
+    response_model=RetrieveSyncReport,
+    summary="Synchroniser l'index de vecteurs (admin seulement)",
+    description=(
+        "Plonge les articles absents de l'index ou dont le texte a changé, et retire ceux supprimés "
+        "en base, sans reconstruire l'index existant. Auth admin requis."
+    ),
+)
+async def sync(db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+    from core.embeddings import get_embedder
+    from core.vector_index import get_vector_index
+    from v1.services import retrieval
+
+    index = get_vector_index()
+    result = await retrieval.sync_index(db, index, get_embedder())
+    return RetrieveSyncReport(added=result.added, updated=result.updated, removed=result.removed, indexed=len(index))
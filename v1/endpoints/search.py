@@ -0,0 +1,57 @@
+from datetime import date
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+from core.database import get_database, get_db, run_db
+from core.pagination import decode_cursor, encode_cursor
+from core.security import get_current_user_async
+from v1.crud import document as document_crud
+from v1.schemas.search import SearchHit
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/users/token")
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+def _decode_search_cursor(cursor: str):
+    values = decode_cursor(cursor)
+    score, chunk_id = values.get("score"), values.get("id")
+    if not isinstance(score, (int, float)) or not isinstance(chunk_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return float(score), chunk_id
+
+@router.get(
+    "",
+    response_model=List[SearchHit],
+    summary="Rechercher dans le corpus juridique",
+    description=(
+        "Recherche plein texte (SQLite FTS5) dans les articles, classée par BM25, avec un extrait "
+        "où les termes trouvés sont entourés de `<mark>`. Filtres optionnels par code, numéro d'article "
+        "et date de publication. Quand la page est pleine, l'en-tête `X-Next-Cursor` contient le curseur "
+        "de la page suivante. Auth requis."
+    ),
+)
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=256, description="Texte recherché"),
+    match: Literal["all", "any"] = Query("all", description="Tous les mots (all) ou au moins un (any)"),
+    code: Optional[str] = Query(None, description="Code ou texte source (ex: Code civil)"),
+    article: Optional[str] = Query(None, description="Numéro d'article exact (ex: 1240)"),
+    date_from: Optional[date] = Query(None, description="Publié à partir de cette date"),
+    date_to: Optional[date] = Query(None, description="Publié jusqu'à cette date"),
+    limit: int = Query(10, ge=1, le=100, description="Nombre maximum de résultats (max 100)"),
+    cursor: Optional[str] = Query(None, description="Curseur opaque issu de `X-Next-Cursor`"),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    await get_current_user_async(token, db)
+    if get_database().engine.dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="Full-text search requires SQLite FTS5")
+    after = _decode_search_cursor(cursor) if cursor is not None else None
+    match_query = document_crud.build_match_query(q, match)
+    if match_query is None:
+        return []
+    hits = await run_db(db, document_crud.search_chunks, match_query, code, article, date_from, date_to, after, limit)
+    if len(hits) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor({"score": hits[-1].score, "id": hits[-1].chunk_id})
+    return hits
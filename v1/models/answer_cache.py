@@ -0,0 +1,21 @@
+# Modèle du cache persistant des réponses du chat pour v1
+
+from sqlalchemy import Column, Float, Integer, LargeBinary, String, Text
+from core.db_base import Base
+
+class CachedAnswer(Base):
+    """
+    Réponse déjà générée, retrouvée par la clé normalisée de la question.
+    Valable tant que le corpus n'a pas changé (`corpus_version`) et que son
+    âge ne dépasse pas `ANSWER_CACHE_TTL`.
+    """
+    __tablename__ = "answer_cache"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String, nullable=False, unique=True)  # "modèle:k:question normalisée"
+    answer = Column(Text, nullable=False)
+    sources = Column(Text, nullable=False)  # JSON, tel qu'envoyé dans l'évènement `sources`
+    embedding = Column(LargeBinary, nullable=True)  # float32, pour la recherche de quasi-doublons
+    corpus_version = Column(Integer, nullable=False)
+    created_at = Column(Float, nullable=False)  # horodatage Unix (comparaisons de TTL sans conversion)
+    last_used_at = Column(Float, nullable=False, index=True)
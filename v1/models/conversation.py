@@ -0,0 +1,44 @@
+# Modèles des conversations du chat (historique par utilisateur) pour v1
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, LargeBinary, String, Text
+from sqlalchemy.orm import deferred
+from core.db_base import Base
+import datetime
+from datetime import timezone
+
+def _now():
+    return datetime.datetime.now(timezone.utc)
+
+class Conversation(Base):
+    """Fil de discussion d'un utilisateur ; `updated_at` avance à chaque message."""
+    __tablename__ = "conversations"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    title = Column(String, nullable=True)
+    message_count = Column(Integer, nullable=False, default=0)  # tenu à jour à l'écriture : pas de COUNT dans les listes
+    created_at = Column(DateTime, nullable=False, default=_now)
+    updated_at = Column(DateTime, nullable=False, default=_now)
+
+    # Liste des conversations d'un utilisateur, plus récentes d'abord (l'id suit dans l'index SQLite)
+    __table_args__ = (Index("ix_conversations_user_id_updated_at", "user_id", "updated_at"),)
+
+class Message(Base):
+    """
+    Message d'une conversation. `preview` contient le début du texte (tout le
+    texte pour un message court) ; au-delà, le texte complet est dans `body`,
+    compressé (zlib). Les listes ne lisent que `preview`.
+    """
+    __tablename__ = "messages"
+
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+    role = Column(String, nullable=False)  # "user" ou "assistant"
+    length = Column(Integer, nullable=False)  # caractères du texte complet
+    token_count = Column(Integer, nullable=False)  # estimation, pour borner le contexte envoyé au modèle
+    created_at = Column(DateTime, nullable=False, default=_now)
+    preview = Column(Text, nullable=False)
+    # Dernière colonne : SQLite n'a pas à lire ses pages de débordement pour les colonnes précédentes
+    body = deferred(Column(LargeBinary, nullable=True))
+
+    __table_args__ = (Index("ix_messages_conversation_id_id", "conversation_id", "id"),)
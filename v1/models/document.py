@@ -0,0 +1,110 @@
+# Modèles du corpus juridique (documents et articles) pour v1
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, DDL, ForeignKey, Index, Integer, String, Text, event
+from sqlalchemy.orm import relationship
+from core.db_base import Base
+import datetime
+import hashlib
+from datetime import timezone
+from typing import Optional
+
+class Document(Base):
+    """Texte source (code, loi, décret...) découpé en articles (`Chunk`)."""
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True)
+    code = Column(String, nullable=False, index=True)  # ex: "Code civil"
+    title = Column(String, nullable=False)
+    source = Column(String, nullable=True, index=True)  # référence ou URL d'origine, clé de la réingestion
+    published_at = Column(Date, nullable=True, index=True)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 du contenu nettoyé (scripts/ingest.py)
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(timezone.utc))
+
+    chunks = relationship("Chunk", back_populates="document", cascade="all, delete-orphan", order_by="Chunk.position")
+
+def embedding_text(heading: Optional[str], text: str) -> str:
+    """Texte plongé dans l'index de vecteurs : l'intitulé, s'il existe, précède le texte de l'article."""
+    return f"{heading}\n{text}" if heading else text
+
+def text_digest(heading: Optional[str], text: str) -> int:
+    """Empreinte 64 bits (signée, tient dans un BIGINT) du texte plongé."""
+    digest = hashlib.blake2b(embedding_text(heading, text).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+def _default_digest(context) -> int:
+    # Calculée à l'insertion, y compris par `insert(Chunk)` en executemany (ingestion)
+    params = context.get_current_parameters()
+    return text_digest(params.get("heading"), params["text"])
+
+class Chunk(Base):
+    """Unité de recherche : un article (ou un fragment d'article) d'un document."""
+    __tablename__ = "chunks"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    article_number = Column(String, nullable=True, index=True)  # ex: "1240", "L. 121-1"
+    heading = Column(String, nullable=True)
+    text = Column(Text, nullable=False)
+    # Empreinte de `embedding_text` : la synchronisation de l'index de vecteurs replonge l'article
+    # quand elle diffère de celle indexée (un id peut être réattribué par SQLite à un autre texte)
+    text_digest = Column(BigInteger, nullable=True, default=_default_digest)
+
+    document = relationship("Document", back_populates="chunks")
+
+    __table_args__ = (Index("ix_chunks_document_id_position", "document_id", "position"),)
+
+@event.listens_for(Chunk, "before_update")
+def _refresh_digest(mapper, connection, target) -> None:
+    # Texte modifié par l'ORM : l'UPDATE ne porte que les colonnes changées, l'empreinte est recalculée ici
+    target.text_digest = text_digest(target.heading, target.text)
+
+# Index plein texte FTS5 (SQLite) sur `chunks`, tenu à jour par triggers.
+# Table à contenu externe : le texte n'est stocké qu'une fois, dans `chunks`.
+CHUNKS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE chunks_fts USING fts5("
+    "heading, text, content='chunks', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    # Rang BM25 : un terme dans l'intitulé pèse deux fois plus que dans le corps
+    "INSERT INTO chunks_fts(chunks_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)')",
+    "CREATE TRIGGER chunks_fts_ai AFTER INSERT ON chunks BEGIN "
+    "INSERT INTO chunks_fts(rowid, heading, text) VALUES (new.id, new.heading, new.text); END",
+    "CREATE TRIGGER chunks_fts_ad AFTER DELETE ON chunks BEGIN "
+    "INSERT INTO chunks_fts(chunks_fts, rowid, heading, text) VALUES ('delete', old.id, old.heading, old.text); END",
+    "CREATE TRIGGER chunks_fts_au AFTER UPDATE OF heading, text ON chunks BEGIN "
+    "INSERT INTO chunks_fts(chunks_fts, rowid, heading, text) VALUES ('delete', old.id, old.heading, old.text); "
+    "INSERT INTO chunks_fts(rowid, heading, text) VALUES (new.id, new.heading, new.text); END",
+)
+CHUNKS_FTS_DROP = "DROP TABLE IF EXISTS chunks_fts"
+
+# `Base.metadata.create_all` (tests, scripts) crée aussi l'index ; les migrations font de même
+for statement in CHUNKS_FTS_DDL:
+    event.listen(Chunk.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Chunk.__table__, "after_drop", DDL(CHUNKS_FTS_DROP).execute_if(dialect="sqlite"))
+
+class CorpusState(Base):
+    """
+    Ligne unique (id = 1) dont `version` augmente à chaque modification du
+    corpus (triggers SQLite) : les réponses mises en cache avec une version
+    antérieure ne sont plus servies.
+    """
+    __tablename__ = "corpus_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+CORPUS_STATE_INIT = "INSERT INTO corpus_state (id, version) VALUES (1, 0)"
+_BUMP_CORPUS_VERSION = "UPDATE corpus_state SET version = version + 1 WHERE id = 1"
+CORPUS_VERSION_DDL = tuple(
+    f"CREATE TRIGGER {name} AFTER {operation} ON {table} BEGIN {_BUMP_CORPUS_VERSION}; END"
+    for name, operation, table in (
+        ("corpus_version_chunks_ai", "INSERT", "chunks"),
+        ("corpus_version_chunks_ad", "DELETE", "chunks"),
+        ("corpus_version_chunks_au", "UPDATE OF heading, text, article_number", "chunks"),
+        ("corpus_version_documents_au", "UPDATE OF code, title, published_at", "documents"),
+    )
+)
+
+event.listen(CorpusState.__table__, "after_create", DDL(CORPUS_STATE_INIT))
+# Triggers portés par `chunks` (créée après `documents`) ; SQLite ne vérifie `corpus_state` qu'à l'exécution
+for statement in CORPUS_VERSION_DDL:
+    event.listen(Chunk.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
@@ -0,0 +1,21 @@
+# Modèle des révocations de tokens pour v1
+
+from sqlalchemy import Column, Float, Integer, String
+from core.db_base import Base
+
+class TokenRevocation(Base):
+    """
+    Token révoqué (`jti` renseigné : logout) ou toutes les sessions d'un
+    utilisateur émises jusqu'à `revoked_at` (`jti` NULL : coupure par un admin).
+    Chaque worker en garde une copie en mémoire (voir core/revocation.py) ;
+    la ligne ne sert plus après `expires_at`, quand les tokens visés ont expiré.
+    """
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    jti = Column(String(32), nullable=True)
+    revoked_at = Column(Float, nullable=False)  # horodatage Unix, comparé à `iat` sans conversion
+    expires_at = Column(Float, nullable=False, index=True)
+    # Horodatage d'insertion : curseur de synchronisation des workers (les ids peuvent être réutilisés ou visibles dans le désordre)
+    created_at = Column(Float, nullable=False, index=True)
@@ -8,9 +8,11 @@ from datetime import timezone
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)  # clé primaire = rowid SQLite : aucun index séparé
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=lambda: datetime.datetime.now(timezone.utc))
-    role = Column(String, default="user", nullable=False)  # "user" ou "admin"
+    # Avancé à chaque UPDATE (y compris UPDATE ... WHERE id IN) : sert aux ETag / Last-Modified
+    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(timezone.utc), onupdate=lambda: datetime.datetime.now(timezone.utc))
+    role = Column(String, default="user", nullable=False, index=True)  # "user" ou "admin"
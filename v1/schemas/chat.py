@@ -0,0 +1,30 @@
+# Schémas du chat pour v1
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ChatRequest(BaseModel):
+    """
+    Question posée au chatbot ; la réponse est envoyée en flux, token par token.
+    """
+    message: str = Field(..., min_length=1, max_length=4000, description="Question de l'utilisateur.")
+    k: Optional[int] = Field(None, ge=0, le=20, description="Articles de contexte (défaut : CHAT_CONTEXT_K, 0 = aucun).")
+    conversation_id: Optional[int] = Field(None, description="Conversation où enregistrer la question et la réponse ; ses derniers messages servent de contexte.")
+
+class AnswerCacheStats(BaseModel):
+    """
+    Statistiques du cache des réponses : niveau mémoire du worker qui répond, et niveau persistant.
+    """
+    enabled: bool = Field(..., description="Cache activé (ANSWER_CACHE_ENABLED).")
+    memory_hits: int = Field(0, description="Réponses servies par le niveau mémoire.")
+    persistent_hits: int = Field(0, description="Réponses servies par la table answer_cache.")
+    similar_hits: int = Field(0, description="Réponses servies pour une question quasi identique.")
+    misses: int = Field(0, description="Questions sans réponse en cache (réponse générée).")
+    stores: int = Field(0, description="Réponses générées puis mises en cache.")
+    evictions: int = Field(0, description="Réponses retirées du niveau mémoire (LRU).")
+    invalidations: int = Field(0, description="Vidages du niveau mémoire suite à une modification du corpus.")
+    hit_ratio: float = Field(0.0, description="Part des consultations servies par le cache.")
+    size: int = Field(0, description="Réponses dans le niveau mémoire de ce worker.")
+    max_size: int = Field(0, description="Capacité du niveau mémoire.")
+    persistent_size: Optional[int] = Field(None, description="Réponses dans la table answer_cache.")
+    corpus_version: Optional[int] = Field(None, description="Version du corpus vue par ce worker.")
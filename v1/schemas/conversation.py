@@ -0,0 +1,54 @@
+# Schémas des conversations du chat pour v1
+
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from datetime import datetime
+
+class ConversationCreate(BaseModel):
+    """
+    Nouvelle conversation ; sans titre, le début de la première question en tient lieu.
+    """
+    title: Optional[str] = Field(None, max_length=200, description="Titre de la conversation.")
+
+class ConversationRead(BaseModel):
+    """
+    Conversation telle que listée : métadonnées seulement, aucun message.
+    """
+    id: int = Field(..., description="Identifiant de la conversation.")
+    title: Optional[str] = Field(None, description="Titre de la conversation.")
+    message_count: int = Field(..., description="Nombre de messages.")
+    created_at: datetime = Field(..., description="Date de création.")
+    updated_at: datetime = Field(..., description="Date du dernier message.")
+
+    class Config:
+        orm_mode = True
+
+class MessageCreate(BaseModel):
+    """
+    Message ajouté à une conversation.
+    """
+    role: Literal["user", "assistant"] = Field("user", description="Auteur du message (user ou assistant).")
+    content: str = Field(..., min_length=1, max_length=100_000, description="Texte du message.")
+
+class MessageSummary(BaseModel):
+    """
+    Message tel que listé : début du texte seulement (`truncated` si le texte complet est plus long).
+    """
+    id: int = Field(..., description="Identifiant du message.")
+    role: str = Field(..., description="Auteur du message (user ou assistant).")
+    created_at: datetime = Field(..., description="Date d'envoi.")
+    length: int = Field(..., description="Longueur du texte complet (caractères).")
+    token_count: int = Field(..., description="Nombre de tokens estimé.")
+    preview: str = Field(..., description="Début du texte (texte complet si `truncated` est faux).")
+    truncated: bool = Field(..., description="Texte complet disponible via GET /conversations/{id}/messages/{message_id}.")
+
+class MessageRead(BaseModel):
+    """
+    Message complet.
+    """
+    id: int = Field(..., description="Identifiant du message.")
+    role: str = Field(..., description="Auteur du message (user ou assistant).")
+    created_at: datetime = Field(..., description="Date d'envoi.")
+    length: int = Field(..., description="Longueur du texte (caractères).")
+    token_count: int = Field(..., description="Nombre de tokens estimé.")
+    content: str = Field(..., description="Texte du message.")
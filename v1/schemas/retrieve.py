@@ -0,0 +1,38 @@
+# Schémas de recherche sémantique pour v1
+
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import date
+
+class RetrieveRequest(BaseModel):
+    """
+    Question en langage naturel dont on cherche les articles les plus proches.
+    """
+    query: str = Field(..., min_length=1, max_length=2000, description="Texte de la question.")
+    k: int = Field(5, ge=1, le=50, description="Nombre d'articles à retourner (max 50).")
+
+class RetrieveHit(BaseModel):
+    """
+    Article retrouvé par similarité de plongements, avec son texte complet.
+    """
+    chunk_id: int = Field(..., description="Identifiant de l'article.")
+    document_id: int = Field(..., description="Identifiant du document source.")
+    code: str = Field(..., description="Code ou texte source (ex: Code civil).")
+    title: str = Field(..., description="Titre du document source.")
+    article_number: Optional[str] = Field(None, description="Numéro d'article (ex: 1240).")
+    heading: Optional[str] = Field(None, description="Intitulé de l'article.")
+    published_at: Optional[date] = Field(None, description="Date de publication du document.")
+    score: float = Field(..., description="Similarité cosinus (plus grand = plus proche).")
+    text: str = Field(..., description="Texte de l'article.")
+
+    class Config:
+        orm_mode = True
+
+class RetrieveSyncReport(BaseModel):
+    """
+    Bilan d'une synchronisation de l'index de vecteurs avec la base.
+    """
+    added: int = Field(..., description="Articles plongés et ajoutés à l'index.")
+    updated: int = Field(..., description="Articles dont le texte a changé depuis leur indexation, replongés.")
+    removed: int = Field(..., description="Vecteurs retirés (articles supprimés en base).")
+    indexed: int = Field(..., description="Vecteurs présents dans l'index après synchronisation.")
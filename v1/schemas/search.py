@@ -0,0 +1,22 @@
+# Schémas de recherche plein texte pour v1
+
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import date
+
+class SearchHit(BaseModel):
+    """
+    Article trouvé par la recherche plein texte, avec un extrait surligné.
+    """
+    chunk_id: int = Field(..., description="Identifiant de l'article.")
+    document_id: int = Field(..., description="Identifiant du document source.")
+    code: str = Field(..., description="Code ou texte source (ex: Code civil).")
+    title: str = Field(..., description="Titre du document source.")
+    article_number: Optional[str] = Field(None, description="Numéro d'article (ex: 1240).")
+    heading: Optional[str] = Field(None, description="Intitulé de l'article.")
+    published_at: Optional[date] = Field(None, description="Date de publication du document.")
+    score: float = Field(..., description="Score BM25 (plus petit = plus pertinent).")
+    snippet: str = Field(..., description="Extrait du texte en HTML : <, > et & du texte échappés, termes trouvés entourés de <mark>...</mark>.")
+
+    class Config:
+        orm_mode = True
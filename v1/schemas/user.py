@@ -1,8 +1,9 @@
 # Schéma User Pydantic pour v1
 
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Literal
+from pydantic import BaseModel, EmailStr, Field, validator
+from typing import List, Optional, Literal
 from datetime import datetime
+from core.serialization import compile_serializer
 
 class UserBase(BaseModel):
     """
@@ -29,6 +30,9 @@ class UserRead(UserBase):
     class Config:
         orm_mode = True
 
+# Conversion ligne -> dict sans validation, pour les colonnes lues en base (voir FAST_SERIALIZATION)
+serialize_user_read = compile_serializer(UserRead)
+
 class UserUpdate(BaseModel):
     """
     Schéma utilisé pour la mise à jour complète (PUT) ou partielle (PATCH) d'un utilisateur.
@@ -38,6 +42,35 @@ class UserUpdate(BaseModel):
     is_active: Optional[bool] = Field(None, description="Nouveau statut d'activation.")
     role: Optional[Literal["user", "admin"]] = Field(None, description="Nouveau rôle (user ou admin).")
 
+# Taille maximale d'un lot PATCH /v1/users/batch (une requête UPDATE, deux paramètres par valeur modifiée)
+MAX_BATCH_UPDATE = 1000
+
+class UserBatchItem(UserUpdate):
+    """
+    Modification d'un utilisateur dans un lot : son id et les champs à changer
+    (`{"id": 3, "is_active": false}` pour une désactivation).
+    """
+    id: int = Field(..., description="Identifiant de l'utilisateur à modifier.")
+
+class UserBatchUpdate(BaseModel):
+    """
+    Lot de modifications appliqué en une transaction.
+    """
+    users: List[UserBatchItem] = Field(..., min_items=1, max_items=MAX_BATCH_UPDATE, description="Modifications à appliquer (un id au plus une fois).")
+
+    @validator("users")
+    def unique_ids(cls, users):
+        if len({item.id for item in users}) != len(users):
+            raise ValueError("each user id may appear only once")
+        return users
+
+class UserBatchResult(BaseModel):
+    """
+    Résultat d'un lot : utilisateurs modifiés et ids inconnus.
+    """
+    updated: List[UserRead] = Field(..., description="Utilisateurs modifiés, triés par id.")
+    not_found: List[int] = Field(..., description="Ids absents de la base (rien n'est modifié pour eux).")
+
 class UserInDB(UserBase):
     """
     Schéma interne incluant le hash du mot de passe.
@@ -48,3 +81,22 @@ class UserInDB(UserBase):
 
     class Config:
         orm_mode = True
+
+
+class UserImportRow(BaseModel):
+    """
+    Résultat de l'import d'une ligne (création, doublon ou erreur de validation).
+    """
+    line: int = Field(..., description="Numéro de ligne dans le fichier source.")
+    email: Optional[str] = Field(None, description="Adresse email lue sur la ligne.")
+    status: Literal["created", "duplicate", "error"] = Field(..., description="Issue de l'import pour cette ligne.")
+    id: Optional[int] = Field(None, description="Identifiant de l'utilisateur créé.")
+    detail: Optional[str] = Field(None, description="Raison du rejet.")
+
+class UserImportReport(BaseModel):
+    """
+    Rapport d'un import massif d'utilisateurs.
+    """
+    created: int = Field(..., description="Nombre d'utilisateurs créés.")
+    rejected: int = Field(..., description="Nombre de lignes rejetées (doublons ou erreurs).")
+    rows: List[UserImportRow] = Field(..., description="Résultat ligne par ligne.")
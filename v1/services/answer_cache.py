@@ -0,0 +1,251 @@
+# Cache des réponses du chat : clés normalisées, niveau mémoire LRU + TTL, niveau SQLite persistant
+
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from core.config import get_settings
+from core.database import db_session, run_db
+from core.embeddings import Embedder, get_embedder
+from core.metrics import ANSWER_CACHE_LOOKUPS
+from v1.crud import answer_cache as answer_cache_crud
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Mots vides du français (sans accents, comme les questions normalisées). Les négations
+# (ne, pas, non, sans...) sont gardées : elles changent le sens d'une question juridique.
+STOPWORDS = frozenset("""
+a au aux avec c ce ces cet cette d de des du elle elles en est et etre il ils j je l la le les leur leurs
+lui m ma me mes moi mon n nos notre nous on ont ou par pour qu que quel quelle quelles quels qui quoi s sa
+se ses si son sont sur t ta te tes toi ton tu un une vos votre vous y
+""".split())
+
+# Écritures persistantes entre deux élagages LRU de la table
+_PRUNE_EVERY = 100
+
+
+def normalize_question(text: str) -> str:
+    """Sans accents ni casse, ponctuation et espaces multiples retirés, mots vides supprimés (ordre conservé)."""
+    folded = unicodedata.normalize("NFKD", text.casefold()).encode("ascii", "ignore").decode()
+    return " ".join(token for token in _TOKEN.findall(folded) if token not in STOPWORDS)
+
+
+@dataclass
+class CachedEntry:
+    answer: str
+    sources: List[dict]
+    created_at: float  # horodatage Unix
+    embedding: Optional[np.ndarray] = None
+
+
+@dataclass
+class CacheLookup:
+    """Résultat d'une consultation ; sur un échec, de quoi enregistrer la réponse une fois générée."""
+    key: str
+    prefix: str
+    corpus_version: int
+    result: str = "miss"  # memory | persistent | similar | miss
+    entry: Optional[CachedEntry] = None
+    embedding: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+class AnswerCache:
+    """
+    Deux niveaux devant le modèle :
+
+    - mémoire du worker : LRU de `max_size` réponses, expirées après `ttl`
+      secondes, avec recherche optionnelle de quasi-doublons (similarité
+      cosinus des plongements >= `similarity`) ;
+    - table `answer_cache` (via `core.database`) : partagée par les workers
+      et conservée au redémarrage, élaguée en LRU à `persistent_max_size`.
+
+    Clé : `modèle:k:question normalisée`. Toute modification du corpus
+    incrémente `corpus_state.version` (triggers) : le niveau mémoire est vidé
+    et les lignes d'une autre version supprimées à la consultation suivante.
+    Utilisé depuis la boucle d'évènements uniquement, pas de verrou.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl: float = 86400.0,
+        similarity: float = 0.0,
+        persistent: bool = True,
+        persistent_max_size: int = 100000,
+        embedder: Optional[Embedder] = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity = similarity
+        self.persistent = persistent
+        self.persistent_max_size = persistent_max_size
+        self.embedder = embedder
+        self._entries: "OrderedDict[str, CachedEntry]" = OrderedDict()
+        self._matrix = None  # (clés, vecteurs) des entrées avec plongement, reconstruit au besoin
+        self._corpus_version: Optional[int] = None
+        self._writes = 0
+        self.stats: Dict[str, int] = dict.fromkeys(
+            ("memory_hits", "persistent_hits", "similar_hits", "misses", "stores", "evictions", "invalidations"), 0,
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._matrix = None
+        self._corpus_version = None
+
+    # --- Niveau mémoire ---
+    def _expired(self, entry: CachedEntry, now: float) -> bool:
+        return now - entry.created_at > self.ttl
+
+    def _get(self, key: str, now: float) -> Optional[CachedEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry, now):
+            del self._entries[key]
+            self._matrix = None
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: str, entry: CachedEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        self._matrix = None
+
+    def _nearest(self, prefix: str, embedding: np.ndarray, now: float) -> Optional[CachedEntry]:
+        if self._matrix is None:
+            keys = [key for key, entry in self._entries.items() if entry.embedding is not None]
+            vectors = np.stack([self._entries[key].embedding for key in keys]) if keys else None
+            self._matrix = (keys, vectors)
+        keys, vectors = self._matrix
+        if vectors is None:
+            return None
+        scores = vectors @ embedding
+        found, expired = None, []
+        for position in np.argsort(-scores):
+            if scores[position] < self.similarity:
+                break
+            # Même modèle et même contexte seulement
+            key = keys[position]
+            if not key.startswith(prefix):
+                continue
+            entry = self._entries[key]
+            if self._expired(entry, now):
+                # Expirée : retirée, et le voisin suivant (encore valable) reste candidat
+                del self._entries[key]
+                expired.append(position)
+                continue
+            self._entries.move_to_end(key)
+            found = entry
+            break
+        if expired:
+            # Lignes expirées retirées de la matrice sans la reconstruire
+            keep = np.ones(len(keys), dtype=bool)
+            keep[expired] = False
+            kept = [key for key, kept_row in zip(keys, keep) if kept_row]
+            self._matrix = (kept, vectors[keep] if kept else None)
+        return found
+
+    def _check_version(self, version: int) -> bool:
+        """Vide le niveau mémoire si le corpus a changé ; True si la version est nouvelle pour ce worker."""
+        if version == self._corpus_version:
+            return False
+        if self._corpus_version is not None:
+            self._entries.clear()
+            self._matrix = None
+            self.stats["invalidations"] += 1
+        self._corpus_version = version
+        return True
+
+    # --- API ---
+    async def lookup(self, db, question: str, model: str, k: int) -> CacheLookup:
+        now = time.time()
+        version = await run_db(db, answer_cache_crud.get_corpus_version)
+        if self._check_version(version) and self.persistent:
+            await run_db(db, answer_cache_crud.delete_stale, version, now - self.ttl)
+        prefix = f"{model}:{k}:"
+        normalized = normalize_question(question)
+        lookup = CacheLookup(key=prefix + normalized, prefix=prefix, corpus_version=version)
+
+        lookup.entry = self._get(lookup.key, now)
+        if lookup.entry is not None:
+            lookup.result = "memory"
+        elif self.persistent:
+            row = await run_db(db, answer_cache_crud.get_answer, lookup.key, version, now - self.ttl, now)
+            if row is not None:
+                embedding = np.frombuffer(row.embedding, dtype=np.float32) if row.embedding else None
+                lookup.entry = CachedEntry(row.answer, json.loads(row.sources), row.created_at, embedding)
+                lookup.result = "persistent"
+                self._put(lookup.key, lookup.entry)
+        if lookup.entry is None and self.similarity > 0 and self.embedder is not None:
+            lookup.embedding = (await run_in_threadpool(self.embedder.embed, [normalized]))[0]
+            lookup.entry = self._nearest(prefix, lookup.embedding, now)
+            if lookup.entry is not None:
+                lookup.result = "similar"
+
+        self.stats["misses" if lookup.entry is None else f"{lookup.result}_hits"] += 1
+        ANSWER_CACHE_LOOKUPS.labels(lookup.result).inc()
+        return lookup
+
+    async def store(self, lookup: CacheLookup, answer: str, sources: List[dict]) -> None:
+        """Enregistre la réponse générée après un échec de `lookup` (ignorée si le corpus a changé entre-temps)."""
+        if lookup.corpus_version != self._corpus_version:
+            return
+        now = time.time()
+        self._put(lookup.key, CachedEntry(answer, sources, now, lookup.embedding))
+        self.stats["stores"] += 1
+        if not self.persistent:
+            return
+        embedding = lookup.embedding.astype(np.float32).tobytes() if lookup.embedding is not None else None
+        async with db_session() as db:
+            await run_db(
+                db, answer_cache_crud.put_answer,
+                lookup.key, answer, json.dumps(sources, ensure_ascii=False), embedding, lookup.corpus_version, now,
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                await run_db(db, answer_cache_crud.prune, self.persistent_max_size)
+
+    async def invalidate(self, db) -> None:
+        """Invalide toutes les réponses, dans tous les workers (nouvelle version du corpus)."""
+        await run_db(db, answer_cache_crud.bump_corpus_version)
+        self.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        lookups = sum(self.stats[name] for name in ("memory_hits", "persistent_hits", "similar_hits", "misses"))
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "corpus_version": self._corpus_version,
+        }
+
+
+@lru_cache
+def get_answer_cache() -> Optional[AnswerCache]:
+    """None si `ANSWER_CACHE_ENABLED=False`."""
+    settings = get_settings()
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    return AnswerCache(
+        max_size=settings.ANSWER_CACHE_SIZE,
+        ttl=settings.ANSWER_CACHE_TTL,
+        similarity=settings.ANSWER_CACHE_SIMILARITY,
+        persistent=settings.ANSWER_CACHE_PERSISTENT,
+        persistent_max_size=settings.ANSWER_CACHE_PERSISTENT_SIZE,
+        embedder=get_embedder() if settings.ANSWER_CACHE_SIMILARITY > 0 else None,
+    )
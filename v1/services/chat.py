@@ -0,0 +1,159 @@
+# Chat : articles de contexte, flux d'évènements de la réponse et mesure du premier token
+
+import logging
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from core.chat_model import ChatModel
+from core.config import get_settings
+from core.database import db_session, run_db
+from core.embeddings import get_embedder
+from core.metrics import CHAT_FIRST_TOKEN_LATENCY, CHAT_STREAMS, CHAT_STREAMS_ACTIVE
+from core.vector_index import get_vector_index
+from v1.crud import conversation as conversation_crud
+from v1.services import retrieval
+from v1.services.answer_cache import CacheLookup, get_answer_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ChatStats:
+    """Chronologie d'un flux : début (réception de la question), premier token, nombre de tokens."""
+
+    __slots__ = ("started", "first_token", "tokens", "failed", "cache")
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.tokens = 0
+        self.failed = False
+        self.cache = "off"  # résultat de la consultation du cache des réponses
+
+    @property
+    def first_token_ms(self) -> Optional[float]:
+        return round((self.first_token - self.started) * 1000, 2) if self.first_token is not None else None
+
+
+async def find_sources(db, question: str, k: int) -> List[retrieval.RetrievedChunk]:
+    """Articles passés au modèle comme contexte (recherche sémantique), aucun si `k` vaut 0."""
+    if k <= 0:
+        return []
+    return await retrieval.retrieve(db, get_vector_index(), get_embedder(), question, k)
+
+
+def _sources_payload(sources: List[retrieval.RetrievedChunk]) -> List[dict]:
+    return [
+        {"chunk_id": s.chunk_id, "code": s.code, "article_number": s.article_number, "score": round(s.score, 4)}
+        for s in sources
+    ]
+
+
+async def _save_answer(conversation_id: Optional[int], answer: str) -> None:
+    if conversation_id is not None:
+        async with db_session() as db:
+            await run_db(db, conversation_crud.add_message, conversation_id, "assistant", answer)
+
+
+async def chat_events(
+    model: ChatModel,
+    question: str,
+    sources: List[retrieval.RetrievedChunk],
+    stats: ChatStats,
+    cache_lookup: Optional[CacheLookup] = None,
+    history: Sequence[conversation_crud.HistoryMessage] = (),
+    conversation_id: Optional[int] = None,
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Évènements (nom, données) de la réponse : `sources`, puis un `token` par
+    token produit par le modèle, puis `done` (ou `error` si le modèle échoue).
+    La session base de données n'est plus utilisée ici : elle est rendue au
+    pool avant le début du flux. Une réponse complète est mise en cache
+    (`cache_lookup`) et ajoutée à la conversation ; une réponse interrompue ne l'est pas.
+    """
+    payload = _sources_payload(sources)
+    yield "sources", {"sources": payload}
+    answer = []
+    try:
+        async with aclosing(model.stream(question, [source.text for source in sources], history)) as tokens:
+            async for token in tokens:
+                if stats.first_token is None:
+                    stats.first_token = time.perf_counter()
+                stats.tokens += 1
+                answer.append(token)
+                yield "token", {"text": token}
+    except Exception:
+        logger.exception("Chat model %s failed", model.name)
+        stats.failed = True
+        yield "error", {"detail": "Model error"}
+        return
+    yield "done", {"tokens": stats.tokens, "first_token_ms": stats.first_token_ms, "cached": False}
+    if cache_lookup is not None:
+        await get_answer_cache().store(cache_lookup, "".join(answer), payload)
+    await _save_answer(conversation_id, "".join(answer))
+
+
+async def cached_events(lookup: CacheLookup, stats: ChatStats, conversation_id: Optional[int] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """Réponse servie par le cache : mêmes évènements, la réponse entière en un seul `token`."""
+    yield "sources", {"sources": lookup.entry.sources}
+    stats.first_token = time.perf_counter()
+    stats.tokens = 1
+    yield "token", {"text": lookup.entry.answer}
+    yield "done", {"tokens": 1, "first_token_ms": stats.first_token_ms, "cached": True}
+    await _save_answer(conversation_id, lookup.entry.answer)
+
+
+async def open_answer(
+    db, model: ChatModel, question: str, k: int, stats: ChatStats, conversation_id: Optional[int] = None,
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Prépare le flux de la réponse avec la session de la requête : cache des
+    réponses d'abord, sinon articles de contexte puis génération par le modèle.
+    Dans une conversation (appartenance vérifiée par l'appelant), la question
+    est enregistrée et les derniers messages, bornés par CHAT_HISTORY_MESSAGES
+    et CHAT_HISTORY_TOKENS, sont passés au modèle.
+    """
+    history: List[conversation_crud.HistoryMessage] = []
+    if conversation_id is not None:
+        settings = get_settings()
+        history = await run_db(
+            db, conversation_crud.load_recent_messages, conversation_id, settings.CHAT_HISTORY_MESSAGES, settings.CHAT_HISTORY_TOKENS,
+        )
+        await run_db(db, conversation_crud.add_message, conversation_id, "user", question)
+    # Avec un historique, la réponse ne dépend plus seulement de la question : pas de cache
+    cache = get_answer_cache() if not history else None
+    if history:
+        stats.cache = "bypass"
+    lookup = await cache.lookup(db, question, model.name, k) if cache is not None else None
+    if lookup is not None:
+        stats.cache = lookup.result
+        if lookup.entry is not None:
+            return cached_events(lookup, stats, conversation_id)
+    sources = await find_sources(db, question, k)
+    return chat_events(model, question, sources, stats, lookup, history, conversation_id)
+
+
+def stream_opened() -> None:
+    CHAT_STREAMS_ACTIVE.inc()
+
+
+def stream_closed(stats: ChatStats, transport: str, outcome: str) -> None:
+    """Fin d'un flux : métriques (latence du premier token, issue) et une ligne de log."""
+    if stats.failed:
+        outcome = "error"
+    CHAT_STREAMS_ACTIVE.dec()
+    CHAT_STREAMS.labels(transport, outcome).inc()
+    if stats.first_token is not None:
+        CHAT_FIRST_TOKEN_LATENCY.labels(transport).observe(stats.first_token - stats.started)
+    logger.info(
+        "chat stream %s",
+        outcome,
+        extra={
+            "transport": transport,
+            "outcome": outcome,
+            "tokens": stats.tokens,
+            "first_token_ms": stats.first_token_ms,
+            "cache": stats.cache,
+            "duration_ms": round((time.perf_counter() - stats.started) * 1000, 2),
+        },
+    )
@@ -0,0 +1,106 @@
+# Recherche sémantique : synchronisation de l'index de vecteurs et récupération des articles
+
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from core.database import run_db
+from core.embeddings import Embedder
+from core.vector_index import VectorIndex
+from v1.crud import document as document_crud
+
+
+class SyncResult(NamedTuple):
+    added: int
+    updated: int
+    removed: int
+
+
+async def sync_index(db, index: VectorIndex, embedder: Embedder, batch_size: int = 256) -> SyncResult:
+    """
+    Aligne l'index sur la table `chunks` : plonge les articles absents ou dont
+    l'empreinte du texte diffère de celle indexée (SQLite réattribue l'id le
+    plus élevé après une suppression : un article réingéré peut reprendre
+    l'id de l'ancien texte), retire ceux qui n'existent plus. Lectures en
+    base par lots de `batch_size` ; les vecteurs sont accumulés et ajoutés
+    par segments entiers (un `add` réécrit le dernier segment, l'appeler par
+    petits lots serait quadratique).
+
+    Le calcul des plongements passe par le threadpool : il ne bloque pas la
+    boucle d'évènements, y compris en mode async.
+    """
+    chunks = await run_db(db, document_crud.list_chunk_digests)
+    chunk_ids = np.fromiter((chunk_id for chunk_id, _ in chunks), dtype=np.int64, count=len(chunks))
+    # Empreinte NULL (ligne écrite hors du modèle) : 0, comme une empreinte indexée inconnue
+    chunk_digests = np.fromiter((digest or 0 for _, digest in chunks), dtype=np.int64, count=len(chunks))
+    indexed, indexed_digests = await run_in_threadpool(index.entries)
+    known = np.isin(chunk_ids, indexed)
+    current = np.zeros(len(chunk_ids), dtype=bool)
+    if indexed.size:
+        order = np.argsort(indexed)
+        positions = np.searchsorted(indexed[order], chunk_ids[known])
+        current[known] = (indexed_digests[order][positions] == chunk_digests[known]) & (chunk_digests[known] != 0)
+    missing = chunk_ids[~current]
+    removed = np.setdiff1d(indexed, chunk_ids)
+    if removed.size:
+        await run_in_threadpool(index.delete, removed)
+
+    pending_ids: List[np.ndarray] = []
+    pending_vectors: List[np.ndarray] = []
+    pending_digests: List[np.ndarray] = []
+    pending = 0
+    for start in range(0, len(missing), batch_size):
+        rows = await run_db(db, document_crud.get_chunk_texts, missing[start:start + batch_size].tolist())
+        if not rows:
+            continue
+        ids, texts, digests = zip(*rows)
+        pending_ids.append(np.asarray(ids, dtype=np.int64))
+        pending_vectors.append(await run_in_threadpool(embedder.embed, texts))
+        pending_digests.append(np.asarray(digests, dtype=np.int64))
+        pending += len(ids)
+        if pending >= index.segment_rows:
+            await _add(index, pending_ids, pending_vectors, pending_digests)
+            pending_ids, pending_vectors, pending_digests, pending = [], [], [], 0
+    if pending:
+        await _add(index, pending_ids, pending_vectors, pending_digests)
+    updated = int(known.sum() - current.sum())
+    return SyncResult(added=int(missing.size) - updated, updated=updated, removed=int(removed.size))
+
+
+async def _add(index: VectorIndex, ids: List[np.ndarray], vectors: List[np.ndarray], digests: List[np.ndarray]) -> None:
+    await run_in_threadpool(index.add, np.concatenate(ids), np.concatenate(vectors), np.concatenate(digests))
+
+
+class RetrievedChunk(NamedTuple):
+    chunk_id: int
+    document_id: int
+    code: str
+    title: str
+    article_number: Optional[str]
+    heading: Optional[str]
+    published_at: object
+    text: str
+    score: float
+
+
+def _search(index: VectorIndex, embedder: Embedder, query: str, k: int):
+    scores, ids = index.search(embedder.embed([query]), k)
+    return scores[0], ids[0]
+
+
+async def retrieve(db, index: VectorIndex, embedder: Embedder, query: str, k: int = 5) -> List[RetrievedChunk]:
+    """
+    Les `k` articles les plus proches de `query` (similarité cosinus), du plus
+    au moins proche. Un id encore dans l'index mais supprimé en base (avant le
+    prochain `sync_index`) est ignoré.
+    """
+    scores, ids = await run_in_threadpool(_search, index, embedder, query, k)
+    if not len(ids):
+        return []
+    rows = await run_db(db, document_crud.get_chunk_hits, ids.tolist())
+    return [
+        RetrievedChunk(**rows[chunk_id]._asdict(), score=float(score))
+        for score, chunk_id in zip(scores.tolist(), ids.tolist())
+        if chunk_id in rows
+    ]
@@ -0,0 +1,60 @@
+# Export en flux (NDJSON / CSV) de tous les utilisateurs
+
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Iterator, Sequence
+
+from core.database import get_database
+from v1.crud import user as user_crud
+
+EXPORT_COLUMNS = ("id", "email", "is_active", "role", "created_at")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _row_values(row) -> tuple:
+    created_at = row.created_at.isoformat() if row.created_at is not None else None
+    return (row.id, row.email, row.is_active, row.role, created_at)
+
+
+def encode_ndjson(rows: Iterable) -> str:
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, _row_values(row))), ensure_ascii=False) + "\n" for row in rows)
+
+
+def encode_csv(rows: Iterable, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(_row_values(row) for row in rows)
+    return buffer.getvalue()
+
+
+def _encode(fmt: str, rows: Sequence, first: bool) -> str:
+    return encode_csv(rows, header=first) if fmt == "csv" else encode_ndjson(rows)
+
+
+def iter_export_sync(fmt: str, batch_size: int) -> Iterator[str]:
+    """
+    Flux sync : une session dédiée (celle de la requête est fermée avant
+    l'envoi du corps) et `yield_per` pour ne garder qu'un lot en mémoire.
+    """
+    with get_database().SessionLocal() as db:
+        result = db.execute(user_crud.export_statement(batch_size))
+        first = True
+        for rows in result.partitions():
+            yield _encode(fmt, rows, first)
+            first = False
+        if first and fmt == "csv":
+            yield encode_csv((), header=True)
+
+
+async def iter_export_async(fmt: str, batch_size: int) -> AsyncIterator[str]:
+    async with get_database().AsyncSessionLocal() as db:
+        result = await db.stream(user_crud.export_statement(batch_size))
+        first = True
+        async for rows in result.partitions():
+            yield _encode(fmt, rows, first)
+            first = False
+        if first and fmt == "csv":
+            yield encode_csv((), header=True)
@@ -0,0 +1,142 @@
+# Import massif d'utilisateurs (CSV / JSONL), partagé par l'endpoint et le script CLI
+
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.security import hash_password
+from v1.models.user import User
+from v1.schemas.user import UserCreate, UserImportReport, UserImportRow
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Limite de paramètres par requête (SQLite en accepte 999 sur les anciennes versions)
+_IN_CHUNK = 500
+
+
+@dataclass
+class ImportCandidate:
+    line: int
+    user: UserCreate
+
+
+def _validate(line: int, data: dict, rejected: List[UserImportRow]) -> Optional[ImportCandidate]:
+    # Les cellules vides d'un CSV valent "non renseigné" (valeurs par défaut du schéma)
+    data = {key: value for key, value in data.items() if key and value not in (None, "")}
+    try:
+        return ImportCandidate(line, UserCreate(**data))
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(str(part) for part in error["loc"])
+        rejected.append(UserImportRow(line=line, email=data.get("email"), status="error", detail=f"{field}: {error['msg']}"))
+        return None
+
+
+def parse_rows(lines: Iterable[str], fmt: str) -> Tuple[List[ImportCandidate], List[UserImportRow]]:
+    """Lit et valide chaque ligne ; retourne les candidats valides et les lignes rejetées."""
+    candidates: List[ImportCandidate] = []
+    rejected: List[UserImportRow] = []
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for data in reader:
+            candidate = _validate(reader.line_num, data, rejected)
+            if candidate:
+                candidates.append(candidate)
+    else:
+        for line, raw in enumerate(lines, start=1):
+            if not raw.strip():
+                continue
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                rejected.append(UserImportRow(line=line, status="error", detail="Invalid JSON"))
+                continue
+            if not isinstance(data, dict):
+                rejected.append(UserImportRow(line=line, status="error", detail="Expected a JSON object"))
+                continue
+            candidate = _validate(line, data, rejected)
+            if candidate:
+                candidates.append(candidate)
+    return candidates, rejected
+
+
+def filter_new(db: Session, candidates: List[ImportCandidate]) -> Tuple[List[ImportCandidate], List[UserImportRow]]:
+    """Écarte en une passe les emails déjà en base et les doublons internes au fichier."""
+    emails = list({c.user.email for c in candidates})
+    existing: Set[str] = set()
+    for start in range(0, len(emails), _IN_CHUNK):
+        chunk = emails[start:start + _IN_CHUNK]
+        existing.update(db.execute(select(User.email).where(User.email.in_(chunk))).scalars())
+    fresh: List[ImportCandidate] = []
+    rejected: List[UserImportRow] = []
+    for candidate in candidates:
+        email = candidate.user.email
+        if email in existing:
+            rejected.append(UserImportRow(line=candidate.line, email=email, status="duplicate", detail="Email already registered"))
+            continue
+        existing.add(email)
+        fresh.append(candidate)
+    return fresh, rejected
+
+
+def hash_passwords(passwords: List[str], workers: int) -> List[str]:
+    """Hachage parallèle (argon2-cffi relâche le GIL, les threads occupent tous les coeurs)."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(hash_password, passwords))
+
+
+def insert_rows(db: Session, candidates: List[ImportCandidate], hashed_passwords: List[str], batch_size: int = 500) -> List[UserImportRow]:
+    """
+    Insère par lots `INSERT ... VALUES (...), (...) RETURNING id` avec un commit
+    par lot. Si un lot échoue (email inséré entre-temps), il est rejoué ligne
+    par ligne : seules les lignes en conflit sont reportées en doublon.
+    """
+    results: List[UserImportRow] = []
+    statement = insert(User).returning(User.id, User.email)
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start:start + batch_size]
+        params = [
+            {
+                "email": c.user.email,
+                "hashed_password": hashed,
+                "is_active": True if c.user.is_active is None else c.user.is_active,
+                "role": c.user.role or "user",
+            }
+            for c, hashed in zip(batch, hashed_passwords[start:start + batch_size])
+        ]
+        try:
+            ids = {email: user_id for user_id, email in db.execute(statement, params)}
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            results.extend(_insert_one_by_one(db, statement, batch, params))
+            continue
+        results.extend(UserImportRow(line=c.line, email=c.user.email, status="created", id=ids.get(c.user.email)) for c in batch)
+    return results
+
+
+def _insert_one_by_one(db: Session, statement, batch: List[ImportCandidate], params: List[dict]) -> List[UserImportRow]:
+    results: List[UserImportRow] = []
+    for candidate, row in zip(batch, params):
+        try:
+            user_id = db.execute(statement, row).first().id
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            results.append(UserImportRow(line=candidate.line, email=candidate.user.email, status="duplicate", detail="Email already registered"))
+            continue
+        results.append(UserImportRow(line=candidate.line, email=candidate.user.email, status="created", id=user_id))
+    return results
+
+
+def build_report(rows: List[UserImportRow]) -> UserImportReport:
+    rows = sorted(rows, key=lambda row: row.line)
+    created = sum(row.status == "created" for row in rows)
+    return UserImportReport(created=created, rejected=len(rows) - created, rows=rows)